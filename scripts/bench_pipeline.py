@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-symbol pipeline on a synthetic day.
+
+  writer : synchronous save_timeseries_parquet vs AsyncParquetWriter (compute/I-O overlap)
+  arrow  : pandas per-symbol path vs the Arrow-native path (ingest -> grid -> OFI -> parquet)
+  sim    : ofi_sim generator throughput, and pipeline beta vs the simulator's known impact
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse, tempfile, time
+import numpy as np
+import pandas as pd
+from src.ofi_utils import resolve_schema, process_symbol_day, save_timeseries_parquet
+
+
+def synthetic_day(n_symbols: int, quotes_per_symbol: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed); parts = []
+    for i in range(n_symbols):
+        n = quotes_per_symbol
+        t = np.sort(rng.uniform(34200, 57600, n)); bid = 50 + np.round(np.cumsum(rng.normal(0, 0.01, n)), 2)
+        parts.append(pd.DataFrame({"sym_root": f"S{i:04d}", "time_m": t, "best_bid": bid,
+                                   "best_ask": bid + 0.01 * rng.integers(1, 3, n),
+                                   "best_bidsiz": rng.integers(1, 50, n).astype(float),
+                                   "best_asksiz": rng.integers(1, 50, n).astype(float)}))
+    return pd.concat(parts, ignore_index=True)
+
+
+def bench_writer(df: pd.DataFrame, day: pd.Timestamp, threads: int):
+    from src.ofi_io import AsyncParquetWriter
+    schema = resolve_schema(df); cmap = schema.cmap; groups = [g for _, g in df.groupby(cmap.symbol)]
+    with tempfile.TemporaryDirectory() as tmp:
+        compute = write = 0.0; t0 = time.perf_counter()
+        for g in groups:
+            t1 = time.perf_counter(); ts, row, _ = process_symbol_day(g, cmap, day, do_halfhour_10s=False, time_unit=schema.time_unit)
+            t2 = time.perf_counter(); save_timeseries_parquet(ts, os.path.join(tmp, "sync"), "d", row["symbol"])
+            compute += t2 - t1; write += time.perf_counter() - t2
+        sync_wall = time.perf_counter() - t0
+        print(f"  sync : wall={sync_wall:.3f}s compute={compute:.3f}s write={write:.3f}s")
+
+        compute = 0.0; t0 = time.perf_counter()
+        with AsyncParquetWriter(threads=threads) as w:
+            for g in groups:
+                t1 = time.perf_counter(); ts, row, _ = process_symbol_day(g, cmap, day, do_halfhour_10s=False, time_unit=schema.time_unit)
+                compute += time.perf_counter() - t1
+                w.submit(ts, os.path.join(tmp, "async"), "d", row["symbol"])
+        async_wall = time.perf_counter() - t0
+        # Share of writer time hidden behind compute: 1.0 means I/O fully overlapped
+        hidden = (compute + w.write_seconds - async_wall) / w.write_seconds if w.write_seconds else float("nan")
+        print(f"  async: wall={async_wall:.3f}s compute={compute:.3f}s write={w.write_seconds:.3f}s "
+              f"blocked={w.blocked_seconds:.3f}s overlap={hidden:.0%} speedup={sync_wall / async_wall:.2f}x")
+
+
+def bench_arrow(df: pd.DataFrame, day: pd.Timestamp):
+    import pyarrow as pa, pyarrow.compute as pc
+    from src.ofi_arrow import session_grid, symbol_slices, process_symbol_arrow, save_timeseries_arrow
+    schema = resolve_schema(df); cmap = schema.cmap
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        for _, g in df.groupby(cmap.symbol):
+            ts, row, _ = process_symbol_day(g, cmap, day, do_halfhour_10s=False, time_unit=schema.time_unit)
+            save_timeseries_parquet(ts, os.path.join(tmp, "pandas"), "d", row["symbol"])
+        pandas_wall = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.take(pc.sort_indices(table, sort_keys=[(cmap.symbol, "ascending")]))
+        grid = session_grid(day)
+        for sym, t in symbol_slices(table, cmap.symbol):
+            ts, row, _ = process_symbol_arrow(t, sym, schema, day, grid, do_halfhour_10s=False)
+            save_timeseries_arrow(ts, os.path.join(tmp, "arrow"), "d", row["symbol"])
+        arrow_wall = time.perf_counter() - t0
+        same = all(np.allclose(pd.read_parquet(os.path.join(tmp, "pandas", "timeseries", "d", f)).to_numpy(),
+                               pd.read_parquet(os.path.join(tmp, "arrow", "timeseries", "d", f)).to_numpy(), equal_nan=True)
+                   for f in os.listdir(os.path.join(tmp, "pandas", "timeseries", "d")))
+    print(f"  pandas: wall={pandas_wall:.3f}s")
+    print(f"  arrow : wall={arrow_wall:.3f}s speedup={pandas_wall / arrow_wall:.2f}x outputs_match={same}")
+
+
+def bench_sim(n_symbols: int, rate: float, day: pd.Timestamp):
+    from src.ofi_sim import SimConfig, simulate_day
+    cfg = SimConfig(n_symbols=n_symbols, quote_rate=rate, impact_bps=np.linspace(0.1, 1.0, n_symbols))
+    t0 = time.perf_counter(); df, truth = simulate_day(cfg); wall = time.perf_counter() - t0
+    print(f"  generate: {len(df):,} quotes in {wall:.3f}s ({len(df) / wall / 1e6:.2f}M quotes/s)")
+    schema = resolve_schema(df); ratios = []
+    for j, (_, g) in enumerate(df.groupby(schema.cmap.symbol)):
+        _, row, _ = process_symbol_day(g, schema.cmap, day, do_halfhour_10s=False, time_unit=schema.time_unit)
+        ratios.append(row["beta"] / truth["beta_bps"][j])
+    print(f"  oracle  : beta/true median={np.median(ratios):.3f} range=[{min(ratios):.3f}, {max(ratios):.3f}] "
+          f"exact_share min={truth['exact_share'].min():.3f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark OFI pipeline stages on a synthetic day.")
+    ap.add_argument("what", nargs="?", default="writer", choices=["writer", "arrow", "sim"])
+    ap.add_argument("--symbols", type=int, default=40)
+    ap.add_argument("--quotes", type=int, default=20000, help="Quotes per symbol")
+    ap.add_argument("--threads", type=int, default=2, help="Writer threads")
+    ap.add_argument("--rate", type=float, default=20.0, help="sim: intra-second quotes per symbol-second")
+    args = ap.parse_args()
+
+    day = pd.Timestamp("2017-01-03", tz="America/New_York")
+    if args.what == "sim":
+        print(f"[bench] sim: {args.symbols} symbols x {args.rate:g} quotes/s")
+        return bench_sim(args.symbols, args.rate, day)
+    df = synthetic_day(args.symbols, args.quotes)
+    print(f"[bench] {args.what}: {args.symbols} symbols x {args.quotes} quotes")
+    if args.what == "writer":
+        bench_writer(df, day, args.threads)
+    elif args.what == "arrow":
+        bench_arrow(df, day)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 """
 Generate publication-quality figures for OFI replication project presentation.
+
+Figures are declared with their inputs and built through src.ofi_figures: shared inputs load once,
+figures render in parallel, and figures whose inputs are unchanged since the last run are skipped.
 """
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
+from src.ofi_density import Density2D
+from src.ofi_figures import Figure, Input, build_figures
 
 # Set publication-quality style
 plt.style.use('seaborn-v0_8-darkgrid')
@@ -25,21 +31,13 @@ plt.rcParams['ytick.labelsize'] = 9
 plt.rcParams['legend.fontsize'] = 9
 plt.rcParams['figure.titlesize'] = 13
 
-def load_results():
-    """Load the fixed results"""
-    base_dir = Path(__file__).resolve().parents[1]
-    results_file = base_dir / 'results_fixed' / 'regressions' / 'by_symbol_day.parquet'
-    
-    if not results_file.exists():
-        print(f"Results file not found: {results_file}")
-        return None
-    
-    df = pd.read_parquet(results_file)
-    print(f"Loaded {len(df)} observations")
-    return df
+BASE_DIR = Path(__file__).resolve().parents[1]
+RESULTS_FILE = BASE_DIR / 'results_fixed' / 'regressions' / 'by_symbol_day.parquet'
+TS_DIR = BASE_DIR / 'results_fixed' / 'timeseries' / '2017-01-03'
+SCATTER_SYMBOLS = ['AMD', 'AAPL', 'SPY', 'NVDA']
 
 
-def figure1_beta_distribution(df, out_dir):
+def figure1_beta_distribution(out_path, df):
     """Figure 1: Distribution of beta coefficients"""
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
     
@@ -71,12 +69,12 @@ def figure1_beta_distribution(df, out_dir):
     ax2.grid(True, alpha=0.3, axis='y')
     
     plt.tight_layout()
-    plt.savefig(out_dir / 'fig1_beta_distribution.png', bbox_inches='tight')
+    plt.savefig(out_path, bbox_inches='tight')
     plt.close()
     print("✓ Created Figure 1: Beta Distribution")
 
 
-def figure2_rsquared_analysis(df, out_dir):
+def figure2_rsquared_analysis(out_path, df):
     """Figure 2: R-squared analysis"""
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
     
@@ -106,48 +104,27 @@ def figure2_rsquared_analysis(df, out_dir):
                 f'{val:.3f}', ha='center', va='bottom', fontsize=8)
     
     plt.tight_layout()
-    plt.savefig(out_dir / 'fig2_rsquared_analysis.png', bbox_inches='tight')
+    plt.savefig(out_path, bbox_inches='tight')
     plt.close()
     print("✓ Created Figure 2: R-squared Analysis")
 
 
-def figure3_scatter_examples(df, out_dir):
-    """Figure 3: Example scatter plots for selected symbols"""
-    # Load timeseries for a few symbols on 2017-01-03
-    base_dir = Path(__file__).resolve().parents[1]
-    ts_dir = base_dir / 'results_fixed' / 'timeseries' / '2017-01-03'
-    
-    # Select 4 diverse symbols
-    symbols_to_plot = ['AMD', 'AAPL', 'SPY', 'NVDA']
-    
+def figure3_scatter_examples(out_path, df, *timeseries, symbols=SCATTER_SYMBOLS):
+    """Figure 3: Example scatter plots for selected symbols (timeseries on 2017-01-03, None if missing)"""
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
     axes = axes.flatten()
     
-    for idx, symbol in enumerate(symbols_to_plot):
-        ts_file = ts_dir / f'{symbol}.parquet'
-        if not ts_file.exists():
+    for idx, (symbol, ts) in enumerate(zip(symbols, timeseries)):
+        if ts is None:
             continue
         
-        ts = pd.read_parquet(ts_file)
         valid = ts[['normalized_OFI', 'd_mid_bps']].dropna()
         
-        # Subsample for plotting
-        if len(valid) > 3000:
-            valid = valid.sample(n=3000, random_state=42)
-        
         ax = axes[idx]
         
-        # Scatter plot
-        ax.scatter(valid['normalized_OFI'], valid['d_mid_bps'], 
-                  s=2, alpha=0.3, color='steelblue')
-        
-        # Regression line
-        x = valid['normalized_OFI'].values
-        y = valid['d_mid_bps'].values
-        z = np.polyfit(x, y, 1)
-        p = np.poly1d(z)
-        x_line = np.linspace(valid['normalized_OFI'].min(), valid['normalized_OFI'].max(), 100)
-        ax.plot(x_line, p(x_line), "r-", linewidth=2, label=f'y = {z[0]:.2f}x + {z[1]:.2f}')
+        # Binned density of every point (no subsampling) with the full-sample regression line
+        dens = Density2D.from_data(valid['normalized_OFI'].values, valid['d_mid_bps'].values, bins=(120, 120))
+        dens.plot(ax, colorbar=False)
         
         # Get beta and R² for this symbol-day
         row = df[(df['symbol'] == symbol) & (df['day'] == '2017-01-03')]
@@ -166,12 +143,12 @@ def figure3_scatter_examples(df, out_dir):
         ax.axvline(0, color='gray', linestyle='-', linewidth=0.8, alpha=0.5)
     
     plt.tight_layout()
-    plt.savefig(out_dir / 'fig3_scatter_examples.png', bbox_inches='tight')
+    plt.savefig(out_path, bbox_inches='tight')
     plt.close()
     print("✓ Created Figure 3: Scatter Plot Examples")
 
 
-def figure4_summary_table(df, out_dir):
+def figure4_summary_table(out_path, df):
     """Figure 4: Summary statistics table"""
     fig, ax = plt.subplots(figsize=(12, 8))
     ax.axis('tight')
@@ -236,24 +213,17 @@ def figure4_summary_table(df, out_dir):
     plt.title('OFI Replication Results Summary\nContetal. (2014) Methodology', 
              fontsize=14, fontweight='bold', pad=20)
     
-    plt.savefig(out_dir / 'fig4_summary_table.png', bbox_inches='tight', dpi=300)
+    plt.savefig(out_path, bbox_inches='tight', dpi=300)
     plt.close()
     print("✓ Created Figure 4: Summary Table")
 
 
-def figure5_time_series_example(df, out_dir):
-    """Figure 5: Time series example showing OFI and price movements"""
-    base_dir = Path(__file__).resolve().parents[1]
-    ts_dir = base_dir / 'results_fixed' / 'timeseries' / '2017-01-03'
-    
-    # Use AMD as example
-    ts_file = ts_dir / 'AMD.parquet'
-    if not ts_file.exists():
+def figure5_time_series_example(out_path, ts):
+    """Figure 5: Time series example showing OFI and price movements (AMD, 2017-01-03)"""
+    if ts is None:
         print("! Skipping Figure 5: Timeseries file not found")
         return
     
-    ts = pd.read_parquet(ts_file)
-    
     # Plot first hour only for clarity (9:30-10:30)
     ts = ts.iloc[:3600]  # First 3600 seconds = 1 hour
     
@@ -296,12 +266,12 @@ def figure5_time_series_example(df, out_dir):
     axes[3].set_xticklabels([time_labels[i] if i < len(time_labels) else '' for i in tick_positions], rotation=0)
     
     plt.tight_layout()
-    plt.savefig(out_dir / 'fig5_timeseries_example.png', bbox_inches='tight')
+    plt.savefig(out_path, bbox_inches='tight')
     plt.close()
     print("✓ Created Figure 5: Time Series Example")
 
 
-def figure6_comparison_before_after(out_dir):
+def figure6_comparison_before_after(out_path):
     """Figure 6: Before/After comparison of sign fix"""
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
     
@@ -384,41 +354,53 @@ def figure6_comparison_before_after(out_dir):
     ax2.grid(True)
     
     plt.tight_layout()
-    plt.savefig(out_dir / 'fig6_before_after_comparison.png', bbox_inches='tight')
+    plt.savefig(out_path, bbox_inches='tight')
     plt.close()
     print("✓ Created Figure 6: Before/After Comparison")
 
 
+def presentation_figures(out_dir):
+    """The deck as a build graph: each figure with the files it reads (AMD's timeseries is shared by 3 and 5)."""
+    me = os.path.abspath(__file__)
+    res = Input(str(RESULTS_FILE))
+    ts = [Input(str(TS_DIR / f'{sym}.parquet')) for sym in SCATTER_SYMBOLS]
+    amd = ts[SCATTER_SYMBOLS.index('AMD')]
+    fig = lambda name, fn, inputs: Figure(str(out_dir / name), f"{me}:{fn}", tuple(inputs))
+    return [
+        fig('fig1_beta_distribution.png', 'figure1_beta_distribution', [res]),
+        fig('fig2_rsquared_analysis.png', 'figure2_rsquared_analysis', [res]),
+        fig('fig3_scatter_examples.png', 'figure3_scatter_examples', [res, *ts]),
+        fig('fig4_summary_table.png', 'figure4_summary_table', [res]),
+        fig('fig5_timeseries_example.png', 'figure5_time_series_example', [amd]),
+        fig('fig6_before_after_comparison.png', 'figure6_comparison_before_after', []),
+    ]
+
+
 def main():
+    ap = argparse.ArgumentParser(description="Render the presentation figures.")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Render processes (default: all cores)")
+    ap.add_argument("--force", action="store_true", help="Re-render figures whose inputs are unchanged")
+    args = ap.parse_args()
+
     print("\n" + "="*70)
     print("GENERATING PRESENTATION FIGURES")
     print("="*70)
     
     # Create output directory
-    base_dir = Path(__file__).resolve().parents[1]
-    out_dir = base_dir / 'figures_presentation'
+    out_dir = BASE_DIR / 'figures_presentation'
     out_dir.mkdir(exist_ok=True)
     
-    # Load results
-    df = load_results()
-    if df is None:
+    if not RESULTS_FILE.exists():
+        print(f"Results file not found: {RESULTS_FILE}")
         print("ERROR: Could not load results")
         return
     
-    print(f"\nGenerating figures from {len(df)} observations...")
-    print()
-    
-    # Generate all figures
-    figure1_beta_distribution(df, out_dir)
-    figure2_rsquared_analysis(df, out_dir)
-    figure3_scatter_examples(df, out_dir)
-    figure4_summary_table(df, out_dir)
-    figure5_time_series_example(df, out_dir)
-    figure6_comparison_before_after(out_dir)
+    rep = build_figures(presentation_figures(out_dir), manifest=str(out_dir / '.figure_manifest.json'),
+                        workers=args.workers, force=args.force)
     
     print()
     print("="*70)
-    print(f"✓ ALL FIGURES CREATED")
+    print(f"✓ {len(rep['rendered'])} FIGURES CREATED, {len(rep['skipped'])} UNCHANGED (skipped) in {rep['seconds']:.1f}s")
     print(f"✓ Saved to: {out_dir}")
     print("="*70)
     print("\nFigures generated:")
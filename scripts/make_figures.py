@@ -1,30 +1,19 @@
 # scripts/make_figures.py
-import argparse, os, glob, pandas as pd
-from src.ofi_utils import make_scatter, beta_histogram, intraday_beta_vs_depth
+import argparse, os
+from src.ofi_figures import build_figures, results_figures
 
 def main():
     ap = argparse.ArgumentParser(description="Regenerate figures from existing results.")
     ap.add_argument("--results", default="results", help="Results directory")
     ap.add_argument("--figdir", default="figures", help="Figures directory")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Render processes (default: all cores)")
+    ap.add_argument("--force", action="store_true", help="Re-render figures whose inputs are unchanged")
     args = ap.parse_args()
 
-    panel_path = os.path.join(args.results, "regressions", "by_symbol_day.parquet")
-    beta_histogram(panel_path, figdir=args.figdir)
-
-    panel_halfhour = os.path.join(args.results, "regressions", "by_symbol_day_halfhour.parquet")
-    timeseries_root = os.path.join(args.results, "timeseries")
-    intraday_beta_vs_depth(panel_halfhour, timeseries_root, figdir=args.figdir)
-
-    timeseries_root = os.path.join(args.results, "timeseries")
-    if os.path.exists(timeseries_root):
-        for day in os.listdir(timeseries_root):
-            day_dir = os.path.join(timeseries_root, day)
-            if not os.path.isdir(day_dir): continue
-            for pq in glob.glob(os.path.join(day_dir, "*.parquet")):
-                symbol = os.path.splitext(os.path.basename(pq))[0]
-                ts = pd.read_parquet(pq)
-                make_scatter(ts, symbol=symbol, day=day, figdir=args.figdir)
-
+    rep = build_figures(results_figures(args.results, args.figdir), manifest=os.path.join(args.figdir, ".figure_manifest.json"),
+                        workers=args.workers, force=args.force)
+    print(f"[make_figures] rendered={len(rep['rendered'])} skipped={len(rep['skipped'])} (unchanged) "
+          f"shared_inputs={rep['shared_inputs']} in {rep['seconds']:.1f}s")
     print(f"[make_figures] Figures written to: {args.figdir}")
 
 if __name__ == "__main__":
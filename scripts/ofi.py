@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""Entry point for the unified ``ofi`` CLI (see src/ofi_cli.py)."""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.ofi_cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from pathlib import Path
 from src.ofi_pipeline import run_one_day
+from src.ofi_cache import DiskCache
 import pandas as pd
 
 def main():
@@ -75,4 +76,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    with DiskCache():
+        main()
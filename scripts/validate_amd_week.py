@@ -20,6 +20,7 @@ from src.ofi_utils import (
     normalize_ofi,
     run_ols_symbol_day
 )
+from src.ofi_cache import DiskCache
 
 def process_amd_day(raw_path: Path, date_str: str) -> dict:
     """Process AMD data for a single day and return detailed statistics."""
@@ -278,4 +279,6 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    # Repeated runs reuse the TOB grid / OFI for unchanged inputs (.ofi_cache, OFI_CACHE_DIR to relocate)
+    with DiskCache():
+        main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Check the native .rda reader (src/ofi_rda.py) against pyreadr on every raw day file.
+
+  python scripts/verify_rda_reader.py [--raw data/raw] [--columns]
+
+Every column must match value for value (character columns compared as strings, NA as missing); --columns also
+checks the resolved-column read used by the pipeline. Exits non-zero on the first mismatch.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse, glob, time
+import pandas as pd
+import pyreadr
+from src.ofi_rda import read_rda_native
+from src.ofi_utils import pipeline_columns
+
+
+def plain(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({c: df[c].astype(object) if isinstance(df[c].dtype, pd.CategoricalDtype) else df[c]
+                         for c in df.columns}).reset_index(drop=True)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--raw", default="data/raw"); ap.add_argument("--columns", action="store_true")
+    args = ap.parse_args(argv)
+    files = sorted(glob.glob(os.path.join(args.raw, "*.rda")))
+    if not files: print(f"no .rda files under {args.raw}"); return 1
+    for path in files:
+        t = time.perf_counter(); ref = plain(next(iter(pyreadr.read_r(path).values()))); t_ref = time.perf_counter() - t
+        t = time.perf_counter(); got = read_rda_native(path); t_nat = time.perf_counter() - t
+        try:
+            pd.testing.assert_frame_equal(plain(got), ref, check_dtype=False)
+            if args.columns:
+                sub = read_rda_native(path, pipeline_columns)
+                pd.testing.assert_frame_equal(plain(sub), ref[list(sub.columns)], check_dtype=False)
+        except AssertionError as e:
+            print(f"MISMATCH {os.path.basename(path)}: {e}"); return 1
+        print(f"ok {os.path.basename(path)}: {len(ref):,} rows x {ref.shape[1]} cols  pyreadr {t_ref:.2f}s  native {t_nat:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
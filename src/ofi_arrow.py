@@ -0,0 +1,166 @@
+# src/ofi_arrow.py
+from __future__ import annotations
+import contextlib, os, numpy as np, pandas as pd
+import pyarrow as pa, pyarrow.compute as pc, pyarrow.parquet as pq
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Tuple
+from . import ofi_profile
+from .ofi_calendar import NY, session
+from .ofi_utils import (ColumnMap, atomic_path, SchemaInfo, pipeline_columns, read_rda, resolve_schema, parse_trading_day_from_filename, time_m_to_ns,
+                        run_ols_xy, resample_to, write_symbol_rows)
+
+TS_COLUMNS = ("bid", "ask", "bid_sz", "ask_sz", "depth", "ofi", "mid", "d_mid_bps", "depth_roll_10m", "normalized_OFI")
+
+# Arrow-native execution path: ingest, grid alignment, OFI and Parquet output work on Arrow/NumPy buffers;
+# pandas appears only for the regression call and the optional 10s half-hour baseline.
+
+def load_day_table(path: str, source: str = "taq") -> Tuple[pa.Table, SchemaInfo]:
+    """Day as an Arrow table (resolved columns only), stably sorted by symbol.
+
+    ``path`` may be a cached parquet day (ofi_outofcore) or an .rda file (one pandas->Arrow conversion).
+    """
+    if path.endswith(".parquet"):
+        from .ofi_outofcore import cached_schema
+        schema = cached_schema(path); c = schema.cmap
+        table = pq.read_table(path, columns=[c.symbol, c.time_m, c.bid, c.ask, c.bidsz, c.asksz])
+    else:
+        df = read_rda(path, pipeline_columns); schema = resolve_schema(df, source); c = schema.cmap
+        table = pa.Table.from_pandas(df[[c.symbol, c.time_m, c.bid, c.ask, c.bidsz, c.asksz]], preserve_index=False)
+        if pa.types.is_dictionary(table.schema.field(c.symbol).type):                   # categorical from the native reader
+            table = table.set_column(0, c.symbol, table.column(0).cast(pa.string()))
+        del df
+    order = pc.sort_indices(table, sort_keys=[(schema.cmap.symbol, "ascending")])
+    return table.take(order), schema
+
+
+def symbol_slices(table: pa.Table, sym_col: str) -> Iterator[Tuple[str, pa.Table]]:
+    """Zero-copy per-symbol slices of a symbol-sorted table."""
+    sym = table.column(sym_col).combine_chunks()
+    if len(sym) == 0: return
+    change = pc.not_equal(sym.slice(1), sym.slice(0, len(sym) - 1)).to_numpy(zero_copy_only=False)
+    bounds = np.concatenate([[0], np.flatnonzero(change) + 1, [len(sym)]])
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        yield sym[int(a)].as_py(), table.slice(int(a), int(b - a))
+
+
+def _f64(col) -> np.ndarray:
+    arr = col.combine_chunks() if isinstance(col, pa.ChunkedArray) else col
+    return arr.to_numpy(zero_copy_only=False).astype("float64", copy=False)
+
+
+@dataclass
+class SessionGrid:
+    start_ns: int; end_ns: int; step_ns: int; unit: str = "ns"
+    grid_ns: Optional[np.ndarray] = None      # cached session instants (shared, read-only)
+
+def session_grid(day: pd.Timestamp, freq: str = "1s") -> SessionGrid:
+    # Built from the cached session calendar (ofi_calendar), as build_tob_series_1s, so the instants and early
+    # closes match exactly
+    s = session(day, freq)
+    return SessionGrid(s.open.value, s.close.value, pd.Timedelta(freq).value, s.unit, s.grid_ns)
+
+
+def tob_grid(t: pa.Table, cmap: ColumnMap, day: pd.Timestamp, time_unit: str, grid: SessionGrid) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Arrow counterpart of build_tob_series_1s: returns (grid instants in ns, {bid, ask, bid_sz, ask_sz})."""
+    midnight = pd.Timestamp(day.year, day.month, day.day, tz=NY).value
+    inst = midnight + time_m_to_ns(t.column(cmap.time_m).to_numpy(), time_unit)          # quote instants, epoch ns
+    bid, ask = _f64(t.column(cmap.bid)), _f64(t.column(cmap.ask))
+    keep = np.flatnonzero(ask >= bid)
+    order = keep[np.argsort(inst[keep], kind="stable")]
+    inst = inst[order]
+    last = np.ones(len(inst), dtype=bool); last[:-1] = inst[1:] != inst[:-1]  # duplicated(keep="last")
+    order, inst = order[last], inst[last]
+    grid_ns = grid.grid_ns if grid.grid_ns is not None else np.arange(grid.start_ns, grid.end_ns + 1, grid.step_ns, dtype="int64")
+    pos = np.searchsorted(inst, grid_ns); pos_c = np.minimum(pos, max(len(inst) - 1, 0))
+    hit = (pos < len(inst)) & (inst[pos_c] == grid_ns) if len(inst) else np.zeros(len(grid_ns), dtype=bool)
+    cols, valid = {}, np.ones(len(grid_ns), dtype=bool)
+    for name, src in (("bid", bid), ("ask", ask), ("bid_sz", t.column(cmap.bidsz)), ("ask_sz", t.column(cmap.asksz))):
+        v = (src if isinstance(src, np.ndarray) else _f64(src))[order]
+        take = np.where(hit, pos_c, -1); take[hit & np.isnan(v[pos_c] if len(v) else np.zeros(len(grid_ns)))] = -1
+        take = np.maximum.accumulate(take)                                      # reindex(grid).ffill() per column
+        valid &= take >= 0
+        cols[name] = np.where(take >= 0, v[np.maximum(take, 0)] if len(v) else np.nan, np.nan)
+    return grid_ns[valid], {k: v[valid] for k, v in cols.items()}
+
+
+def ofi_arrays(c: Dict[str, np.ndarray], window_secs: int = 600, min_periods: int = 50, max_abs_bps: Optional[float] = 1000.0) -> Dict[str, np.ndarray]:
+    """compute_ofi_depth_mid + normalize_ofi on NumPy arrays (same accumulation order as the pandas version)."""
+    bP, aP, bS, aS = c["bid"], c["ask"], c["bid_sz"], c["ask_sz"]; n = len(bP)
+    lag = lambda x: np.concatenate([[np.nan], x[:-1]]) if n else x
+    bS1, aS1 = lag(bS), lag(aS)
+    with np.errstate(invalid="ignore"):
+        dbP, daP, dbS, daS = bP - lag(bP), aP - lag(aP), np.nan_to_num(bS - bS1), np.nan_to_num(aS - aS1)
+        ofi = np.zeros(n)
+        ofi += np.where(dbP > 0, bS, 0.0); ofi += np.where(dbP < 0, -bS1, 0.0); ofi += np.where(dbP == 0, dbS, 0.0)
+        ofi += np.where(daP > 0, -aS1, 0.0); ofi += np.where(daP < 0, -aS, 0.0); ofi += np.where(daP == 0, -daS, 0.0)
+        depth = bS + aS; mid = 0.5 * (bP + aP); d_mid_bps = 1e4 * (mid / lag(mid) - 1)
+        if max_abs_bps is not None: d_mid_bps = np.where(np.abs(d_mid_bps) < max_abs_bps, d_mid_bps, np.nan)
+        cs = np.concatenate([[0.0], np.cumsum(depth)]); idx = np.arange(1, n + 1); lo = np.maximum(idx - window_secs, 0)
+        cnt = idx - lo; roll = np.where(cnt >= min_periods, (cs[idx] - cs[lo]) / cnt, np.nan)
+        norm = ofi / np.where(roll == 0, np.nan, roll)
+    return dict(bid=bP, ask=aP, bid_sz=bS, ask_sz=aS, depth=depth, ofi=ofi, mid=mid, d_mid_bps=d_mid_bps, depth_roll_10m=roll, normalized_OFI=norm)
+
+
+_PANDAS_META: Dict[str, Dict[bytes, bytes]] = {}
+_NS_PER = {"s": 10**9, "ms": 10**6, "us": 10**3, "ns": 1}
+
+def to_arrow_timeseries(grid_ns: np.ndarray, cols: Dict[str, np.ndarray], unit: str = "ns") -> pa.Table:
+    """Timeseries table laid out like ``DataFrame.to_parquet(index=True)`` so pandas readers see the same frame."""
+    if unit not in _PANDAS_META:
+        empty = pd.DataFrame({k: pd.Series(dtype="float64") for k in TS_COLUMNS}, index=pd.DatetimeIndex([], dtype=f"datetime64[{unit}, {NY}]"))
+        _PANDAS_META[unit] = pa.Schema.from_pandas(empty).metadata
+    ts_type = pa.timestamp(unit, tz=NY)
+    arrays = [pa.array(cols[k]) for k in TS_COLUMNS] + [pa.array(grid_ns // _NS_PER[unit], type=ts_type)]
+    fields = [pa.field(k, pa.float64()) for k in TS_COLUMNS] + [pa.field("__index_level_0__", ts_type)]
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields, metadata=_PANDAS_META[unit]))
+
+
+def save_timeseries_arrow(table: pa.Table, outdir: str, day: str, symbol: str):
+    dd = os.path.join(outdir, "timeseries", day); os.makedirs(dd, exist_ok=True)
+    with atomic_path(os.path.join(dd, f"{symbol}.parquet")) as tmp:
+        pq.write_table(table, tmp)
+
+
+def timeseries_to_pandas(table: pa.Table) -> pd.DataFrame:
+    return table.to_pandas()
+
+
+def process_symbol_arrow(t: pa.Table, symbol: str, schema: SchemaInfo, day: pd.Timestamp, grid: SessionGrid,
+                         do_halfhour_10s: bool = True):
+    with ofi_profile.task(str(day.date()), symbol):
+        return _symbol_arrow(t, symbol, schema, day, grid, do_halfhour_10s)
+
+
+def _symbol_arrow(t: pa.Table, symbol: str, schema: SchemaInfo, day: pd.Timestamp, grid: SessionGrid, do_halfhour_10s: bool):
+    cmap = schema.cmap; day_str = str(day.date())
+    grid_ns, tob = tob_grid(t, cmap, day, schema.time_unit, grid)
+    c = ofi_arrays(tob)
+    st = run_ols_xy(pd.Series(c["normalized_OFI"]), pd.Series(c["d_mid_bps"]))
+    st["mean_depth"] = float(np.nanmean(c["depth"])) if len(grid_ns) else float("nan")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        st["ofi_scale"] = float(np.nanstd(c["ofi"], ddof=0) / np.nanmean(c["depth_roll_10m"])) if len(grid_ns) else float("nan")
+    row = dict(symbol=symbol, day=day_str, **st); hh_rows = []
+    if do_halfhour_10s:
+        # The 10s half-hour baseline stays on pandas resample (small frames, off the hot path)
+        raw = pd.DataFrame(tob, index=pd.DatetimeIndex(grid_ns.view("datetime64[ns]")).tz_localize("UTC").tz_convert(NY))
+        ts10 = resample_to(raw, "10s")
+        for hstart, sub in ts10.groupby(ts10.index.floor("30min")):
+            st = run_ols_xy(sub["normalized_OFI"], sub["d_mid_bps"])
+            hh_rows.append(dict(symbol=symbol, day=day_str, half_hour_start=str(hstart), mean_depth=float(sub["depth"].mean()), **st))
+    return to_arrow_timeseries(grid_ns, c, grid.unit), row, hh_rows
+
+
+def process_day_arrow(path: str, outdir: str, freq: str = "1s", do_halfhour_10s: bool = True, source: str = "taq",
+                      writer=None) -> pd.DataFrame:
+    """Arrow-native counterpart of process_day_rda (same outputs; rolling means agree to float rounding).
+    Timeseries tables go through ``writer`` (an ofi_io.AsyncParquetWriter; a private one if None)."""
+    from .ofi_io import open_writer
+    table, schema = load_day_table(path, source)
+    day = parse_trading_day_from_filename(path); grid = session_grid(day, freq); rows = []
+    writer, owned = open_writer(writer)
+    with writer if owned else contextlib.nullcontext(writer):
+        for symbol, t in symbol_slices(table, schema.cmap.symbol):
+            ts, row, hh_rows = process_symbol_arrow(t, str(symbol), schema, day, grid, do_halfhour_10s)
+            writer.submit(ts, outdir, row["day"], row["symbol"], save=save_timeseries_arrow)
+            write_symbol_rows(row, hh_rows, outdir); rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,192 @@
+# src/ofi_cache.py
+from __future__ import annotations
+import contextlib, contextvars, dataclasses, functools, hashlib, inspect, os, pickle
+from typing import Callable, Optional
+
+# Content-addressed on-disk memoization for exploratory runs (validation / figure scripts).
+# Decorated functions run uncached unless a DiskCache is active (``with DiskCache(): ...``), so the batch
+# pipeline never pays for hashing inputs.
+
+_ACTIVE: contextvars.ContextVar[Optional["DiskCache"]] = contextvars.ContextVar("ofi_disk_cache", default=None)
+DEFAULT_ROOT = os.environ.get("OFI_CACHE_DIR", ".ofi_cache")
+DEFAULT_MAX_BYTES = int(float(os.environ.get("OFI_CACHE_MAX_MB", "2048")) * 2**20)
+
+
+def _feed(h, obj):
+    """Hash ``obj`` by content: frames/series via hash_pandas_object plus labels and dtypes, arrays by bytes."""
+    import numpy as np, pandas as pd
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        h.update(type(obj).__name__.encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+        h.update(repr((list(obj.columns), [str(d) for d in obj.dtypes]) if isinstance(obj, pd.DataFrame) else (obj.name, str(obj.dtype))).encode())
+        h.update(repr((obj.index.names, str(obj.index.dtype))).encode())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr((obj.dtype.str, obj.shape)).encode()); h.update(np.ascontiguousarray(obj).tobytes())
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        h.update(type(obj).__name__.encode()); _feed(h, dataclasses.astuple(obj))
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for o in obj: _feed(h, o)
+    elif isinstance(obj, dict):
+        h.update(f"dict{len(obj)}".encode())
+        for k in sorted(obj, key=repr): _feed(h, k); _feed(h, obj[k])
+    elif inspect.isfunction(obj):
+        code_digest(h, obj.__code__)
+    else:
+        h.update(repr(obj).encode())
+    h.update(b"\x00")
+
+
+def code_digest(h, code):
+    """Feed a code object (bytecode, names, constants, nested code objects) into ``h``; stable across processes."""
+    h.update(code.co_code); h.update(repr(code.co_names).encode())
+    for c in code.co_consts:
+        if hasattr(c, "co_code"):
+            code_digest(h, c)
+        else:
+            h.update(repr(c).encode())
+
+
+_DATA = (dict, list, tuple, str, bytes, int, float, bool)
+
+
+def _names(code):
+    yield from code.co_names
+    for c in code.co_consts:
+        if hasattr(c, "co_code"):
+            yield from _names(c)
+
+
+def callee_digest(h, fn: Callable, seen: Optional[set] = None):
+    """Feed ``fn``'s bytecode plus, transitively, every function and plain module-level table it reads from its
+    own package (``session`` -> ``_session`` -> ``_EXCEPTIONS``), so editing a callee or the calendar changes the key.
+
+    Globals are resolved by name in ``fn.__globals__``; ``module.attr`` reaches into package modules the same way.
+    """
+    fn = inspect.unwrap(fn); seen = set() if seen is None else seen
+    code = getattr(fn, "__code__", None)
+    if code is None or code in seen:
+        return
+    seen.add(code); code_digest(h, code)
+    pkg = fn.__module__.split(".")[0]; glb = fn.__globals__
+    scopes = [glb] + [vars(m) for m in glb.values() if inspect.ismodule(m) and m.__name__.split(".")[0] == pkg]
+    for name in dict.fromkeys(_names(code)):
+        for scope in scopes:
+            obj = scope.get(name)
+            if callable(obj) and inspect.isfunction(inspect.unwrap(obj)) and obj.__module__.split(".")[0] == pkg:
+                callee_digest(h, obj, seen)
+            elif isinstance(obj, _DATA):
+                h.update(name.encode()); _feed(h, obj)
+
+
+def cache_key(fn: Callable, version: str, args: tuple, kwargs: dict) -> str:
+    """Source hash + parameters + function version (explicit ``version``, the function's bytecode and that of
+    the package functions and tables it reaches, see ``callee_digest``).
+
+    Arguments are bound to the signature with defaults applied, so ``f(x)`` and ``f(x, freq="1s")`` share a key.
+    """
+    try:
+        bound = inspect.signature(fn).bind(*args, **kwargs); bound.apply_defaults()
+        args, kwargs = (), dict(bound.arguments)
+    except (TypeError, ValueError):
+        pass
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{fn.__module__}.{fn.__qualname__}:{version}".encode())
+    callee_digest(h, fn)
+    _feed(h, args); _feed(h, kwargs)
+    return h.hexdigest()
+
+
+class DiskCache:
+    """Pickled results under ``root/<k[:2]>/<k>.pkl`` with least-recently-used eviction above ``max_bytes``.
+
+    Use as a context (activates every ``@cached`` function inside the block) or via ``memoize`` as a decorator.
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root, self.max_bytes = root, max_bytes
+        self.hits = self.misses = 0
+        self._token = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".pkl")
+
+    def get(self, key: str):
+        """(True, value) on a hit (and marks the entry recently used), else (False, None)."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return False, None
+        with contextlib.suppress(OSError):                    # evicted by another process since the read
+            os.utime(path)
+        self.hits += 1
+        return True, value
+
+    def put(self, key: str, value):
+        from .ofi_utils import atomic_path
+        path = self._path(key); os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_path(path) as tmp, open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.evict()
+
+    def entries(self):
+        out = []
+        if os.path.isdir(self.root):
+            for d in os.scandir(self.root):
+                if d.is_dir():
+                    out += [(e.stat().st_mtime, e.stat().st_size, e.path) for e in os.scandir(d.path) if e.name.endswith(".pkl")]
+        return out
+
+    def size(self) -> int:
+        return sum(s for _, s, _ in self.entries())
+
+    def evict(self):
+        ents = sorted(self.entries()); total = sum(s for _, s, _ in ents)
+        for _, s, p in ents:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(p); total -= s
+            except OSError:
+                pass
+
+    def clear(self):
+        for _, _, p in self.entries():
+            os.remove(p)
+
+    def call(self, fn: Callable, version: str, args: tuple, kwargs: dict):
+        key = cache_key(fn, version, args, kwargs)
+        hit, value = self.get(key)
+        if not hit:
+            value = fn(*args, **kwargs); self.put(key, value)
+        return value
+
+    def memoize(self, fn: Optional[Callable] = None, *, version: str = "1"):
+        """Decorator that always uses this cache, independent of the active context."""
+        def deco(f):
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                return self.call(f, version, args, kwargs)
+            return wrapper
+        return deco(fn) if fn is not None else deco
+
+    def __enter__(self):
+        self._token = _ACTIVE.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _ACTIVE.reset(self._token); self._token = None
+
+
+def cached(fn: Optional[Callable] = None, *, version: str = "1"):
+    """Mark ``fn`` as cacheable: served from the active ``DiskCache`` if any, plain call otherwise."""
+    def deco(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            cache = _ACTIVE.get()
+            return f(*args, **kwargs) if cache is None else cache.call(f, version, args, kwargs)
+        return wrapper
+    return deco(fn) if fn is not None else deco
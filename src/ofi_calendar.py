@@ -0,0 +1,107 @@
+# src/ofi_calendar.py
+from __future__ import annotations
+import datetime as dt, functools, os
+import numpy as np, pandas as pd
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+
+# Session calendar: the regular-hours grid and its bounds are built once per
+# (day, freq) and shared by every symbol of that day (same DatetimeIndex object). Early closes and holidays come
+# from the NYSE table below; OFI_CALENDAR may point to a CSV (``date,close`` with close "HH:MM" or "closed") that
+# extends or overrides it.
+# TAQ ``time_m`` is the time since New York midnight, so a quote's instant is the day's local midnight (as UTC epoch
+# ns) plus ``time_m``: a 10:00 quote is labeled 10:00 America/New_York in EST and EDT alike. The grid runs from the
+# open to the session close, 13:00 on early-close days.
+
+NY = "America/New_York"
+OPEN = dt.time(9, 30)
+CLOSE = dt.time(16, 0)
+
+# NYSE 13:00 early closes and full-day holidays, 2016-2025
+_TABLE = """
+2016-01-01 closed; 2016-01-18 closed; 2016-02-15 closed; 2016-03-25 closed; 2016-05-30 closed; 2016-07-04 closed
+2016-09-05 closed; 2016-11-24 closed; 2016-11-25 13:00; 2016-12-26 closed
+2017-01-02 closed; 2017-01-16 closed; 2017-02-20 closed; 2017-04-14 closed; 2017-05-29 closed; 2017-07-03 13:00
+2017-07-04 closed; 2017-09-04 closed; 2017-11-23 closed; 2017-11-24 13:00; 2017-12-25 closed
+2018-01-01 closed; 2018-01-15 closed; 2018-02-19 closed; 2018-03-30 closed; 2018-05-28 closed; 2018-07-03 13:00
+2018-07-04 closed; 2018-09-03 closed; 2018-11-22 closed; 2018-11-23 13:00; 2018-12-05 closed; 2018-12-24 13:00
+2018-12-25 closed
+2019-01-01 closed; 2019-01-21 closed; 2019-02-18 closed; 2019-04-19 closed; 2019-05-27 closed; 2019-07-03 13:00
+2019-07-04 closed; 2019-09-02 closed; 2019-11-28 closed; 2019-11-29 13:00; 2019-12-24 13:00; 2019-12-25 closed
+2020-01-01 closed; 2020-01-20 closed; 2020-02-17 closed; 2020-04-10 closed; 2020-05-25 closed; 2020-07-03 closed
+2020-09-07 closed; 2020-11-26 closed; 2020-11-27 13:00; 2020-12-24 13:00; 2020-12-25 closed
+2021-01-01 closed; 2021-01-18 closed; 2021-02-15 closed; 2021-04-02 closed; 2021-05-31 closed; 2021-07-05 closed
+2021-09-06 closed; 2021-11-25 closed; 2021-11-26 13:00; 2021-12-24 closed
+2022-01-17 closed; 2022-02-21 closed; 2022-04-15 closed; 2022-05-30 closed; 2022-06-20 closed; 2022-07-04 closed
+2022-09-05 closed; 2022-11-24 closed; 2022-11-25 13:00; 2022-12-26 closed
+2023-01-02 closed; 2023-01-16 closed; 2023-02-20 closed; 2023-04-07 closed; 2023-05-29 closed; 2023-06-19 closed
+2023-07-03 13:00; 2023-07-04 closed; 2023-09-04 closed; 2023-11-23 closed; 2023-11-24 13:00; 2023-12-25 closed
+2024-01-01 closed; 2024-01-15 closed; 2024-02-19 closed; 2024-03-29 closed; 2024-05-27 closed; 2024-06-19 closed
+2024-07-03 13:00; 2024-07-04 closed; 2024-09-02 closed; 2024-11-28 closed; 2024-11-29 13:00; 2024-12-24 13:00
+2024-12-25 closed
+2025-01-01 closed; 2025-01-09 closed; 2025-01-20 closed; 2025-02-17 closed; 2025-04-18 closed; 2025-05-26 closed
+2025-06-19 closed; 2025-07-03 13:00; 2025-07-04 closed; 2025-09-01 closed; 2025-11-27 closed; 2025-11-28 13:00
+2025-12-24 13:00; 2025-12-25 closed
+"""
+
+
+def _parse(entries) -> Dict[dt.date, Optional[dt.time]]:
+    out = {}
+    for day, close in entries:
+        close = close.strip()
+        out[dt.date.fromisoformat(day.strip())] = None if close == "closed" else dt.time.fromisoformat(close)
+    return out
+
+
+def load_calendar(path: Optional[str] = None) -> Dict[dt.date, Optional[dt.time]]:
+    """Exceptions to the 09:30-16:00 session: {date: close time, or None for a holiday}."""
+    table = _parse(e.split() for line in _TABLE.strip().splitlines() for e in line.split(";") if e.strip())
+    path = path or os.environ.get("OFI_CALENDAR")
+    if path:
+        rows = pd.read_csv(path, dtype=str)
+        table.update(_parse(zip(rows["date"], rows["close"])))
+    return table
+
+
+_EXCEPTIONS = load_calendar()
+
+
+@dataclass(frozen=True)
+class Session:
+    day: dt.date
+    freq: str
+    open: pd.Timestamp
+    close: pd.Timestamp           # session close instant (13:00 on early-close days)
+    grid: pd.DatetimeIndex        # open..close inclusive at ``freq``; one shared object per (day, freq)
+    grid_ns: np.ndarray           # the same labels as UTC epoch ns (read-only)
+    midnight_ns: int              # local midnight as UTC epoch ns; + time_m (in ns) = quote instant
+    early_close: bool
+
+    @property
+    def unit(self) -> str:
+        return getattr(self.grid, "unit", "ns")
+
+
+def is_trading_day(day: Union[str, dt.date, pd.Timestamp]) -> bool:
+    d = pd.Timestamp(day).date()
+    return d.weekday() < 5 and _EXCEPTIONS.get(d, CLOSE) is not None
+
+
+def session_close(day: Union[str, dt.date, pd.Timestamp]) -> dt.time:
+    return _EXCEPTIONS.get(pd.Timestamp(day).date()) or CLOSE
+
+
+@functools.lru_cache(maxsize=1024)
+def _session(day: dt.date, freq: str) -> Session:
+    base = pd.Timestamp(day, tz=NY)
+    close_t = session_close(day)
+    start = base + pd.Timedelta(hours=OPEN.hour, minutes=OPEN.minute)
+    end = base + pd.Timedelta(hours=close_t.hour, minutes=close_t.minute)
+    grid = pd.date_range(start=start, end=end, freq=freq, tz=NY)
+    grid_ns = grid.as_unit("ns").asi8.copy(); grid_ns.flags.writeable = False
+    return Session(day, freq, start, end, grid, grid_ns, base.value, close_t != CLOSE)
+
+
+def session(day: Union[str, dt.date, pd.Timestamp], freq: str = "1s") -> Session:
+    """Cached regular-hours session for ``day`` (early closes from the calendar table)."""
+    return _session(pd.Timestamp(day).date(), freq)
@@ -0,0 +1,283 @@
+# src/ofi_cli.py
+"""Unified ``ofi`` command line: day, batch, figures, validate, bench, export-ipc, compact, cross-impact, seasonality, diagnose.
+
+Only argparse is imported up front; pandas, statsmodels, matplotlib, seaborn and pyreadr
+load inside the subcommand that needs them, so ``--help`` and worker spin-up stay fast.
+Run as ``python -m src.ofi_cli <subcommand>`` or ``python scripts/ofi.py <subcommand>``.
+"""
+from __future__ import annotations
+import argparse, contextlib, os, runpy, sys
+from typing import List, Optional
+
+_SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+
+def _run_script(name: str, argv: List[str]) -> int:
+    saved = sys.argv
+    sys.argv = [os.path.join(_SCRIPTS, name), *argv]
+    try:
+        runpy.run_path(sys.argv[0], run_name="__main__")
+    except SystemExit as e:
+        return int(e.code or 0)
+    finally:
+        sys.argv = saved
+    return 0
+
+
+def _add_run_args(ap: argparse.ArgumentParser):
+    ap.add_argument("--out", default="results", help="Output dir (parquet)")
+    ap.add_argument("--freq", default="1s", help="Resample frequency for TOB grid (default 1s)")
+    ap.add_argument("--no-baseline10s", action="store_true", help="Disable CK&S 10s half-hour regressions")
+    ap.add_argument("--workers", type=int, default=1, help="Processes for per-symbol work within a day (shared-memory input)")
+    ap.add_argument("--cache-dir", default=None, help="Out-of-core mode: symbol-sorted parquet day cache directory")
+    ap.add_argument("--memory-limit-mb", type=float, default=None, help="Out-of-core reader memory ceiling per symbol (MB)")
+    ap.add_argument("--engine", choices=["pandas", "arrow"], default="pandas", help="Core computation path")
+    ap.add_argument("--quality", action="store_true", help="Run the day-level quote quality stage (writes quality_by_symbol_day.parquet)")
+    ap.add_argument("--drop-locked", action="store_true", help="Quality stage: also drop locked quotes (ask == bid)")
+    ap.add_argument("--drop-zero-size", action="store_true", help="Quality stage: drop quotes with a zero bid/ask size")
+    ap.add_argument("--stale-secs", type=float, default=None, help="Quality stage: drop quotes left in force over N seconds before the symbol's next quote")
+    ap.add_argument("--spread-outlier-mult", type=float, default=None, help="Quality stage: drop spreads above N x trailing median")
+    ap.add_argument("--spread-window", type=int, default=None, help="Quality stage: quotes in the trailing spread median (default 100)")
+    ap.add_argument("--session", nargs=2, metavar=("OPEN", "CLOSE"), default=None,
+                    help="Quality stage: keep quotes within OPEN..CLOSE New York time, e.g. --session 09:30 16:00")
+    ap.add_argument("--export-ipc", action="store_true", help="Also write uncompressed Arrow IPC timeseries (timeseries_ipc/) for mmap reads")
+    ap.add_argument("--cross-panel", action="store_true", help="Also save each day's aligned (time x symbol) OFI/return matrices (panels/)")
+    ap.add_argument("--compact-timeseries", action="store_true", help="Store timeseries as int32 ticks/sizes, derived columns recomputed on read")
+    ap.add_argument("--profile", choices=["cprofile", "sampling"], default=None,
+                    help="Profile every (day, symbol) task, merged across worker processes (report in --profile-dir)")
+    ap.add_argument("--profile-memory", action="store_true", help="With --profile: track allocations with tracemalloc")
+    ap.add_argument("--profile-dir", default=None, help="Profile output directory (default <out>/profile)")
+    ap.add_argument("--stream", action="store_true", help="Read each .rda day in chunks spilled to disk; symbols start before the file is read")
+    ap.add_argument("--seasonality", action="store_true",
+                    help="Regress on OFI/returns deseasonalized by the intraday profile of earlier days, then add the day to it")
+
+
+def _quality(args):
+    if not (args.quality or args.drop_locked or args.drop_zero_size or args.stale_secs or args.spread_outlier_mult
+            or args.spread_window or args.session):
+        return None
+    from .ofi_quality import QualityConfig
+    window = {} if args.spread_window is None else {"spread_window": args.spread_window}
+    return QualityConfig(drop_locked=args.drop_locked, drop_zero_size=args.drop_zero_size, stale_secs=args.stale_secs,
+                         spread_outlier_mult=args.spread_outlier_mult, session=tuple(args.session) if args.session else None, **window)
+
+
+@contextlib.contextmanager
+def _profiled(args):
+    """Profile the tasks run inside the block when --profile is given, then merge the parts and print the report."""
+    if not args.profile:
+        yield; return
+    import shutil
+    from .ofi_profile import ProfileConfig, configure, merge_profiles, format_report
+    outdir = args.profile_dir or os.path.join(args.out, "profile")
+    shutil.rmtree(os.path.join(outdir, "parts"), ignore_errors=True)
+    configure(ProfileConfig(args.profile, outdir, memory=args.profile_memory))
+    try:
+        yield
+    finally:
+        rep = merge_profiles(outdir); configure(None)
+        print(format_report(rep, top=10), end="")
+        print(f"[profile] {outdir}: merged.pstats, stacks.collapsed, alloc.collapsed, report.txt")
+
+
+def cmd_day(args) -> int:
+    from .ofi_pipeline import run_one_day, build_all_figures
+    with _profiled(args):
+        res = run_one_day(args.raw, outdir=args.out, freq=args.freq, baseline10s=(not args.no_baseline10s), make_daily_scatter=(not args.no_scatter),
+                          workers=args.workers, cache_dir=args.cache_dir, memory_limit_mb=args.memory_limit_mb, quality=_quality(args),
+                          engine=args.engine, export_ipc=args.export_ipc, cross_panel=args.cross_panel,
+                          compact=args.compact_timeseries, stream=args.stream, seasonality=args.seasonality)
+    build_all_figures(args.out, figdir="figures")
+    if len(res):
+        pos_share = (res["beta"] > 0).mean(skipna=True)
+        avg_r2 = res["r2"].mean(skipna=True)
+        print(f"[run_ofi_day] processed={len(res)} rows | share(β>0)={pos_share:.2%} | mean R²={avg_r2:.3f}")
+    else:
+        print("[run_ofi_day] no symbols processed / empty results")
+    return 0
+
+
+def cmd_batch(args) -> int:
+    from .ofi_pipeline import run_batch
+    with _profiled(args):
+        summary = run_batch(args.raw, args.out, freq=args.freq, baseline10s=(not args.no_baseline10s), workers=args.workers,
+                            writer_threads=args.writer_threads, cache_dir=args.cache_dir, memory_limit_mb=args.memory_limit_mb,
+                            quality=_quality(args), engine=args.engine, export_ipc=args.export_ipc,
+                            executor=args.executor, retries=args.retries, resume=args.resume, cross_panel=args.cross_panel,
+                            compact=args.compact_timeseries, stream=args.stream, orchestrator=args.orchestrator, prefetch=args.prefetch,
+                            write_queue=args.write_queue, seasonality=args.seasonality)
+    if summary is None:
+        print("[run_ofi_batch] no .rda files found or no rows processed.")
+        return 0
+    fmt = lambda v, spec: format(0.0 if v is None else v, spec)
+    print("[run_ofi_batch] days=%d, rows=%d" % (summary["days"], summary["rows"]))
+    print(f"  share(β>0)={fmt(summary['share_beta_positive'], '.2%')} | mean R²={fmt(summary['mean_r2'], '.3f')} | corr(beta, mean_depth)={fmt(summary['corr_beta_mean_depth'], '.3f')}")
+    sched = summary.get("schedule")
+    if sched:
+        print(f"  tasks={sched['tasks']} on {sched['slots']} slots | makespan expected={sched['expected_makespan_s']:.1f}s "
+              f"actual={sched['actual_makespan_s']:.1f}s | work/slots={sched['actual_work_s'] / sched['slots']:.1f}s")
+    pipe = summary.get("pipeline")
+    if pipe:
+        print("  stages: " + " | ".join(f"{k} busy={v['busy_s']:.1f}s wait={v['wait_s']:.1f}s" for k, v in pipe["stages"].items()))
+        print("  queues: " + " | ".join(f"{k} max={v['max_depth']}/{v['capacity']} mean={v['mean_depth']:.1f}" for k, v in pipe["queues"].items()))
+    print("  Figures in ./figures/: beta_hist.png, intraday_beta_vs_depth.png, and scatters")
+    return 0
+
+
+def cmd_figures(args) -> int:
+    if args.presentation:
+        return _run_script("generate_presentation_figures.py", ["--workers", str(args.workers), *(["--force"] if args.force else [])])
+    return _run_script("make_figures.py", ["--results", args.results, "--figdir", args.figdir, "--workers", str(args.workers),
+                                           *(["--force"] if args.force else [])])
+
+
+def cmd_validate(args) -> int:
+    return _run_script("validate_amd_week.py" if args.amd_week else "quick_validation.py", [])
+
+
+def cmd_bench(args) -> int:
+    return _run_script("bench_pipeline.py", args.bench_args)
+
+
+def cmd_export_ipc(args) -> int:
+    from .ofi_mmap import export_results_ipc
+    n = export_results_ipc(args.results, days=args.days or None)
+    print(f"[export-ipc] wrote {n} files under {os.path.join(args.results, 'timeseries_ipc')}")
+    return 0
+
+
+def cmd_compact(args) -> int:
+    from .ofi_compact import compact_results
+    r = compact_results(args.results, days=args.days or None)
+    ratio = r["bytes_before"] / r["bytes_after"] if r["bytes_after"] else float("nan")
+    print(f"[compact] rewrote {r['files']} files: {r['bytes_before'] / 2**20:.1f} MB -> {r['bytes_after'] / 2**20:.1f} MB ({ratio:.1f}x)")
+    return 0
+
+
+def cmd_cross_impact(args) -> int:
+    from .ofi_cross import load_day_panel, cross_impact, save_cross_impact
+    days = args.days or sorted(os.listdir(os.path.join(args.results, "timeseries")))
+    for day in days:
+        res = cross_impact(load_day_panel(args.results, day), method=args.method, alpha=args.alpha, min_coverage=args.min_coverage)
+        out = save_cross_impact(res, args.results); fit = res.fit_frame()
+        print(f"[cross-impact] {day}: {len(res.symbols)} symbols ({len(res.dropped)} dropped), n={res.n} | "
+              f"median own β={fit['own_beta'].median():.3f} | median Σ cross β={fit['cross_beta_sum'].median():.3f} | "
+              f"mean R²={fit['r2'].mean():.3f} -> {out}")
+    return 0
+
+
+def cmd_seasonality(args) -> int:
+    from .ofi_seasonality import profile_path, update_profiles
+    days = args.days or sorted(os.listdir(os.path.join(args.results, "timeseries")))
+    prof = update_profiles(args.results, days, bucket_secs=args.bucket_secs)
+    print(f"[seasonality] {len(prof.days)} days x {len(prof.symbols)} symbols x {prof.buckets} buckets of {prof.bucket_secs}s "
+          f"-> {profile_path(args.results)}")
+    return 0
+
+
+def cmd_diagnose(args) -> int:
+    import pandas as pd
+    from .ofi_diag import diagnose_results, panel_summary
+    cols, health = diagnose_results(args.results, days=args.days or None, workers=args.workers)
+    print(f"[diagnose] {len(health)} symbol-days, {len(cols)} column summaries -> "
+          f"{os.path.join(args.results, 'regressions', 'diagnostics_*.parquet')}")
+    flagged = 0
+    if len(health):
+        tags = health["issues"].str.split(";").explode()
+        tags = tags[tags != ""]; flagged = int((health["issues"] != "").sum())
+        print(f"  flagged symbol-days: {flagged}/{len(health)}")
+        for tag, n in tags.value_counts().items():
+            print(f"    {tag:<24} {n}")
+    panel_path = os.path.join(args.results, "regressions", "by_symbol_day.parquet")
+    found = []
+    if os.path.exists(panel_path):
+        s = panel_summary(pd.read_parquet(panel_path)); found = s["issues"]
+        print(f"  panel: rows={s['rows']} symbols={s['symbols']} days={s['days']} | share(β>0)={s['share_beta_positive']:.1%} "
+              f"| β mean={s['beta_mean']:.4f} median={s['beta_median']:.4f} | R² mean={s['r2_mean']:.4f}")
+        for issue in found:
+            print(f"  ✗ {issue}")
+    if not flagged and not found:
+        print("  ✓ No major issues detected")
+    return 1 if args.strict and (flagged or found) else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="ofi", description="OFI replication pipeline.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("day", help="Process one .rda day and run OFI regressions.")
+    p.add_argument("--raw", required=True, help="Path to .rda file for a single day")
+    _add_run_args(p)
+    p.add_argument("--no-scatter", action="store_true", help="Disable per symbol×day scatter plots")
+    p.set_defaults(func=cmd_day)
+
+    p = sub.add_parser("batch", help="Batch process all .rda files in a directory.")
+    p.add_argument("--raw", required=True, help="Directory containing .rda files")
+    _add_run_args(p)
+    p.add_argument("--writer-threads", type=int, default=None, help="Background parquet writer threads (default 2; not with --executor)")
+    p.add_argument("--orchestrator", choices=["serial", "async"], default="serial",
+                   help="async: overlap reading, compute and writing across days (asyncio stages, bounded queues)")
+    p.add_argument("--prefetch", type=int, default=2, help="Async orchestrator: days loaded ahead of compute")
+    p.add_argument("--write-queue", type=int, default=64, help="Async orchestrator: symbol results queued for writing")
+    p.add_argument("--executor", default=None,
+                   help="Schedule (day, symbol) tasks on serial | process | dask[://host:port] | ray[://host:port] (uses --cache-dir)")
+    p.add_argument("--retries", type=int, default=2, help="Executor mode: resubmit a failed task up to N times")
+    p.add_argument("--resume", action="store_true", help="Skip days / (day, symbol) tasks recorded in <out>/journal.jsonl by an interrupted run")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("figures", help="Regenerate figures from existing results.")
+    p.add_argument("--results", default="results", help="Results directory")
+    p.add_argument("--figdir", default="figures", help="Figures directory")
+    p.add_argument("--presentation", action="store_true", help="Render the presentation deck instead")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Render processes (default: all cores)")
+    p.add_argument("--force", action="store_true", help="Re-render figures whose inputs are unchanged")
+    p.set_defaults(func=cmd_figures)
+
+    p = sub.add_parser("validate", help="Run the validation scripts.")
+    p.add_argument("--amd-week", action="store_true", help="AMD first-week validation instead of the 5-day quick run")
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser("bench", help="Benchmarks (arguments are forwarded to scripts/bench_pipeline.py).")
+    p.add_argument("bench_args", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("export-ipc", help="Convert existing parquet timeseries to memory-mappable Arrow IPC files.")
+    p.add_argument("--results", default="results", help="Results directory")
+    p.add_argument("--days", nargs="*", default=None, help="Only these days (YYYY-MM-DD)")
+    p.set_defaults(func=cmd_export_ipc)
+
+    p = sub.add_parser("compact", help="Rewrite existing parquet timeseries in the compact int-tick layout (lossless).")
+    p.add_argument("--results", default="results", help="Results directory")
+    p.add_argument("--days", nargs="*", default=None, help="Only these days (YYYY-MM-DD)")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("cross-impact", help="Estimate the symbol x symbol OFI impact matrix per day from existing results.")
+    p.add_argument("--results", default="results", help="Results directory")
+    p.add_argument("--days", nargs="*", default=None, help="Only these days (YYYY-MM-DD)")
+    p.add_argument("--method", choices=["ols", "ridge", "lasso"], default="ols", help="Estimator (default ols)")
+    p.add_argument("--alpha", type=float, default=0.0, help="Ridge / LASSO penalty on the per-observation loss")
+    p.add_argument("--min-coverage", type=float, default=0.9, help="Drop symbols finite on less than this share of the grid")
+    p.set_defaults(func=cmd_cross_impact)
+
+    p = sub.add_parser("seasonality", help="Add days of existing results to the intraday OFI/return profiles (incremental).")
+    p.add_argument("--results", default="results", help="Results directory")
+    p.add_argument("--days", nargs="*", default=None, help="Only these days (YYYY-MM-DD)")
+    p.add_argument("--bucket-secs", type=int, default=None, help="Time-of-day bucket width for a new profile (default 300)")
+    p.set_defaults(func=cmd_seasonality)
+
+    p = sub.add_parser("diagnose", help="Health-check results: per-column stats and quality flags for every symbol-day.")
+    p.add_argument("--results", default="results", help="Results directory")
+    p.add_argument("--days", nargs="*", default=None, help="Only these days (YYYY-MM-DD)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes (default: all cores)")
+    p.add_argument("--strict", action="store_true", help="Exit with status 1 if anything is flagged")
+    p.set_defaults(func=cmd_diagnose)
+    return ap
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
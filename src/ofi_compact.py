@@ -0,0 +1,178 @@
+# src/ofi_compact.py
+from __future__ import annotations
+import json, os, numpy as np, pandas as pd
+import pyarrow as pa, pyarrow.parquet as pq
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+from .ofi_utils import atomic_path
+
+# Compact timeseries storage. A compact file sits at the usual ``timeseries/<day>/<symbol>.parquet`` path and is
+# recognised by its ``ofi_compact`` schema metadata:
+#   * prices are int32 ticks of 1e-4 and sizes int32, delta-encoded (forward-filled seconds delta to zero runs);
+#   * the time index is int64 epoch ns, delta-encoded (a regular grid packs to a few bytes);
+#   * derived columns (depth, mid, d_mid_bps, ofi, depth_roll_10m, normalized_OFI) are dropped and recomputed on
+#     read with the arithmetic of compute_ofi_depth_mid / normalize_ofi, only for the requested columns.
+# Nothing is assumed: at write time every encoded column is decoded and every dropped column recomputed, and a
+# column is only compacted if the result is bit-identical; anything else (sub-tick prices, another jump filter,
+# the Arrow engine's rolling mean) is kept as stored float64. ``load_timeseries`` therefore returns exactly the
+# frame that was written, and reads plain parquet timeseries unchanged.
+
+KEY = b"ofi_compact"
+VERSION = 1
+TICKS = 10_000                  # price ticks per dollar
+PRICES = ("bid", "ask")
+SIZES = ("bid_sz", "ask_sz")
+TIME_COL = "ts_ns"
+_I32 = np.iinfo("int32")
+
+# derived column -> (inputs, rule(get, params)) on float64 arrays. The rules repeat compute_ofi_depth_mid /
+# normalize_ofi operation for operation (diff, shift and pct_change as shifted-array arithmetic, the rolling mean
+# through pandas itself), so the recomputed bits match; encode() checks that per column anyway.
+def _lag(v: np.ndarray) -> np.ndarray:
+    out = np.empty_like(v); out[:1] = np.nan; out[1:] = v[:-1]
+    return out
+
+def _d_mid_bps(get, p):
+    m = get("mid"); d = 1e4 * (m / _lag(m) - 1)
+    return d if p["max_abs_bps"] is None else np.where(np.abs(d) < p["max_abs_bps"], d, np.nan)
+
+def _ofi(get, p):
+    bP, aP, bS, aS = get("bid"), get("ask"), get("bid_sz"), get("ask_sz")
+    bS1, aS1 = _lag(bS), _lag(aS)
+    dbP, daP, dbS, daS = bP - _lag(bP), aP - _lag(aP), bS - bS1, aS - aS1
+    ofi = np.zeros(len(bP))
+    with np.errstate(invalid="ignore"):
+        ofi += np.where(dbP > 0, bS, 0.0); ofi += np.where(dbP < 0, -bS1, 0.0); ofi += np.where(dbP == 0, np.nan_to_num(dbS, nan=0.0), 0.0)
+        ofi += np.where(daP > 0, -aS1, 0.0); ofi += np.where(daP < 0, -aS, 0.0); ofi += np.where(daP == 0, -np.nan_to_num(daS, nan=0.0), 0.0)
+    return ofi
+
+def _roll(get, p):
+    return pd.Series(get("depth")).rolling(window=p["window"], min_periods=p["min_periods"]).mean().to_numpy()
+
+def _normalized(get, p):
+    r = get("depth_roll_10m")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return get("ofi") / np.where(r == 0, np.nan, r)
+
+DERIVED: Dict[str, tuple] = {
+    "depth": (("bid_sz", "ask_sz"), lambda get, p: get("bid_sz") + get("ask_sz")),
+    "mid": (("bid", "ask"), lambda get, p: 0.5 * (get("bid") + get("ask"))),
+    "d_mid_bps": (("mid",), _d_mid_bps),
+    "ofi": (("bid", "ask", "bid_sz", "ask_sz"), _ofi),
+    "depth_roll_10m": (("depth",), _roll),
+    "normalized_OFI": (("ofi", "depth_roll_10m"), _normalized),
+}
+PARAMS = dict(max_abs_bps=1000.0, window=600, min_periods=50)
+
+
+def _same(a: np.ndarray, b: np.ndarray) -> bool:
+    return a.shape == b.shape and np.array_equal(a.view("int64"), b.view("int64"))   # bitwise, NaN payloads included
+
+
+def _as_int32(v: np.ndarray, scale: int) -> Optional[np.ndarray]:
+    """int32 codes for ``v`` if ``codes / scale`` gives back every value bit-for-bit, else None."""
+    if not np.isfinite(v).all():
+        return None
+    k = np.round(v * scale)
+    if len(k) and (k.min() < _I32.min or k.max() > _I32.max):
+        return None
+    k = k.astype("int32")
+    return k if _same(k / scale if scale != 1 else k.astype("float64"), v) else None
+
+
+def encode(ts: pd.DataFrame, params: Optional[Dict] = None) -> pa.Table:
+    """Compact Arrow table for a timeseries frame (any columns; the OFI set compacts, the rest is stored as is)."""
+    params = {**PARAMS, **(params or {})}
+    idx = pd.DatetimeIndex(ts.index)
+    cols = [str(c) for c in ts.columns]
+    vals = {c: ts[c].to_numpy(dtype="float64") for c in cols}
+    stored: Dict[str, str] = {}; arrays = {TIME_COL: pa.array(idx.as_unit("ns").asi8, type=pa.int64())}
+    for c in cols:
+        if c in DERIVED and all(d in vals for d in DERIVED[c][0]):
+            if _same(np.asarray(DERIVED[c][1](vals.get, params), dtype="float64"), vals[c]):
+                continue
+        codes = _as_int32(vals[c], TICKS if c in PRICES else 1) if c in PRICES or c in SIZES or c == "ofi" else None
+        if codes is not None:
+            stored[c] = "ticks" if c in PRICES else "int"; arrays[c] = pa.array(codes)
+        else:
+            stored[c] = "float"; arrays[c] = pa.array(vals[c])
+    meta = dict(version=VERSION, ticks=TICKS, columns=cols, stored=stored, params=params, tz=str(idx.tz) if idx.tz else None,
+                unit=getattr(idx, "unit", "ns"), index_name=idx.name)
+    return pa.Table.from_pydict(arrays).replace_schema_metadata({KEY: json.dumps(meta).encode()})
+
+
+def _meta(schema: pa.Schema) -> Optional[Dict]:
+    raw = (schema.metadata or {}).get(KEY)
+    return json.loads(raw) if raw else None
+
+
+def decode(table: pa.Table, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Frame with the original columns (or ``columns``), derived ones recomputed from whatever is stored."""
+    meta = _meta(table.schema)
+    ns = table.column(TIME_COL).to_numpy()
+    idx = pd.DatetimeIndex(ns.view("datetime64[ns]"), name=meta["index_name"])
+    idx = (idx.tz_localize("UTC").tz_convert(meta["tz"]) if meta["tz"] else idx).as_unit(meta["unit"])
+    stored, params, cache = meta["stored"], meta["params"], {}
+
+    def get(name: str) -> np.ndarray:
+        v = cache.get(name)
+        if v is None:
+            if name in stored:
+                v = table.column(name).to_numpy()
+                v = v / meta["ticks"] if stored[name] == "ticks" else v.astype("float64")
+            else:
+                v = np.asarray(DERIVED[name][1](get, params), dtype="float64")
+            cache[name] = v
+        return v
+
+    want = list(columns) if columns is not None else meta["columns"]
+    block = np.column_stack([get(c) for c in want]) if want else np.empty((len(idx), 0))
+    return pd.DataFrame(block, index=idx, columns=want)
+
+
+def _needed(meta: Dict, columns: Sequence[str]) -> List[str]:
+    out, todo = set(), list(columns)
+    while todo:
+        c = todo.pop()
+        if c in meta["stored"]: out.add(c)
+        else: todo.extend(DERIVED[c][0])
+    return sorted(out)
+
+
+def is_compact(path: str) -> bool:
+    return _meta(pq.read_schema(path)) is not None
+
+
+def load_timeseries(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Read a timeseries parquet file in either layout; compact files read only the stored inputs ``columns`` need."""
+    pf = pq.ParquetFile(path); meta = _meta(pf.schema_arrow)
+    if meta is None:
+        pf.close()
+        return pd.read_parquet(path, columns=list(columns) if columns is not None else None)
+    with pf:
+        return decode(pf.read(columns=[TIME_COL, *_needed(meta, columns if columns is not None else meta["columns"])]), columns)
+
+
+def write_compact(ts: pd.DataFrame, path: str, params: Optional[Dict] = None) -> str:
+    table = encode(ts, params)
+    ints = [f.name for f in table.schema if pa.types.is_integer(f.type)]
+    floats = [f.name for f in table.schema if pa.types.is_floating(f.type)]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with atomic_path(path) as tmp:
+        pq.write_table(table, tmp, compression="zstd", use_dictionary=False,
+                       column_encoding={**{c: "DELTA_BINARY_PACKED" for c in ints}, **{c: "BYTE_STREAM_SPLIT" for c in floats}})
+    return path
+
+
+def compact_results(results_root: str, days: Optional[Iterable[str]] = None, params: Optional[Dict] = None) -> Dict[str, int]:
+    """Rewrite ``timeseries/<day>/*.parquet`` in the compact layout in place; returns file count and bytes before/after."""
+    ts_root = os.path.join(results_root, "timeseries"); out = dict(files=0, bytes_before=0, bytes_after=0)
+    for day in sorted(days or (os.listdir(ts_root) if os.path.isdir(ts_root) else [])):
+        ddir = os.path.join(ts_root, day)
+        if not os.path.isdir(ddir): continue
+        for f in sorted(os.listdir(ddir)):
+            p = os.path.join(ddir, f)
+            if not f.endswith(".parquet") or is_compact(p): continue
+            out["bytes_before"] += os.path.getsize(p)
+            write_compact(pd.read_parquet(p), p, params)
+            out["bytes_after"] += os.path.getsize(p); out["files"] += 1
+    return out
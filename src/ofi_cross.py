@@ -0,0 +1,161 @@
+# src/ofi_cross.py
+from __future__ import annotations
+import os, numpy as np, pandas as pd
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Sequence
+from .ofi_calendar import NY
+from .ofi_compact import load_timeseries
+from .ofi_utils import atomic_path
+
+# Cross-asset view of a day: every symbol's timeseries aligned on one time grid in a single contiguous
+# (field x time x symbol) block, and a cross-impact engine that regresses all N returns on all N OFIs at once:
+#   d_mid_bps[t, j] = alpha_j + sum_i beta[j, i] * normalized_OFI[t, i] + e[t, j]
+# OLS and ridge are one batched solve of the (N x N) Gram system for all targets; LASSO runs FISTA on the same
+# Gram matrices with every target updated in each matrix step. Penalties are on the 1/n-scaled loss
+# (ridge: mean squared error + alpha |B|^2, LASSO: half mean squared error + alpha |B|_1, as in scikit-learn's Lasso).
+
+FIELDS = ("normalized_OFI", "d_mid_bps")
+
+
+def panel_path(results_root: str, day: str) -> str:
+    return os.path.join(results_root, "panels", f"{day}.npz")
+
+
+@dataclass
+class DayPanel:
+    day: str
+    time_ns: np.ndarray          # (T,) UTC epoch ns
+    symbols: List[str]
+    fields: List[str]
+    values: np.ndarray           # (len(fields), T, N) float64, C-contiguous; NaN where a symbol has no row
+
+    def field(self, name: str) -> np.ndarray:
+        """(T, N) view of one field."""
+        return self.values[self.fields.index(name)]
+
+    def frame(self, name: str, tz: str = NY) -> pd.DataFrame:
+        idx = pd.DatetimeIndex(self.time_ns.view("datetime64[ns]")).tz_localize("UTC").tz_convert(tz)
+        return pd.DataFrame(self.field(name), index=idx, columns=self.symbols, copy=False)
+
+    def select(self, symbols: Sequence[str]) -> "DayPanel":
+        pos = [self.symbols.index(s) for s in symbols]
+        return DayPanel(self.day, self.time_ns, list(symbols), list(self.fields), np.ascontiguousarray(self.values[:, :, pos]))
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with atomic_path(path) as tmp, open(tmp, "wb") as f:
+            np.savez(f, values=self.values, time_ns=self.time_ns, symbols=np.asarray(self.symbols, dtype=str),
+                     fields=np.asarray(self.fields, dtype=str), day=np.asarray(self.day))
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "DayPanel":
+        with np.load(path) as z:
+            return cls(str(z["day"]), z["time_ns"], z["symbols"].tolist(), z["fields"].tolist(), z["values"])
+
+
+def build_day_panel(results_root: str, day: str, symbols: Optional[Iterable[str]] = None,
+                    fields: Sequence[str] = FIELDS) -> DayPanel:
+    """Align ``timeseries/<day>/*.parquet`` on the union of their time grids (symbols sorted by name)."""
+    ddir = os.path.join(results_root, "timeseries", day)
+    names = sorted(symbols) if symbols is not None else sorted(f[:-8] for f in os.listdir(ddir) if f.endswith(".parquet"))
+    frames = [load_timeseries(os.path.join(ddir, f"{s}.parquet"), columns=list(fields)) for s in names]
+    stamps = [pd.DatetimeIndex(f.index).as_unit("ns").asi8 for f in frames]
+    grid = np.unique(np.concatenate(stamps)) if stamps else np.empty(0, dtype="int64")
+    values = np.full((len(fields), len(grid), len(names)), np.nan)
+    for j, (f, ns) in enumerate(zip(frames, stamps)):
+        values[:, np.searchsorted(grid, ns), j] = f.to_numpy(dtype="float64").T
+    return DayPanel(day, grid, names, list(fields), values)
+
+
+def write_day_panel(results_root: str, day: str) -> str:
+    return build_day_panel(results_root, day).save(panel_path(results_root, day))
+
+
+def load_day_panel(results_root: str, day: str) -> DayPanel:
+    """Saved panel if the run wrote one (``--cross-panel``), else built from the timeseries."""
+    path = panel_path(results_root, day)
+    return DayPanel.load(path) if os.path.exists(path) else build_day_panel(results_root, day)
+
+
+@dataclass
+class CrossImpact:
+    day: str
+    symbols: List[str]
+    method: str
+    alpha: float
+    beta: np.ndarray             # (N, N): row = target return, column = source OFI; diagonal = own impact
+    intercept: np.ndarray
+    r2: np.ndarray
+    n: int
+    iterations: int = 0
+    dropped: List[str] = field(default_factory=list)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.beta, index=pd.Index(self.symbols, name="target"), columns=self.symbols)
+
+    def fit_frame(self) -> pd.DataFrame:
+        own = np.diag(self.beta)
+        return pd.DataFrame(dict(day=self.day, symbol=self.symbols, own_beta=own, cross_beta_sum=self.beta.sum(axis=1) - own,
+                                 intercept=self.intercept, r2=self.r2, n=self.n, method=self.method, alpha=self.alpha))
+
+
+def _soft(v: np.ndarray, t: float) -> np.ndarray:
+    return np.sign(v) * np.maximum(np.abs(v) - t, 0.0)
+
+
+def _lasso_fista(G: np.ndarray, C: np.ndarray, alpha: float, max_iter: int, tol: float):
+    """min_B 1/2 tr(B'GB) - tr(C'B) + alpha |B|_1 for all target columns at once; returns (B, iterations)."""
+    step = 1.0 / max(np.linalg.eigvalsh(G)[-1], 1e-12)
+    B = Z = np.zeros_like(C); t = 1.0
+    for it in range(1, max_iter + 1):
+        Bn = _soft(Z - step * (G @ Z - C), step * alpha)
+        tn = 0.5 * (1.0 + np.sqrt(1.0 + 4.0 * t * t))
+        Z = Bn + ((t - 1.0) / tn) * (Bn - B)
+        if np.max(np.abs(Bn - B), initial=0.0) <= tol * max(1.0, np.max(np.abs(Bn), initial=0.0)):
+            return Bn, it
+        B, t = Bn, tn
+    return B, max_iter
+
+
+def cross_impact(panel: DayPanel, method: str = "ols", alpha: float = 0.0, min_coverage: float = 0.9,
+                 x: str = "normalized_OFI", y: str = "d_mid_bps", max_iter: int = 2000, tol: float = 1e-6) -> CrossImpact:
+    """Estimate the N x N impact matrix of ``x`` on ``y`` (method: ols, ridge or lasso).
+
+    Symbols with fewer than ``min_coverage`` of the grid finite in both fields are dropped (listed in ``dropped``);
+    the regression then uses the seconds where every remaining symbol is finite.
+    """
+    if method not in ("ols", "ridge", "lasso"):
+        raise ValueError(f"unknown cross-impact method {method!r} (ols, ridge, lasso)")
+    X, Y = panel.field(x), panel.field(y)
+    fin = np.isfinite(X) & np.isfinite(Y)
+    keep = fin.mean(axis=0) >= min_coverage if len(fin) else np.zeros(len(panel.symbols), dtype=bool)
+    rows = fin[:, keep].all(axis=1)
+    X, Y = X[np.ix_(rows, keep)], Y[np.ix_(rows, keep)]
+    n, k = X.shape
+    syms = [s for s, kp in zip(panel.symbols, keep) if kp]
+    dropped = [s for s, kp in zip(panel.symbols, keep) if not kp]
+    if k == 0 or (method == "ols" and n <= k):
+        raise ValueError(f"{panel.day}: {n} complete seconds for {k} symbols; use ridge/lasso or fewer symbols")
+    mx, my = X.mean(axis=0), Y.mean(axis=0)
+    Xc, Yc = X - mx, Y - my
+    G, C = (Xc.T @ Xc) / n, (Xc.T @ Yc) / n
+    iters = 0
+    if method == "lasso":
+        B, iters = _lasso_fista(G, C, alpha, max_iter, tol)
+    else:
+        B = np.linalg.solve(G + (alpha if method == "ridge" else 0.0) * np.eye(k), C)
+    resid = Yc - Xc @ B
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r2 = 1.0 - (resid * resid).sum(axis=0) / (Yc * Yc).sum(axis=0)
+    return CrossImpact(panel.day, syms, method, float(alpha), B.T.copy(), my - mx @ B, r2, int(n), iters, dropped)
+
+
+def save_cross_impact(res: CrossImpact, results_root: str) -> str:
+    """``regressions/cross_impact/<day>_beta.parquet`` (matrix) and ``<day>_fit.parquet`` (per-target fit)."""
+    d = os.path.join(results_root, "regressions", "cross_impact"); os.makedirs(d, exist_ok=True)
+    with atomic_path(os.path.join(d, f"{res.day}_beta.parquet")) as tmp:
+        res.to_frame().to_parquet(tmp)
+    with atomic_path(os.path.join(d, f"{res.day}_fit.parquet")) as tmp:
+        res.fit_frame().to_parquet(tmp, index=False)
+    return d
@@ -0,0 +1,134 @@
+# src/ofi_density.py
+from __future__ import annotations
+import os, numpy as np
+from typing import Iterable, Tuple
+from .ofi_utils import atomic_path
+
+# Binned 2-D density for OFI/return scatters: every point is counted (no subsampling), counts from different
+# symbol-days merge by addition because the bin edges are fixed up front, and rendering cost depends on the
+# number of bins only. Sufficient statistics for the OLS line (n, sums, cross-products) are accumulated
+# alongside, over all finite points including those outside the plotted range.
+
+OFI_LIMITS = (-3.0, 3.0)       # normalized_OFI; the TAQ panel's median ofi_scale is ~0.5
+BPS_LIMITS = (-10.0, 10.0)     # d_mid_bps
+
+
+class Density2D:
+    """Fixed-edge 2-D histogram with mergeable counts and OLS moments."""
+
+    def __init__(self, xlim: Tuple[float, float] = OFI_LIMITS, ylim: Tuple[float, float] = BPS_LIMITS,
+                 bins: Tuple[int, int] = (200, 200)):
+        self.xlim, self.ylim = (float(xlim[0]), float(xlim[1])), (float(ylim[0]), float(ylim[1]))
+        self.bins = (int(bins[0]), int(bins[1]))
+        self.counts = np.zeros(self.bins, dtype="int64")
+        self.outside = 0
+        self.moments = np.zeros(6)      # n, Σx, Σy, Σx², Σxy, Σy²
+
+    @classmethod
+    def from_data(cls, x, y, bins: Tuple[int, int] = (200, 200), q: Tuple[float, float] = (0.5, 99.5)) -> "Density2D":
+        """Bins spanning the central ``q`` percentiles of the data (single-plot use; not for merging)."""
+        x, y = np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+        ok = np.isfinite(x) & np.isfinite(y)
+        lim = lambda v: tuple(np.percentile(v, q)) if v.size and np.ptp(v) > 0 else (-1.0, 1.0)
+        xl, yl = lim(x[ok]), lim(y[ok])
+        xl = xl if xl[1] > xl[0] else (xl[0] - 1, xl[1] + 1); yl = yl if yl[1] > yl[0] else (yl[0] - 1, yl[1] + 1)
+        return cls(xl, yl, bins).add(x, y)
+
+    @property
+    def edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        return np.linspace(*self.xlim, self.bins[0] + 1), np.linspace(*self.ylim, self.bins[1] + 1)
+
+    def add(self, x, y) -> "Density2D":
+        x, y = np.asarray(x, dtype="float64").ravel(), np.asarray(y, dtype="float64").ravel()
+        ok = np.isfinite(x) & np.isfinite(y); x, y = x[ok], y[ok]
+        self.moments += (x.size, x.sum(), y.sum(), x @ x, x @ y, y @ y)
+        nx, ny = self.bins
+        ix = np.floor((x - self.xlim[0]) * (nx / (self.xlim[1] - self.xlim[0]))).astype("int64")
+        iy = np.floor((y - self.ylim[0]) * (ny / (self.ylim[1] - self.ylim[0]))).astype("int64")
+        ix[x == self.xlim[1]] = nx - 1; iy[y == self.ylim[1]] = ny - 1       # closed upper edge, as np.histogram2d
+        inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+        self.outside += int(x.size - inside.sum())
+        self.counts += np.bincount(ix[inside] * ny + iy[inside], minlength=nx * ny).reshape(nx, ny)
+        return self
+
+    def merge(self, other: "Density2D") -> "Density2D":
+        if (other.xlim, other.ylim, other.bins) != (self.xlim, self.ylim, self.bins):
+            raise ValueError("cannot merge densities with different bin edges")
+        self.counts += other.counts; self.outside += other.outside; self.moments += other.moments
+        return self
+
+    __iadd__ = merge
+
+    @property
+    def n(self) -> int:
+        return int(self.moments[0])
+
+    def fit(self) -> Tuple[float, float, float]:
+        """(alpha, beta, r2) of y on x over every added point."""
+        n, sx, sy, sxx, sxy, syy = self.moments
+        if n < 2:
+            return np.nan, np.nan, np.nan
+        vx, vy, cxy = sxx - sx * sx / n, syy - sy * sy / n, sxy - sx * sy / n
+        beta = cxy / vx if vx > 0 else np.nan
+        r2 = cxy * cxy / (vx * vy) if vx > 0 and vy > 0 else np.nan
+        return (sy - beta * sx) / n, beta, r2
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with atomic_path(path) as tmp, open(tmp, "wb") as f:
+            np.savez(f, counts=self.counts, xlim=self.xlim, ylim=self.ylim, outside=self.outside, moments=self.moments)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "Density2D":
+        with np.load(path) as z:
+            d = cls(tuple(z["xlim"]), tuple(z["ylim"]), z["counts"].shape)
+            d.counts[:] = z["counts"]; d.outside = int(z["outside"]); d.moments[:] = z["moments"]
+        return d
+
+    def plot(self, ax, fit: bool = True, cmap: str = "viridis", colorbar: bool = True):
+        """Log-scaled counts as an image (cost ~ number of bins) plus the full-sample OLS line."""
+        from matplotlib.colors import LogNorm
+        counts = np.ma.masked_equal(self.counts.T, 0)
+        im = ax.imshow(counts, origin="lower", aspect="auto", interpolation="nearest", cmap=cmap,
+                       extent=(*self.xlim, *self.ylim), norm=LogNorm(vmin=1, vmax=max(int(self.counts.max()), 1)))
+        if colorbar:
+            ax.figure.colorbar(im, ax=ax, label="points per bin")
+        if fit:
+            a, b, _ = self.fit()
+            if np.isfinite(b):
+                xg = np.array(self.xlim); ax.plot(xg, a + b * xg, "r-", linewidth=2, label=f"y = {b:.2f}x + {a:.2f}")
+        ax.set_xlim(self.xlim); ax.set_ylim(self.ylim)
+        return im
+
+
+def density_from_timeseries(paths: Iterable[str], xlim=OFI_LIMITS, ylim=BPS_LIMITS, bins=(200, 200),
+                            x: str = "normalized_OFI", y: str = "d_mid_bps") -> Density2D:
+    """Pool many symbol-day timeseries one file at a time (memory bounded by one file plus the bins)."""
+    from .ofi_compact import load_timeseries
+    total = Density2D(xlim, ylim, bins)
+    for p in paths:
+        ts = load_timeseries(p, columns=[x, y])
+        total.merge(Density2D(xlim, ylim, bins).add(ts[x].to_numpy(), ts[y].to_numpy()))
+    return total
+
+
+def render_density(out: str, *frames, title: str = "", xlim=OFI_LIMITS, ylim=BPS_LIMITS, bins=(200, 200), dpi: int = 150):
+    """Figure of the pooled density of ``frames``: timeseries with normalized_OFI / d_mid_bps, or already binned
+    Density2D counts (merged as they are); None entries skipped."""
+    import matplotlib.pyplot as plt
+    total = Density2D(xlim, ylim, bins)
+    for ts in frames:
+        if isinstance(ts, Density2D):
+            total += ts
+        elif ts is not None:
+            total += Density2D(xlim, ylim, bins).add(ts["normalized_OFI"].to_numpy(), ts["d_mid_bps"].to_numpy())
+    fig, ax = plt.subplots(figsize=(7, 5.5))
+    total.plot(ax)
+    _, b, r2 = total.fit()
+    ax.set_xlabel("normalized_OFI"); ax.set_ylabel("d_mid_bps")
+    ax.set_title(f"{title}  β={b:.3g}, R²={r2:.3f}, n={total.n:,} ({total.outside:,} outside view)".strip())
+    if np.isfinite(b): ax.legend(loc="upper left")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    fig.tight_layout(); fig.savefig(out, dpi=dpi); plt.close(fig)
+    return total
@@ -0,0 +1,151 @@
+# src/ofi_diag.py
+from __future__ import annotations
+import os, numpy as np, pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from .ofi_compact import load_timeseries
+from .ofi_utils import atomic_path
+
+# Health checks over pipeline output. Every numeric column of a timeseries is summarized in one blocked pass:
+# the (rows x columns) block is walked in cache-sized row chunks and each chunk yields counts (finite, NaN, inf,
+# zero), min/max and mean/M2 for all columns at once, merged across chunks with Chan's parallel-variance update.
+# The same pass accumulates crossed/locked quotes, depth_roll_10m < 1 and the OFI -> d_mid_bps regression moments.
+# Results land in two small panels under regressions/:
+#   diagnostics_columns.parquet        one row per (day, symbol, column): n, n_nan, n_inf, n_zero, mean, std, min, max
+#   diagnostics_by_symbol_day.parquet  one row per (day, symbol): coverage (rows vs the day's longest series),
+#                                      gaps, quote/depth checks, OFI fit and a ";"-joined ``issues`` tag list
+
+BLOCK_ROWS = 8192
+STATS = ("n", "n_nan", "n_inf", "n_zero", "mean", "std", "min", "max")
+MIN_REG_N = 1000
+
+
+class _Moments:
+    """Per-column running statistics over row blocks of a float matrix."""
+
+    def __init__(self, k: int):
+        self.n = np.zeros(k); self.nan = np.zeros(k); self.inf = np.zeros(k); self.zero = np.zeros(k)
+        self.mean = np.zeros(k); self.m2 = np.zeros(k)
+        self.min = np.full(k, np.inf); self.max = np.full(k, -np.inf)
+
+    def add(self, a: np.ndarray):
+        fin = np.isfinite(a); isnan = np.isnan(a)
+        n_b = fin.sum(axis=0).astype("float64")
+        self.nan += isnan.sum(axis=0); self.inf += (~fin & ~isnan).sum(axis=0); self.zero += (a == 0).sum(axis=0)
+        af = np.where(fin, a, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_b = np.where(n_b > 0, af.sum(axis=0) / n_b, 0.0)
+        m2_b = np.square(np.where(fin, a - mean_b, 0.0)).sum(axis=0)
+        self.min = np.minimum(self.min, np.where(fin, a, np.inf).min(axis=0))
+        self.max = np.maximum(self.max, np.where(fin, a, -np.inf).max(axis=0))
+        n = self.n + n_b; delta = mean_b - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            w = np.where(n > 0, n_b / n, 0.0)
+            self.m2 = self.m2 + m2_b + delta * delta * self.n * w
+        self.mean = self.mean + delta * w; self.n = n
+
+    def rows(self) -> Dict[str, np.ndarray]:
+        has = self.n > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.where(self.n > 1, np.sqrt(self.m2 / (self.n - 1)), np.nan)
+        return dict(n=self.n.astype("int64"), n_nan=self.nan.astype("int64"), n_inf=self.inf.astype("int64"),
+                    n_zero=self.zero.astype("int64"), mean=np.where(has, self.mean, np.nan), std=std,
+                    min=np.where(has, self.min, np.nan), max=np.where(has, self.max, np.nan))
+
+
+def column_stats(ts: pd.DataFrame, block_rows: int = BLOCK_ROWS) -> Tuple[pd.DataFrame, Dict]:
+    """(per-column stats frame indexed by column, symbol-day checks dict) from one blocked pass over ``ts``."""
+    num = ts.select_dtypes("number"); cols = list(num.columns)
+    a = num.to_numpy(dtype="float64"); mom = _Moments(len(cols))
+    pos = {c: i for i, c in enumerate(cols)}
+    bid, ask, roll, ofi = (pos.get(c) for c in ("bid", "ask", "depth_roll_10m", "ofi"))
+    x, y = pos.get("normalized_OFI"), pos.get("d_mid_bps")
+    crossed = locked = roll_lt1 = ofi_nz = 0; xy = np.zeros(6)           # n, Σx, Σy, Σx², Σxy, Σy²
+    for i in range(0, len(a), block_rows):
+        blk = a[i:i + block_rows]; mom.add(blk)
+        if bid is not None and ask is not None:
+            crossed += int((blk[:, ask] < blk[:, bid]).sum()); locked += int((blk[:, ask] == blk[:, bid]).sum())
+        if roll is not None: roll_lt1 += int((blk[:, roll] < 1).sum())
+        if ofi is not None: ofi_nz += int(((blk[:, ofi] != 0) & np.isfinite(blk[:, ofi])).sum())
+        if x is not None and y is not None:
+            bx, by = blk[:, x], blk[:, y]; ok = np.isfinite(bx) & np.isfinite(by); bx, by = bx[ok], by[ok]
+            xy += (bx.size, bx.sum(), by.sum(), bx @ bx, bx @ by, by @ by)
+    stats = pd.DataFrame(mom.rows(), index=pd.Index(cols, name="column"))
+    n, sx, sy, sxx, sxy, syy = xy
+    vx, vy, cxy = (sxx - sx * sx / n, syy - sy * sy / n, sxy - sx * sy / n) if n else (0.0, 0.0, 0.0)
+    checks = dict(rows=len(a), crossed=crossed, locked=locked, depth_roll_lt1=roll_lt1,
+                  ofi_nonzero_share=ofi_nz / len(a) if len(a) and ofi is not None else np.nan,
+                  reg_n=int(n), beta=cxy / vx if vx > 0 else np.nan, r2=cxy * cxy / (vx * vy) if vx > 0 and vy > 0 else np.nan)
+    if isinstance(ts.index, pd.DatetimeIndex) and len(ts):
+        ns = ts.index.as_unit("ns").asi8; step = np.diff(ns)
+        freq = int(np.median(step)) if len(step) else 1
+        checks.update(start=str(ts.index[0]), end=str(ts.index[-1]), step_s=freq / 1e9,
+                      max_gap_s=float(step.max() / 1e9) if len(step) else 0.0)
+    return stats, checks
+
+
+def issues(checks: Dict, stats: pd.DataFrame) -> List[str]:
+    out = [f"inf:{c}" for c in stats.index[stats["n_inf"] > 0]]
+    if checks.get("crossed"): out.append("crossed_quotes")
+    if checks.get("depth_roll_lt1"): out.append("depth_roll<1")
+    if checks.get("max_gap_s", 0.0) > 2 * checks.get("step_s", np.inf): out.append("gaps")
+    if checks.get("reg_n", 0) < MIN_REG_N: out.append(f"reg_n<{MIN_REG_N}")
+    if not checks.get("beta", np.nan) > 0: out.append("beta<=0")
+    return out
+
+
+def diagnose_timeseries(path: str) -> Tuple[pd.DataFrame, Dict]:
+    """Stats and checks for one ``timeseries/<day>/<symbol>.parquet`` file (day and symbol from the path)."""
+    stats, checks = column_stats(load_timeseries(path))
+    day, symbol = os.path.basename(os.path.dirname(path)), os.path.splitext(os.path.basename(path))[0]
+    checks = dict(day=day, symbol=symbol, **checks, issues=";".join(issues(checks, stats)))
+    return stats.reset_index().assign(day=day, symbol=symbol), checks
+
+
+def timeseries_files(results_root: str, days: Optional[Iterable[str]] = None) -> List[str]:
+    root = os.path.join(results_root, "timeseries"); out = []
+    for day in sorted(days or (os.listdir(root) if os.path.isdir(root) else [])):
+        ddir = os.path.join(root, day)
+        if os.path.isdir(ddir):
+            out += [os.path.join(ddir, f) for f in sorted(os.listdir(ddir)) if f.endswith(".parquet")]
+    return out
+
+
+def diagnose_results(results_root: str, days: Optional[Iterable[str]] = None, workers: int = 1,
+                     write: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(column stats, symbol-day health) for every timeseries under ``results_root``, in parallel over files."""
+    files = timeseries_files(results_root, days)
+    if workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+            parts = list(pool.map(diagnose_timeseries, files, chunksize=max(1, len(files) // (4 * workers))))
+    else:
+        parts = [diagnose_timeseries(f) for f in files]
+    first = ["day", "symbol"]
+    cols = pd.concat([p[0] for p in parts], ignore_index=True) if parts else pd.DataFrame(columns=[*first, "column", *STATS])
+    cols = cols[[*first, "column", *STATS]]
+    health = pd.DataFrame([p[1] for p in parts])
+    if len(health):
+        # Coverage against the longest series of the same day (the pipeline grid is shared within a day)
+        health.insert(3, "coverage", health["rows"] / health.groupby("day")["rows"].transform("max"))
+        low = health["coverage"] < 0.9
+        health.loc[low, "issues"] = health.loc[low, "issues"].map(lambda s: ";".join(filter(None, [s, "coverage<0.9"])))
+    if write and parts:
+        reg = os.path.join(results_root, "regressions"); os.makedirs(reg, exist_ok=True)
+        for name, frame in (("diagnostics_columns.parquet", cols), ("diagnostics_by_symbol_day.parquet", health)):
+            with atomic_path(os.path.join(reg, name)) as tmp: frame.to_parquet(tmp, index=False)
+    return cols, health
+
+
+def panel_summary(panel: pd.DataFrame) -> Dict:
+    """Headline checks on regressions/by_symbol_day.parquet (as diagnose_results.py reported them)."""
+    beta, r2 = panel["beta"].dropna(), panel["r2"].dropna()
+    out = dict(rows=len(panel), valid_beta=len(beta), symbols=int(panel["symbol"].nunique()), days=int(panel["day"].nunique()),
+               share_beta_positive=float((beta > 0).mean()) if len(beta) else np.nan,
+               beta_mean=float(beta.mean()), beta_median=float(beta.median()), r2_mean=float(r2.mean()), r2_median=float(r2.median()),
+               mean_n=float(panel["n"].mean()) if "n" in panel else np.nan)
+    found = []
+    if out["share_beta_positive"] < 0.7: found.append(f"low positive beta rate: {out['share_beta_positive']:.1%} (expected >70%)")
+    if out["r2_mean"] < 0.05: found.append(f"low mean R²: {out['r2_mean']:.4f} (expected >0.05)")
+    if out["mean_n"] < MIN_REG_N: found.append(f"low sample size: {out['mean_n']:.0f} observations per regression")
+    out["issues"] = found
+    return out
@@ -0,0 +1,332 @@
+# src/ofi_exec.py
+from __future__ import annotations
+import abc, heapq, json, os, time, numpy as np, pandas as pd
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from .ofi_calendar import NY
+from .ofi_utils import atomic_path, parse_trading_day_from_filename, process_symbol_day, save_timeseries_parquet, write_symbol_rows
+
+# Rough resident bytes per raw quote while a task runs (frame + TOB grid + regression copies) plus a fixed floor;
+# only used as a scheduling hint for backends that understand memory resources.
+_BYTES_PER_QUOTE = 256
+_TASK_FLOOR_BYTES = 64 * 2**20
+# Default cost model (seconds) until a previous run's task_timings.parquet is available
+_DEFAULT_OVERHEAD_S = 0.15
+_DEFAULT_S_PER_QUOTE = 4e-6
+TIMINGS_FILE = "task_timings.parquet"
+
+
+@dataclass(frozen=True)
+class Task:
+    """One (day, symbol) unit read from the symbol-sorted parquet cache; ``rows`` is its quote count."""
+    day: str
+    symbol: str
+    cache_path: str
+    rows: int
+    cost: float = 0.0
+
+    def resources(self) -> Dict[str, int]:
+        return {"cpus": 1, "memory": _TASK_FLOOR_BYTES + self.rows * _BYTES_PER_QUOTE}
+
+
+class CostModel:
+    """Task seconds ~ overhead + per_quote * quotes; per-symbol rates from a previous run override the global one."""
+
+    def __init__(self, overhead: float = _DEFAULT_OVERHEAD_S, per_quote: float = _DEFAULT_S_PER_QUOTE,
+                 symbol_rate: Optional[Dict[str, float]] = None):
+        self.overhead, self.per_quote, self.symbol_rate = overhead, per_quote, symbol_rate or {}
+
+    @classmethod
+    def from_timings(cls, path: str) -> "CostModel":
+        """Fit on a previous run's ``task_timings.parquet`` (day, symbol, rows, seconds); default model if absent."""
+        if not os.path.exists(path):
+            return cls()
+        t = pd.read_parquet(path)
+        t = t[(t["rows"] > 0) & (t["seconds"] > 0)]
+        if len(t) < 2 or t["rows"].nunique() < 2:
+            return cls()
+        per_quote, overhead = np.polyfit(t["rows"].to_numpy(float), t["seconds"].to_numpy(float), 1)
+        overhead = max(float(overhead), 0.0); per_quote = max(float(per_quote), 1e-9)
+        rate = ((t["seconds"] - overhead).clip(lower=0) / t["rows"]).groupby(t["symbol"]).median()
+        return cls(overhead, per_quote, {k: float(v) for k, v in rate.items() if v > 0})
+
+    def cost(self, symbol: str, rows: int) -> float:
+        return self.overhead + self.symbol_rate.get(symbol, self.per_quote) * rows
+
+
+def plan_tasks(cache_paths: Sequence[str], cost_model: Optional[CostModel] = None) -> List[Task]:
+    """All (day, symbol) tasks of the given cached days, longest estimated first (LPT order)."""
+    from .ofi_outofcore import symbol_row_counts
+    cm = cost_model or CostModel()
+    tasks = [Task(str(parse_trading_day_from_filename(p).date()), sym, p, n, cm.cost(sym, n))
+             for p in cache_paths for sym, n in symbol_row_counts(p).items()]
+    return sorted(tasks, key=lambda t: (-t.cost, -t.rows, t.day, t.symbol))
+
+
+def lpt_makespan(costs: Iterable[float], slots: int) -> float:
+    """Makespan of greedy longest-first list scheduling of ``costs`` onto ``slots`` identical workers."""
+    loads = [0.0] * max(int(slots), 1)
+    for c in sorted(costs, reverse=True):
+        heapq.heapreplace(loads, loads[0] + c)
+    return max(loads)
+
+
+def run_task(task: Task, outdir: str, freq: str = "1s", do_halfhour_10s: bool = True, engine: str = "pandas",
+             memory_limit_bytes: Optional[int] = None):
+    """Worker side: read one symbol-day, compute (pandas or arrow ``engine``), write its timeseries to the shared store.
+
+    Returns (row, half-hour rows, seconds spent) so the driver can record timings for the next run's cost model.
+    The symbol's decoded rows may not exceed ``memory_limit_bytes`` (MemoryError, as in the out-of-core reader).
+    """
+    from .ofi_outofcore import cached_schema, read_symbol_table
+    t0 = time.perf_counter()
+    schema = cached_schema(task.cache_path); day = pd.Timestamp(task.day, tz=NY)
+    t = read_symbol_table(task.cache_path, task.symbol, memory_limit_bytes)
+    if engine == "arrow":
+        from .ofi_arrow import process_symbol_arrow, save_timeseries_arrow, session_grid
+        ts, row, hh_rows = process_symbol_arrow(t, task.symbol, schema, day, session_grid(day, freq), do_halfhour_10s)
+        save_timeseries_arrow(ts, outdir, task.day, task.symbol)
+    else:
+        ts1s, row, hh_rows = process_symbol_day(t.to_pandas(), schema.cmap, day, freq=freq, do_halfhour_10s=do_halfhour_10s,
+                                                time_unit=schema.time_unit)
+        save_timeseries_parquet(ts1s, outdir, task.day, task.symbol)
+    return row, hh_rows, time.perf_counter() - t0
+
+
+class Executor(abc.ABC):
+    """Minimal backend interface: submit, wait for any, fetch a result. Subclasses map ``resources`` to their own hints."""
+    name = "base"
+    slots = 1
+
+    @abc.abstractmethod
+    def submit(self, fn: Callable, *args, resources: Optional[Dict[str, int]] = None):
+        """Start ``fn(*args)``; returns a handle for wait_any / result."""
+
+    @abc.abstractmethod
+    def wait_any(self, handles: Sequence) -> List:
+        """Block until at least one of ``handles`` is done; returns the done ones."""
+
+    def result(self, handle):
+        return handle.result()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SerialExecutor(Executor):
+    name = "serial"
+
+    def submit(self, fn, *args, resources=None):
+        fut: Future = Future()
+        try:
+            fut.set_result(fn(*args))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+    def wait_any(self, handles):
+        return list(handles)
+
+
+class ProcessExecutor(Executor):
+    """Local process pool; resource hints are ignored (one task per worker process)."""
+    name = "process"
+
+    def __init__(self, workers: int = 0):
+        self.slots = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.slots)
+
+    def submit(self, fn, *args, resources=None):
+        return self.pool.submit(fn, *args)
+
+    def wait_any(self, handles):
+        return list(wait(handles, return_when=FIRST_COMPLETED).done)
+
+    def close(self):
+        self.pool.shutdown()
+
+
+class DaskExecutor(Executor):
+    """dask.distributed backend: ``address`` of a running scheduler, or a LocalCluster for testing.
+
+    Memory hints are sent as the ``MEMORY`` resource only when workers advertise it (``worker_memory`` on a
+    local cluster, or ``--resources MEMORY=...`` on remote workers); otherwise tasks would never be scheduled.
+    """
+    name = "dask"
+
+    def __init__(self, address: Optional[str] = None, workers: int = 0, worker_memory: Optional[int] = None):
+        from dask.distributed import Client, LocalCluster
+        self.cluster = None
+        if address is None:
+            kw = {} if worker_memory is None else dict(resources={"MEMORY": worker_memory})
+            self.cluster = LocalCluster(n_workers=workers or os.cpu_count() or 1, threads_per_worker=1, processes=True, **kw)
+            address = self.cluster
+        self.client = Client(address)
+        self.slots = sum(w.get("nthreads", 1) for w in self.client.scheduler_info()["workers"].values()) or 1
+        self.use_memory = worker_memory is not None or any(
+            "MEMORY" in (w.get("resources") or {}) for w in self.client.scheduler_info()["workers"].values())
+
+    def submit(self, fn, *args, resources=None):
+        res = {"MEMORY": resources["memory"]} if self.use_memory and resources else None
+        return self.client.submit(fn, *args, resources=res, pure=False)
+
+    def wait_any(self, handles):
+        from dask.distributed import wait as dwait
+        return list(dwait(handles, return_when="FIRST_COMPLETED").done)
+
+    def close(self):
+        self.client.close()
+        if self.cluster is not None:
+            self.cluster.close()
+
+
+class RayExecutor(Executor):
+    """Ray backend: ``address`` of a running cluster (``ray://...`` or ``auto``), or a local instance for testing."""
+    name = "ray"
+
+    def __init__(self, address: Optional[str] = None, workers: int = 0):
+        import ray
+        self.ray = ray
+        # Only a Ray instance started here is shut down on close; a caller's own ray.init() outlives the executor
+        self.owner = not ray.is_initialized()
+        if self.owner:
+            ray.init(address=address, num_cpus=None if address else (workers or None), ignore_reinit_error=True)
+        self._remote: Dict[Callable, object] = {}
+        self.slots = int(ray.cluster_resources().get("CPU", 1))
+
+    def submit(self, fn, *args, resources=None):
+        rf = self._remote.get(fn) or self._remote.setdefault(fn, self.ray.remote(max_retries=0)(fn))
+        opts = {} if not resources else dict(num_cpus=resources.get("cpus", 1), memory=resources.get("memory"))
+        return rf.options(**opts).remote(*args)
+
+    def wait_any(self, handles):
+        ready, _ = self.ray.wait(list(handles), num_returns=1)
+        return ready
+
+    def result(self, handle):
+        return self.ray.get(handle)
+
+    def close(self):
+        if self.owner:
+            self.ray.shutdown()
+
+
+def make_executor(spec: Union[str, Executor, None], workers: int = 0) -> Executor:
+    """``serial``, ``process``, ``dask`` / ``dask://host:port`` / ``tcp://host:port``, ``ray`` / ``ray://host:port``."""
+    if isinstance(spec, Executor):
+        return spec
+    spec = spec or "serial"
+    if spec == "serial":
+        return SerialExecutor()
+    if spec == "process":
+        return ProcessExecutor(workers)
+    if spec == "dask" or spec.startswith(("dask://", "tcp://")):
+        return DaskExecutor(None if spec == "dask" else spec.replace("dask://", "tcp://", 1), workers)
+    if spec == "ray" or spec.startswith("ray://"):
+        return RayExecutor(None if spec == "ray" else spec, workers)
+    raise ValueError(f"unknown executor {spec!r}")
+
+
+def run_tasks(executor: Executor, fn: Callable, tasks: Iterable[Task], args: Tuple = (), retries: int = 2,
+              max_inflight: Optional[int] = None) -> Iterator[Tuple[Task, object]]:
+    """Run ``fn(task, *args)`` for every task and yield (task, result) as they finish.
+
+    Tasks stay in one driver-side queue in the given (longest-first) order and at most ``max_inflight``
+    (default: executor slots + 1) are handed out at a time, so whichever worker frees up first takes the next
+    largest task instead of a pre-assigned chunk. A failing task is resubmitted at the front of the queue up to
+    ``retries`` times; after that the last error is raised.
+    """
+    queue = list(tasks)[::-1]; pending: Dict = {}; attempts: Dict[Task, int] = {}
+    limit = max_inflight or executor.slots + 1
+
+    def top_up():
+        while queue and len(pending) < limit:
+            t = queue.pop(); attempts[t] = attempts.get(t, 0) + 1
+            pending[executor.submit(fn, t, *args, resources=t.resources())] = t
+
+    top_up()
+    while pending:
+        failed = None
+        for h in executor.wait_any(list(pending)):
+            t = pending.pop(h)
+            try:
+                res = executor.result(h)
+            except Exception as e:
+                if attempts[t] > retries:
+                    failed = failed or (t, e)
+                else:
+                    queue.append(t)
+                continue
+            yield t, res
+        if failed is not None:
+            # raised only after the other finished tasks of this round were handed back (and journaled)
+            t, e = failed
+            raise RuntimeError(f"task {t.day}/{t.symbol} failed after {attempts[t]} attempts: {e!r}") from e
+        top_up()
+
+
+def schedule_report(tasks: Sequence[Task], seconds: Dict[Tuple[str, str], float], slots: int, wall: float) -> Dict:
+    """Expected (LPT on estimated costs) vs actual makespan, plus the total-work / slots lower bound."""
+    est = [t.cost for t in tasks]; act = [seconds[(t.day, t.symbol)] for t in tasks if (t.day, t.symbol) in seconds]
+    work = float(sum(act))
+    return dict(tasks=len(tasks), slots=int(slots), estimated_work_s=float(sum(est)), actual_work_s=work,
+                expected_makespan_s=lpt_makespan(est, slots), lpt_makespan_on_actual_s=lpt_makespan(act, slots),
+                lower_bound_s=max(work / max(slots, 1), max(act, default=0.0)), actual_makespan_s=float(wall),
+                efficiency=(work / (slots * wall)) if wall > 0 else None)
+
+
+def process_days_distributed(cache_paths: Sequence[str], outdir: str, freq: str = "1s", do_halfhour_10s: bool = True,
+                             executor: Union[str, Executor, None] = "serial", workers: int = 0, retries: int = 2,
+                             cost_model: Optional[CostModel] = None, journal=None, engine: str = "pandas",
+                             memory_limit_bytes: Optional[int] = None) -> pd.DataFrame:
+    """Run cached days as (day, symbol) tasks on ``executor``, longest estimated first.
+
+    Timeseries are written by the workers into the partitioned ``timeseries/<day>/<symbol>.parquet`` store;
+    panel rows come back to the driver and are appended in (day, symbol) order so the output matches the serial path.
+    Task costs come from ``cost_model`` or ``regressions/task_timings.parquet`` of a previous run, which is then
+    refreshed; the expected vs actual makespan goes to ``regressions/schedule_report.json`` and ``result.attrs``.
+    With a ``RunJournal``, every finished task is logged with its rows and tasks already in the journal are skipped.
+    ``engine`` and ``memory_limit_bytes`` are passed to every run_task.
+    """
+    reg = os.path.join(outdir, "regressions"); timings_path = os.path.join(reg, TIMINGS_FILE)
+    tasks = plan_tasks(cache_paths, cost_model or CostModel.from_timings(timings_path)); done = {}
+    if journal is not None:
+        days = {t.day for t in tasks}
+        done = {k: (u["row"], u["hh_rows"], u["seconds"]) for k, u in journal.units.items() if k[0] in days}
+        tasks = [t for t in tasks if (t.day, t.symbol) not in done]
+    ex = make_executor(executor, workers); owned = not isinstance(executor, Executor)
+    try:
+        t0 = time.perf_counter()
+        for t, res in run_tasks(ex, run_task, tasks, args=(outdir, freq, do_halfhour_10s, engine, memory_limit_bytes),
+                                retries=retries):
+            done[(t.day, t.symbol)] = res
+            if journal is not None:
+                journal.mark_unit(t.day, t.symbol, *res)
+        wall = time.perf_counter() - t0
+    finally:
+        if owned:
+            ex.close()
+    rows = []
+    for key in sorted(done):
+        row, hh_rows, _ = done[key]
+        write_symbol_rows(row, hh_rows, outdir); rows.append(row)
+    seconds = {(t.day, t.symbol): done[(t.day, t.symbol)][2] for t in tasks}
+    timings = pd.DataFrame([dict(day=t.day, symbol=t.symbol, rows=t.rows, seconds=seconds[(t.day, t.symbol)]) for t in tasks])
+    if os.path.exists(timings_path) and len(timings):
+        timings = pd.concat([pd.read_parquet(timings_path), timings], ignore_index=True).drop_duplicates(["day", "symbol"], keep="last")
+    os.makedirs(reg, exist_ok=True)
+    if len(timings):
+        with atomic_path(timings_path) as tmp:
+            timings.to_parquet(tmp, index=False)
+    report = schedule_report(tasks, seconds, ex.slots, wall)
+    with atomic_path(os.path.join(reg, "schedule_report.json")) as tmp, open(tmp, "w") as f:
+        json.dump(report, f, indent=2)
+    out = pd.DataFrame(rows); out.attrs["schedule"] = report
+    return out
@@ -0,0 +1,189 @@
+# src/ofi_figures.py
+from __future__ import annotations
+import hashlib, importlib, importlib.util, json, os, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from .ofi_cache import code_digest
+from .ofi_utils import atomic_path
+
+# Figure build graph: every figure declares the files it reads. A build loads each input that several figures
+# share exactly once (in the parent, handed to the workers at pool start), loads single-use inputs inside the
+# worker that renders the figure, renders independent figures in parallel processes on the Agg backend, and
+# skips figures whose output exists and whose inputs (size + mtime), parameters and render code are unchanged
+# since the last build (``.figure_manifest.json`` next to the figures).
+#
+# An input declared ``as_path`` only takes part in the up-to-date check: the render gets its path and reads it itself
+# (e.g. to pool many files one at a time), and it is never loaded in the parent or counted as shared.
+#
+# ``render`` is a callable importable by reference or a "module:function" / "path/to/script.py:function" string;
+# it is called as ``render(output_path, *loaded_inputs, **params)``.
+
+MANIFEST = ".figure_manifest.json"
+_SHARED: Dict[Tuple, object] = {}
+_RESOLVED: Dict[str, Callable] = {}
+
+
+@dataclass(frozen=True)
+class Input:
+    path: str
+    columns: Optional[Tuple[str, ...]] = None    # parquet column projection; None reads the whole file
+    as_path: bool = False                         # hand the render the path instead of the loaded frame
+
+    @property
+    def key(self) -> Tuple:
+        return (os.path.abspath(self.path), self.columns)
+
+    def stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def load(self):
+        """DataFrame for parquet inputs (plain or compact timeseries), None when the file is missing."""
+        from .ofi_compact import load_timeseries
+        if not os.path.exists(self.path):
+            return None
+        return load_timeseries(self.path, columns=list(self.columns) if self.columns else None)
+
+
+@dataclass
+class Figure:
+    output: str
+    render: Union[str, Callable]
+    inputs: Tuple[Input, ...] = ()
+    params: Dict = field(default_factory=dict)
+
+
+def resolve(render: Union[str, Callable]) -> Callable:
+    if callable(render):
+        return render
+    fn = _RESOLVED.get(render)
+    if fn is None:
+        target, name = render.rsplit(":", 1)
+        if target.endswith(".py"):
+            # Scripts load under a private module name so their ``if __name__ == "__main__"`` block does not run
+            modname = "_ofi_fig_" + hashlib.blake2b(os.path.abspath(target).encode(), digest_size=6).hexdigest()
+            spec = importlib.util.spec_from_file_location(modname, target)
+            mod = importlib.util.module_from_spec(spec); spec.loader.exec_module(mod)
+        else:
+            mod = importlib.import_module(target)
+        fn = _RESOLVED[render] = getattr(mod, name)
+    return fn
+
+
+def signature(fig: Figure) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    fn = resolve(fig.render)
+    h.update(f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', '')}".encode())
+    code = getattr(fn, "__code__", None)
+    if code is not None:
+        code_digest(h, code)
+    h.update(repr(sorted(fig.params.items())).encode())
+    for inp in fig.inputs:
+        h.update(repr((inp.key, inp.stamp())).encode())
+    return h.hexdigest()
+
+
+def _use_agg():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _init_worker(shared: Dict):
+    _use_agg()
+    _SHARED.update(shared)
+
+
+def _render(fig: Figure) -> Tuple[str, float]:
+    t0 = time.perf_counter()
+    data = [i.path if i.as_path else _SHARED[i.key] if i.key in _SHARED else i.load() for i in fig.inputs]
+    os.makedirs(os.path.dirname(fig.output) or ".", exist_ok=True)
+    resolve(fig.render)(fig.output, *data, **fig.params)
+    return fig.output, time.perf_counter() - t0
+
+
+def build_figures(figures: Sequence[Figure], manifest: Optional[str] = None, workers: int = 1, force: bool = False) -> Dict:
+    """Render out-of-date ``figures``; returns {"rendered": [...], "skipped": [...], "shared_inputs": n, "seconds": wall}."""
+    t0 = time.perf_counter()
+    manifest = manifest or os.path.join(os.path.dirname(figures[0].output) if figures else ".", MANIFEST)
+    done: Dict[str, str] = {}
+    if os.path.exists(manifest):
+        with open(manifest) as f:
+            done = json.load(f)
+    sigs = {fig.output: signature(fig) for fig in figures}
+    todo = [fig for fig in figures if force or done.get(fig.output) != sigs[fig.output] or not os.path.exists(fig.output)]
+    pending = {fig.output for fig in todo}
+    skipped = [fig.output for fig in figures if fig.output not in pending]
+
+    uses: Dict[Tuple, List[Input]] = {}
+    for fig in todo:
+        for inp in fig.inputs:
+            if not inp.as_path: uses.setdefault(inp.key, []).append(inp)
+    shared = {k: v[0].load() for k, v in uses.items() if len(v) > 1}
+
+    rendered: List[str] = []
+    def finished(out: str):
+        rendered.append(out); done[out] = sigs[out]
+        os.makedirs(os.path.dirname(manifest) or ".", exist_ok=True)
+        with atomic_path(manifest) as tmp, open(tmp, "w") as f:
+            json.dump(done, f, indent=1, sort_keys=True)
+
+    if workers <= 1 or len(todo) <= 1:
+        _use_agg(); _SHARED.clear(); _SHARED.update(shared)
+        try:
+            for fig in todo: finished(_render(fig)[0])
+        finally:
+            _SHARED.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo)), initializer=_init_worker, initargs=(shared,)) as pool:
+            for fut in as_completed([pool.submit(_render, fig) for fig in todo]):
+                finished(fut.result()[0])
+    return dict(rendered=rendered, skipped=skipped, shared_inputs=len(shared), seconds=time.perf_counter() - t0)
+
+
+# Renderers for the standard results figures (make_figures.py / ``ofi figures``)
+
+def render_beta_hist(out: str, panel):
+    from .ofi_utils import plot_beta_histogram
+    plot_beta_histogram(panel, os.path.dirname(out))
+
+
+def render_intraday(out: str, halfhour, *depth_frames):
+    from .ofi_utils import plot_intraday_beta_vs_depth
+    if halfhour is not None:
+        plot_intraday_beta_vs_depth(halfhour, [d for d in depth_frames if d is not None], os.path.dirname(out))
+
+
+def render_scatter(out: str, ts, symbol: str, day: str):
+    from .ofi_utils import make_scatter
+    make_scatter(ts, symbol=symbol, day=day, figdir=os.path.dirname(out))
+
+
+def render_pooled_density(out: str, *paths):
+    from .ofi_density import density_from_timeseries, render_density
+    render_density(out, density_from_timeseries(p for p in paths if os.path.exists(p)), title="All symbol-days")
+
+
+def results_figures(results: str, figdir: str) -> List[Figure]:
+    """The figure graph for a results directory: β histogram, intraday β vs depth, one scatter per symbol-day and
+    the density of all symbol-days pooled (read one file at a time inside its render, so the scatters' timeseries
+    stay single-use loads in their workers)."""
+    reg, ts_root = os.path.join(results, "regressions"), os.path.join(results, "timeseries")
+    series = []
+    if os.path.isdir(ts_root):
+        for day in sorted(os.listdir(ts_root)):
+            ddir = os.path.join(ts_root, day)
+            if os.path.isdir(ddir):
+                series += [(day, f[:-8], os.path.join(ddir, f)) for f in sorted(os.listdir(ddir)) if f.endswith(".parquet")]
+    figs = [Figure(os.path.join(figdir, "beta_hist.png"), render_beta_hist, (Input(os.path.join(reg, "by_symbol_day.parquet")),)),
+            Figure(os.path.join(figdir, "intraday_beta_vs_depth.png"), render_intraday,
+                   (Input(os.path.join(reg, "by_symbol_day_halfhour.parquet")), *[Input(p, ("depth",)) for _, _, p in series]))]
+    figs += [Figure(os.path.join(figdir, f"scatter_{sym}_{day}.png"), render_scatter, (Input(p, ("normalized_OFI", "d_mid_bps")),),
+                    dict(symbol=sym, day=day)) for day, sym, p in series]
+    if series:
+        figs.append(Figure(os.path.join(figdir, "density_all.png"), render_pooled_density,
+                           tuple(Input(p, as_path=True) for _, _, p in series)))
+    return figs
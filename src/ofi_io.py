@@ -0,0 +1,136 @@
+# src/ofi_io.py
+from __future__ import annotations
+import json, os, queue, threading, time
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from .ofi_utils import save_timeseries_parquet
+
+_STOP = object()
+
+class AsyncParquetWriter:
+    """Bounded queue + writer threads for timeseries parquet output.
+
+    ``submit`` blocks once ``max_pending`` frames are queued (backpressure keeps memory bounded); ``save`` writes one
+    frame (save_timeseries_parquet, or ofi_arrow.save_timeseries_arrow for Arrow tables).
+    Worker exceptions are re-raised on the next ``submit``/``flush`` and on ``close``.
+    pyarrow releases the GIL while compressing and writing, so this overlaps with the next symbol's compute.
+    """
+
+    def __init__(self, threads: int = 2, max_pending: int = 8):
+        self._q: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._errors: List[BaseException] = []
+        self._lock = threading.Lock()
+        self.write_seconds = 0.0; self.written = 0; self.blocked_seconds = 0.0
+        self._threads = [threading.Thread(target=self._run, name=f"ofi-writer-{i}", daemon=True) for i in range(max(1, threads))]
+        for t in self._threads: t.start()
+        self._closed = False
+
+    def _run(self):
+        while True:
+            item = self._q.get()
+            try:
+                if item is _STOP: return
+                t0 = time.perf_counter()
+                save, args = item; save(*args)
+                with self._lock:
+                    self.write_seconds += time.perf_counter() - t0; self.written += 1
+            except BaseException as e:
+                with self._lock: self._errors.append(e)
+            finally:
+                self._q.task_done()
+
+    def _raise_pending(self):
+        with self._lock:
+            err = self._errors[0] if self._errors else None
+        if err is not None:
+            raise RuntimeError(f"async parquet write failed: {err!r}") from err
+
+    def submit(self, ts_df: pd.DataFrame, outdir: str, day: str, symbol: str, save=save_timeseries_parquet):
+        if self._closed: raise RuntimeError("writer is closed")
+        self._raise_pending()
+        t0 = time.perf_counter()
+        self._q.put((save, (ts_df, outdir, day, symbol)))
+        with self._lock: self.blocked_seconds += time.perf_counter() - t0
+
+    def flush(self):
+        """Wait until everything submitted so far is on disk."""
+        self._q.join(); self._raise_pending()
+
+    def close(self):
+        if self._closed: return
+        self._closed = True
+        for _ in self._threads: self._q.put(_STOP)
+        for t in self._threads: t.join()
+        self._raise_pending()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except Exception:
+            if exc_type is None: raise
+        return False
+
+
+def open_writer(writer: Optional[AsyncParquetWriter]):
+    """Return (writer, owned): reuse a caller's writer or create a private one the caller must close."""
+    return (writer, False) if writer is not None else (AsyncParquetWriter(), True)
+
+
+def _json_default(o):
+    return o.item() if hasattr(o, "item") else str(o)
+
+
+class RunJournal:
+    """Append-only JSONL log of finished work units, fsynced per line, for ``--resume``.
+
+    ``unit`` lines record a finished (day, symbol) task with its panel rows so a resumed run can rebuild the
+    panels without recomputing; ``day`` lines mark a whole day of the day-by-day path as finished (all of its
+    outputs on disk) with its by_symbol_day rows. A torn last line from a crash is ignored on load and cut off
+    before appending, so the next record starts on a line of its own.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.units: Dict[Tuple[str, str], Dict] = {}
+        self.days: Dict[str, List[Dict]] = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if resume and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    if rec.get("kind") == "unit":
+                        self.units[(rec["day"], rec["symbol"])] = rec
+                    elif rec.get("kind") == "day":
+                        self.days[rec["day"]] = rec["rows"]
+        if resume and os.path.exists(path):
+            with open(path, "rb+") as f:
+                data = f.read(); f.truncate(data.rfind(b"\n") + 1)
+        self._f = open(path, "a" if resume else "w")
+        self._lock = threading.Lock()
+
+    def _append(self, rec: Dict):
+        line = json.dumps(rec, default=_json_default) + "\n"
+        with self._lock:
+            self._f.write(line); self._f.flush(); os.fsync(self._f.fileno())
+
+    def mark_unit(self, day: str, symbol: str, row: Dict, hh_rows: List[Dict], seconds: float = 0.0):
+        rec = dict(kind="unit", day=day, symbol=symbol, row=row, hh_rows=hh_rows, seconds=seconds)
+        self._append(rec); self.units[(day, symbol)] = json.loads(json.dumps(rec, default=_json_default))
+
+    def mark_day(self, day: str, rows: List[Dict]):
+        self._append(dict(kind="day", day=day, rows=rows)); self.days[day] = rows
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
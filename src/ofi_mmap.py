@@ -0,0 +1,116 @@
+# src/ofi_mmap.py
+from __future__ import annotations
+import os, numpy as np, pandas as pd
+import pyarrow as pa
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+from .ofi_calendar import NY
+from .ofi_compact import load_timeseries
+from .ofi_utils import atomic_path
+
+TIME_COL = "ts_ns"
+
+# Uncompressed Arrow IPC copies of the timeseries for interactive work: files are memory-mapped and
+# every query returns NumPy views into the map, so a window costs a binary search, not a decompression.
+
+def ipc_path(outdir: str, day: str, symbol: str) -> str:
+    return os.path.join(outdir, "timeseries_ipc", day, f"{symbol}.arrow")
+
+
+def export_timeseries_ipc(ts_df: pd.DataFrame, outdir: str, day: str, symbol: str) -> str:
+    path = ipc_path(outdir, day, symbol); os.makedirs(os.path.dirname(path), exist_ok=True)
+    idx = pd.DatetimeIndex(ts_df.index)
+    # pa.array on float ndarrays keeps NaN as a value (no validity bitmap), which keeps reads zero-copy
+    arrays = [pa.array(idx.as_unit("ns").asi8)] + [pa.array(ts_df[c].to_numpy(dtype="float64")) for c in ts_df.columns]
+    meta = {b"tz": str(idx.tz or "UTC").encode(), b"unit": idx.unit.encode() if hasattr(idx, "unit") else b"ns"}
+    table = pa.Table.from_arrays(arrays, names=[TIME_COL, *map(str, ts_df.columns)]).replace_schema_metadata(meta)
+    with atomic_path(path) as tmp, pa.OSFile(tmp, "wb") as sink, \
+            pa.ipc.new_file(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=None)) as w:
+        w.write_table(table)
+    return path
+
+
+def export_results_ipc(results_root: str, days: Optional[Iterable[str]] = None) -> int:
+    """Convert existing ``timeseries/<day>/<symbol>.parquet`` output to memory-mappable IPC files."""
+    ts_root = os.path.join(results_root, "timeseries"); n = 0
+    for day in sorted(days or os.listdir(ts_root)):
+        ddir = os.path.join(ts_root, day)
+        if not os.path.isdir(ddir): continue
+        for f in sorted(os.listdir(ddir)):
+            if f.endswith(".parquet"):
+                export_timeseries_ipc(load_timeseries(os.path.join(ddir, f)), results_root, day, f[:-8]); n += 1
+    return n
+
+
+class MmapTimeseries:
+    """One memory-mapped symbol-day; ``window`` returns zero-copy NumPy views selected through the time index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._source = pa.memory_map(path, "r")
+        self.table = pa.ipc.open_file(self._source).read_all()
+        meta = self.table.schema.metadata or {}
+        self.tz = meta.get(b"tz", b"UTC").decode()
+        self.ts = self.table.column(TIME_COL).chunk(0).to_numpy(zero_copy_only=True)
+        self.columns = [c for c in self.table.column_names if c != TIME_COL]
+        self._views: Dict[str, np.ndarray] = {}
+        if len(self.ts):
+            first = pd.Timestamp(int(self.ts[0]), tz="UTC").tz_convert(self.tz)
+            self._midnight = pd.Timestamp(first.date(), tz=self.tz)
+
+    def column(self, name: str) -> np.ndarray:
+        v = self._views.get(name)
+        if v is None:
+            v = self._views[name] = self.table.column(name).chunk(0).to_numpy(zero_copy_only=True)
+        return v
+
+    def _to_ns(self, t: Union[str, pd.Timestamp]) -> int:
+        if isinstance(t, str) and ":" in t and len(t) <= 8:
+            return (self._midnight + pd.Timedelta(t if t.count(":") == 2 else t + ":00")).value
+        ts = pd.Timestamp(t)
+        return (ts if ts.tzinfo else ts.tz_localize(self.tz)).value
+
+    def bounds(self, start, end) -> tuple:
+        """Row range [i, j) for wall-clock ``start``..``end`` inclusive ("10:00", "10:05:30" or Timestamps)."""
+        if not len(self.ts): return 0, 0
+        return int(np.searchsorted(self.ts, self._to_ns(start), "left")), int(np.searchsorted(self.ts, self._to_ns(end), "right"))
+
+    def window(self, start, end, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        i, j = self.bounds(start, end)
+        out = {TIME_COL: self.ts[i:j]}
+        for c in columns or self.columns: out[c] = self.column(c)[i:j]
+        return out
+
+    def to_pandas(self, start=None, end=None) -> pd.DataFrame:
+        i, j = self.bounds(start, end) if start is not None else (0, len(self.ts))
+        idx = pd.DatetimeIndex(self.ts[i:j].view("datetime64[ns]")).tz_localize("UTC").tz_convert(self.tz)
+        return pd.DataFrame({c: self.column(c)[i:j] for c in self.columns}, index=idx)
+
+    def close(self):
+        self._views.clear(); self.table = None; self._source.close()
+
+
+class TimeseriesStore:
+    """Query helper over ``<results>/timeseries_ipc``; keeps up to ``max_open`` maps open (LRU)."""
+
+    def __init__(self, results_root: str, max_open: int = 256):
+        self.root = os.path.join(results_root, "timeseries_ipc"); self.max_open = max_open
+        self._open: "OrderedDict[str, MmapTimeseries]" = OrderedDict()
+
+    def days(self, symbol: Optional[str] = None) -> List[str]:
+        if not os.path.isdir(self.root): return []
+        return sorted(d for d in os.listdir(self.root) if symbol is None or os.path.exists(os.path.join(self.root, d, f"{symbol}.arrow")))
+
+    def open(self, day: str, symbol: str) -> MmapTimeseries:
+        path = os.path.join(self.root, day, f"{symbol}.arrow")
+        m = self._open.pop(path, None) or MmapTimeseries(path)
+        self._open[path] = m
+        while len(self._open) > self.max_open: self._open.popitem(last=False)[1].close()
+        return m
+
+    def window(self, symbol: str, start, end, days: Optional[Iterable[str]] = None, columns: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, np.ndarray]]:
+        """{day: {column: view}} for the same wall-clock window across days, e.g. ("10:00", "10:05")."""
+        return {d: self.open(d, symbol).window(start, end, columns) for d in (days or self.days(symbol))}
+
+    def close(self):
+        while self._open: self._open.popitem()[1].close()
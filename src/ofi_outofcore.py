@@ -0,0 +1,169 @@
+# src/ofi_outofcore.py
+from __future__ import annotations
+import os, json, contextlib, numpy as np, pandas as pd
+import pyarrow as pa, pyarrow.parquet as pq
+from dataclasses import asdict
+from typing import Iterator, Optional, Tuple
+from .ofi_rda import RdaChunks, RdaFormatError
+from .ofi_stream import DaySpill, sorted_groups
+from .ofi_utils import (ColumnMap, SchemaInfo, atomic_path, detect_time_unit, pipeline_columns, read_rda, resolve_column_names,
+                        resolve_schema, parse_trading_day_from_filename, process_symbol_day, write_symbol_rows)
+
+_META_KEY = b"ofi.schema"
+_SOURCE_KEY = b"ofi.source"
+
+# The cache of a day is built chunk by chunk: the .rda is decompressed through RdaChunks into a DaySpill (per-column
+# .npy memmaps, see ofi_stream), then each symbol's rows are gathered from the spill at most ``row_group_rows`` at a
+# time and appended as row groups, so memory holds one row group plus the symbol codes. Files the chunk reader does not
+# handle are read whole (read_rda) instead. The source .rda's size and mtime are stored in the parquet metadata, and a
+# cache whose source has changed since is rebuilt (cached_day).
+
+
+def cache_file(rda_path: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"{parse_trading_day_from_filename(rda_path).date()}.parquet")
+
+
+def _fingerprint(rda_path: str) -> dict:
+    st = os.stat(rda_path)
+    return dict(size=st.st_size, mtime_ns=st.st_mtime_ns)
+
+
+def cache_is_current(cache_path: str, rda_path: str) -> bool:
+    """True if ``cache_path`` exists and was built from ``rda_path`` as it is now (same size and mtime)."""
+    if not os.path.exists(cache_path): return False
+    meta = pq.read_schema(cache_path).metadata or {}
+    return _SOURCE_KEY in meta and json.loads(meta[_SOURCE_KEY]) == _fingerprint(rda_path)
+
+
+def cached_day(rda_path: str, cache_dir: str, source: str = "taq", row_group_rows: int = 1_000_000) -> str:
+    """Path of the day's cache, (re)built if it is missing or its source .rda has changed."""
+    path = cache_file(rda_path, cache_dir)
+    return path if cache_is_current(path, rda_path) else cache_day_parquet(rda_path, cache_dir, source, row_group_rows)
+
+
+def _frame_groups(df: pd.DataFrame, source: str) -> Tuple[SchemaInfo, Iterator[pd.DataFrame]]:
+    schema = resolve_schema(df, source); cmap = schema.cmap
+    cols = [cmap.symbol, cmap.time_m, cmap.bid, cmap.ask, cmap.bidsz, cmap.asksz]
+    return schema, (g for _, g in df[cols].groupby(cmap.symbol, sort=True))
+
+
+def _spilled_groups(reader: RdaChunks, spill: DaySpill, row_group_rows: int) -> Tuple[SchemaInfo, Iterator[pd.DataFrame]]:
+    cmap = resolve_column_names(reader.names); names = reader.names
+    cols = [cmap.symbol, cmap.time_m, cmap.bid, cmap.ask, cmap.bidsz, cmap.asksz]
+    sym_j = names.index(cmap.symbol); time_j = names.index(cmap.time_m)
+    unit = detect_time_unit(int(pd.Series(reader.column(time_j, spill.raw[time_j]), copy=False).max()))
+
+    def groups():
+        for symbol, rows in sorted_groups(reader.codes(sym_j, spill.raw[sym_j]), reader.levels[sym_j]):
+            for a in range(0, len(rows), row_group_rows):
+                part = rows[a:a + row_group_rows]
+                g = {c: reader.column(names.index(c), spill.raw[names.index(c)][part]) for c in cols[1:]}
+                yield pd.DataFrame({cmap.symbol: np.full(len(part), symbol, dtype=object), **g})[cols]
+    return SchemaInfo(cmap, unit, tuple(names), ()), groups()
+
+
+def cache_day_parquet(rda_path: str, cache_dir: str, source: str = "taq", row_group_rows: int = 1_000_000,
+                      df: Optional[pd.DataFrame] = None) -> str:
+    """Write a symbol-sorted columnar copy of a day (only the resolved columns) for out-of-core runs.
+
+    Row groups never span two symbols, so the batch reader can stream one symbol at a time. Without ``df`` the day is
+    read in chunks and never held in memory whole (see the module comment).
+    """
+    os.makedirs(cache_dir, exist_ok=True); path = cache_file(rda_path, cache_dir)
+    fingerprint = json.dumps(_fingerprint(rda_path)).encode()
+
+    def write(schema: SchemaInfo, groups: Iterator[pd.DataFrame]):
+        meta = {_META_KEY: json.dumps(dict(cmap=asdict(schema.cmap), time_unit=schema.time_unit)).encode(), _SOURCE_KEY: fingerprint}
+        with atomic_path(path) as tmp:
+            writer = None
+            try:
+                for g in groups:
+                    t = pa.Table.from_pandas(g, preserve_index=False)
+                    if writer is None: writer = pq.ParquetWriter(tmp, t.schema.with_metadata({**(t.schema.metadata or {}), **meta}))
+                    writer.write_table(t, row_group_size=row_group_rows)
+            finally:
+                if writer is not None: writer.close()
+
+    if df is not None:
+        write(*_frame_groups(df, source)); return path
+    try:
+        reader = RdaChunks(rda_path, pipeline_columns)
+        with DaySpill() as spill:
+            for ch in reader: spill.add(ch)
+            write(*_spilled_groups(reader, spill, max(1, int(row_group_rows))))
+    except (RdaFormatError, ValueError):
+        # not a layout the chunk reader handles (or unresolvable from the names alone): read the day whole
+        write(*_frame_groups(read_rda(rda_path, pipeline_columns), source))
+    return path
+
+
+def cached_schema(cache_path: str) -> SchemaInfo:
+    pf = pq.ParquetFile(cache_path); meta = json.loads(pf.schema_arrow.metadata[_META_KEY])
+    return SchemaInfo(ColumnMap(**meta["cmap"]), meta["time_unit"], tuple(pf.schema_arrow.names), ())
+
+
+def symbol_row_counts(cache_path: str) -> dict:
+    """{symbol: quote count} for a cached day, from row-group metadata only (no column data is read)."""
+    pf = pq.ParquetFile(cache_path); md = pf.metadata
+    j = pf.schema_arrow.get_field_index(cached_schema(cache_path).cmap.symbol); counts: dict = {}
+    for i in range(md.num_row_groups):
+        rg = md.row_group(i); stats = rg.column(j).statistics
+        sym = stats.min if stats is not None and stats.has_min_max else pf.read_row_group(i, columns=[pf.schema_arrow.names[j]]).column(0)[0].as_py()
+        counts[sym] = counts.get(sym, 0) + rg.num_rows
+    return counts
+
+
+def read_symbol_table(cache_path: str, symbol: str, memory_limit_bytes: Optional[int] = None) -> pa.Table:
+    """One symbol of a cached day; the symbol filter prunes row groups through their statistics.
+
+    Raises MemoryError if the symbol's decoded rows exceed ``memory_limit_bytes``.
+    """
+    sym_col = cached_schema(cache_path).cmap.symbol
+    t = pq.read_table(cache_path, filters=[(sym_col, "==", symbol)])
+    if memory_limit_bytes is not None and t.nbytes > memory_limit_bytes:
+        raise MemoryError(f"symbol {symbol!r} needs more than {memory_limit_bytes} bytes in the out-of-core reader; "
+                          "raise the memory limit or lower row_group_rows")
+    return t
+
+
+def read_symbol_frame(cache_path: str, symbol: str) -> pd.DataFrame:
+    """One symbol of a cached day as pandas (see read_symbol_table)."""
+    return read_symbol_table(cache_path, symbol).to_pandas()
+
+
+def iter_symbol_frames(cache_path: str, memory_limit_bytes: Optional[int] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Yield (symbol, frame) from a cached day, holding at most one symbol's row groups in memory.
+
+    Raises MemoryError if a single symbol's decoded batches exceed ``memory_limit_bytes``.
+    """
+    pf = pq.ParquetFile(cache_path); sym_col = cached_schema(cache_path).cmap.symbol
+    pending, pending_bytes, current = [], 0, None
+
+    def flush():
+        t = pa.concat_tables(pending) if len(pending) > 1 else pending[0]
+        return current, t.to_pandas()
+
+    for i in range(pf.num_row_groups):
+        rg = pf.read_row_group(i); sym = rg.column(sym_col)[0].as_py()
+        if current is not None and sym != current:
+            yield flush(); pending, pending_bytes = [], 0
+        current = sym; pending.append(rg); pending_bytes += rg.nbytes
+        if memory_limit_bytes is not None and pending_bytes > memory_limit_bytes:
+            raise MemoryError(f"symbol {sym!r} needs more than {memory_limit_bytes} bytes in the out-of-core reader; "
+                              "raise the memory limit or lower row_group_rows")
+    if pending:
+        yield flush()
+
+
+def process_day_cached(cache_path: str, outdir: str, freq: str = "1s", do_halfhour_10s: bool = True,
+                       memory_limit_bytes: Optional[int] = None, writer=None) -> pd.DataFrame:
+    """Out-of-core counterpart of process_day_rda: one symbol in memory at a time, results written immediately."""
+    from .ofi_io import open_writer
+    schema = cached_schema(cache_path); day = parse_trading_day_from_filename(cache_path); day_str = str(day.date())
+    writer, owned = open_writer(writer); rows = []
+    with writer if owned else contextlib.nullcontext(writer):
+        for _, g in iter_symbol_frames(cache_path, memory_limit_bytes):
+            ts1s, row, hh_rows = process_symbol_day(g, schema.cmap, day, freq=freq, do_halfhour_10s=do_halfhour_10s, time_unit=schema.time_unit)
+            writer.submit(ts1s, outdir, day_str, row["symbol"])
+            write_symbol_rows(row, hh_rows, outdir); rows.append(row)
+    return pd.DataFrame(rows)
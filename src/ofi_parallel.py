@@ -0,0 +1,107 @@
+# src/ofi_parallel.py
+from __future__ import annotations
+import os, numpy as np, pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+from .ofi_utils import ColumnMap, SchemaInfo, process_symbol_day, save_timeseries_parquet, write_symbol_rows
+
+_ALIGN = 64
+
+class SharedColumns:
+    """Numeric columns packed into one shared-memory block; ``spec`` is the small picklable handle workers attach with."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, spec: Tuple, owner: bool):
+        self.shm, self.spec, self.owner = shm, spec, owner
+        _, nrows, layout = spec
+        self.arrays: Dict[str, np.ndarray] = {
+            col: np.ndarray((nrows,), dtype=np.dtype(dt), buffer=shm.buf, offset=off) for col, dt, off in layout
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], order: Optional[np.ndarray] = None) -> "SharedColumns":
+        """Copy ``arrays`` into a new block; with ``order``, gather ``a[order]`` straight into it (no temporary copy)."""
+        nrows = len(order) if order is not None else len(next(iter(arrays.values()))) if arrays else 0
+        layout, off = [], 0
+        for col, a in arrays.items():
+            if a.dtype.kind not in "biuf":
+                raise TypeError(f"Column {col!r} has non-numeric dtype {a.dtype}; cannot share")
+            layout.append((col, a.dtype.str, off))
+            off += -(-a.dtype.itemsize * nrows // _ALIGN) * _ALIGN
+        shm = shared_memory.SharedMemory(create=True, size=max(off, 1))
+        out = cls(shm, (shm.name, nrows, tuple(layout)), owner=True)
+        for col, a in arrays.items():
+            if order is None:
+                out.arrays[col][:] = a
+            else:
+                # mode="clip" writes into ``out`` directly; "raise" would buffer the whole result first
+                np.take(a, order, out=out.arrays[col], mode="clip")
+        return out
+
+    @classmethod
+    def attach(cls, spec: Tuple) -> "SharedColumns":
+        return cls(shared_memory.SharedMemory(name=spec[0]), spec, owner=False)
+
+    def close(self):
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def symbol_offsets(symbols: pd.Series) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Stable symbol sort: returns (row order, sorted unique symbols, boundaries with len(symbols)+1 entries).
+
+    Rows with a null symbol are left out of ``order`` (as groupby drops them), so ``bounds`` starts at 0 and
+    ``bounds[-1] == len(order)``."""
+    codes, uniques = pd.factorize(symbols, sort=True)
+    order = np.argsort(codes, kind="stable"); order = order[codes[order] >= 0]
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return order, [str(u) for u in uniques], bounds
+
+
+_WORKER: Dict = {}
+
+def _init_worker(spec: Tuple, cmap: ColumnMap, day: pd.Timestamp, outdir: str, freq: str, do_halfhour_10s: bool, time_unit: str, clean: Dict):
+    _WORKER.update(shared=SharedColumns.attach(spec), cmap=cmap, day=day, outdir=outdir, freq=freq, hh=do_halfhour_10s, unit=time_unit, clean=clean)
+
+def _run_symbol(symbol: str, start: int, end: int):
+    w = _WORKER; cmap = w["cmap"]
+    # Zero-copy views into the shared block; build_tob_series_1s makes the only per-symbol copy
+    g = pd.DataFrame({c: a[start:end] for c, a in w["shared"].arrays.items()}, copy=False)
+    g[cmap.symbol] = symbol
+    ts1s, row, hh_rows = process_symbol_day(g, cmap, w["day"], freq=w["freq"], do_halfhour_10s=w["hh"], time_unit=w["unit"], **w["clean"])
+    save_timeseries_parquet(ts1s, w["outdir"], row["day"], symbol)
+    return row, hh_rows
+
+
+def process_day_parallel(df: pd.DataFrame, schema: SchemaInfo, day: pd.Timestamp, outdir: str, freq: str = "1s",
+                         do_halfhour_10s: bool = True, workers: int = 0, prefiltered: bool = False,
+                         max_abs_bps: Optional[float] = 1000.0, seasonal=None) -> pd.DataFrame:
+    """Fan symbols of one parsed day out to a process pool reading from shared memory.
+
+    The day is copied once into a shared block sorted by symbol; each task only ships (symbol, start, end).
+    Workers write their own timeseries parquet; panel rows are appended here in symbol order so the
+    output matches the serial path exactly.
+    """
+    cmap = schema.cmap; workers = workers or os.cpu_count() or 1
+    order, symbols, bounds = symbol_offsets(df[cmap.symbol])
+    cols = [cmap.time_m, cmap.bid, cmap.ask, cmap.bidsz, cmap.asksz]
+    shared = SharedColumns.from_arrays({c: df[c].to_numpy() for c in cols}, order)
+    results: Dict[str, Tuple] = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared.spec, cmap, day, outdir, freq, do_halfhour_10s, schema.time_unit,
+                                           dict(prefiltered=prefiltered, max_abs_bps=max_abs_bps, seasonal=seasonal))) as ex:
+            # Largest symbols first so one fat name does not finish last
+            tasks = sorted(range(len(symbols)), key=lambda i: bounds[i] - bounds[i + 1])
+            futs = {ex.submit(_run_symbol, symbols[i], int(bounds[i]), int(bounds[i + 1])): symbols[i] for i in tasks}
+            for fut, sym in futs.items():
+                results[sym] = fut.result()
+    finally:
+        shared.close()
+    rows = []
+    for sym in symbols:
+        row, hh_rows = results[sym]
+        write_symbol_rows(row, hh_rows, outdir); rows.append(row)
+    return pd.DataFrame(rows)
@@ -1,23 +1,349 @@
 # src/ofi_pipeline.py
 from __future__ import annotations
-import os, glob, pandas as pd
-from .ofi_utils import process_day_rda, make_scatter, beta_histogram, intraday_beta_vs_depth
-
-def run_one_day(rda_path: str, outdir: str, freq: str = "1s", baseline10s: bool = True, make_daily_scatter: bool = True) -> pd.DataFrame:
-    res = process_day_rda(rda_path, outdir=outdir, freq=freq, do_halfhour_10s=baseline10s)
-    if make_daily_scatter and len(res):
-        day = res["day"].iloc[0]
-        day_dir = os.path.join(outdir, "timeseries", day)
-        if os.path.exists(day_dir):
-            for pq in glob.glob(os.path.join(day_dir, "*.parquet")):
-                symbol = os.path.splitext(os.path.basename(pq))[0]
-                ts = pd.read_parquet(pq)
-                make_scatter(ts, symbol=symbol, day=day, figdir="figures")
+import os, glob, threading, pandas as pd
+from dataclasses import dataclass, field
+from .ofi_compact import load_timeseries
+from .ofi_utils import atomic_path, parse_trading_day_from_filename, process_day_rda, make_scatter, beta_histogram, intraday_beta_vs_depth
+
+def run_one_day(rda_path: str, outdir: str, freq: str = "1s", baseline10s: bool = True, make_daily_scatter: bool = True, workers: int = 1, writer=None,
+                cache_dir: str | None = None, memory_limit_mb: float | None = None, quality=None, engine: str = "pandas",
+                export_ipc: bool = False, cross_panel: bool = False, compact: bool = False, stream: bool = False,
+                seasonality: bool = False, figdir: str = "figures") -> pd.DataFrame:
+    if stream and (workers > 1 or quality is not None or engine != "pandas" or cache_dir is not None):
+        raise ValueError("stream runs the serial pandas path; it does not combine with workers, quality, engine or cache_dir")
+    if quality is not None and (engine != "pandas" or cache_dir is not None):
+        raise ValueError("the quality stage runs on the in-memory pandas path; it does not combine with engine or cache_dir")
+    if engine == "arrow" and workers > 1:
+        raise ValueError("the arrow engine runs symbols serially; it does not combine with workers")
+    seasonal = None
+    if seasonality:
+        if engine != "pandas" or cache_dir is not None:
+            raise ValueError("seasonality runs on the in-memory and stream paths; it does not combine with engine or cache_dir")
+        # Regress on series deseasonalized by the profile of the days before this one, then add this day to it
+        from .ofi_seasonality import profile_before
+        seasonal = profile_before(outdir, str(parse_trading_day_from_filename(rda_path).date()))
+    if engine == "arrow":
+        from .ofi_arrow import process_day_arrow
+        from .ofi_outofcore import cache_file, cache_is_current
+        cached = None if cache_dir is None else cache_file(rda_path, cache_dir)
+        src = cached if cached is not None and cache_is_current(cached, rda_path) else rda_path
+        res = process_day_arrow(src, outdir=outdir, freq=freq, do_halfhour_10s=baseline10s, writer=writer)
+    elif cache_dir is not None:
+        # Out-of-core: stream the symbol-sorted columnar cache (built on first use or when the .rda changed) one symbol at a time
+        from .ofi_outofcore import cached_day, process_day_cached
+        cached = cached_day(rda_path, cache_dir)
+        limit = None if memory_limit_mb is None else int(memory_limit_mb * 2**20)
+        res = process_day_cached(cached, outdir=outdir, freq=freq, do_halfhour_10s=baseline10s, memory_limit_bytes=limit, writer=writer)
+    elif stream:
+        # Chunked ingest: the day is spilled to disk as it is decompressed, symbols start before the file is read
+        from .ofi_stream import process_day_stream
+        res = process_day_stream(rda_path, outdir=outdir, freq=freq, do_halfhour_10s=baseline10s, writer=writer, seasonal=seasonal)
+    else:
+        res = process_day_rda(rda_path, outdir=outdir, freq=freq, do_halfhour_10s=baseline10s, workers=workers, writer=writer, quality=quality,
+                              seasonal=seasonal)
+    if (make_daily_scatter or export_ipc or cross_panel or compact or seasonality) and len(res) and writer is not None:
+        writer.flush()
+    if len(res):
+        finish_day(outdir, res["day"].iloc[0], make_daily_scatter, export_ipc, cross_panel, compact, seasonality, figdir)
     return res
 
+def finish_day(outdir: str, day: str, make_daily_scatter: bool = True, export_ipc: bool = False, cross_panel: bool = False, compact: bool = False,
+               seasonality: bool = False, figdir: str = "figures"):
+    """Per-day outputs derived from the written timeseries (all of the day's files must be on disk)."""
+    if compact:
+        from .ofi_compact import compact_results
+        compact_results(outdir, days=[day])
+    if export_ipc:
+        from .ofi_mmap import export_results_ipc
+        export_results_ipc(outdir, days=[day])
+    if cross_panel:
+        from .ofi_cross import write_day_panel
+        write_day_panel(outdir, day)
+    if seasonality:
+        from .ofi_seasonality import update_profiles
+        update_profiles(outdir, [day])
+    if make_daily_scatter:
+        day_scatters(outdir, day, figdir)
+
+def day_scatters(outdir: str, day: str, figdir: str = "figures"):
+    day_dir = os.path.join(outdir, "timeseries", day)
+    if os.path.exists(day_dir):
+        for pq in glob.glob(os.path.join(day_dir, "*.parquet")):
+            symbol = os.path.splitext(os.path.basename(pq))[0]
+            ts = load_timeseries(pq)
+            make_scatter(ts, symbol=symbol, day=day, figdir=figdir)
+
 def build_all_figures(outdir: str, figdir: str = "figures"):
     panel = os.path.join(outdir, "regressions", "by_symbol_day.parquet")
     beta_histogram(panel, figdir=figdir)
     hh_panel = os.path.join(outdir, "regressions", "by_symbol_day_halfhour.parquet")
     timeseries_root = os.path.join(outdir, "timeseries")
     intraday_beta_vs_depth(hh_panel, timeseries_root, figdir=figdir)
+
+def acceptance_summary(panel: pd.DataFrame, days: int) -> dict:
+    valid = panel["beta"].notna()
+    pos_share = ((panel.loc[valid, "beta"]) > 0).mean() if valid.any() else float("nan")
+    avg_r2 = panel.loc[panel["r2"].notna(), "r2"].mean() if panel["r2"].notna().any() else float("nan")
+    sub = panel[["beta", "mean_depth"]].dropna()
+    inv_depth_corr = sub.corr().loc["beta", "mean_depth"] if len(sub) else float("nan")
+    return {
+        "days": days,
+        "rows": int(len(panel)),
+        "share_beta_positive": None if pd.isna(pos_share) else float(pos_share),
+        "mean_r2": None if pd.isna(avg_r2) else float(avg_r2),
+        "corr_beta_mean_depth": None if pd.isna(inv_depth_corr) else float(inv_depth_corr),
+    }
+
+def _run_tasks_batch(rdas, outdir, freq, baseline10s, workers, cache_dir, export_ipc, cross_panel, compact, executor, retries, journal,
+                     figdir, engine="pandas", memory_limit_mb=None) -> list:
+    from .ofi_exec import process_days_distributed
+    from .ofi_outofcore import cached_day
+    cache_dir = cache_dir or os.path.join(outdir, "cache")
+    caches = [cached_day(rp, cache_dir) for rp in rdas]
+    res = process_days_distributed(caches, outdir, freq=freq, do_halfhour_10s=baseline10s, executor=executor, workers=workers, retries=retries,
+                                   journal=journal, engine=engine,
+                                   memory_limit_bytes=None if memory_limit_mb is None else int(memory_limit_mb * 2**20))
+    if not len(res):
+        return []
+    for day in res["day"].unique():
+        finish_day(outdir, day, True, export_ipc, cross_panel, compact, figdir=figdir)
+    return [res]
+
+# Async day-by-day orchestration: ingest (read + decompress) of the next days, per-symbol compute, timeseries writes
+# and per-day finishing (panel rows, journal, compact/IPC/panels/scatters) run as separate asyncio stages joined by
+# bounded queues, so reading day N+1 and writing day N-1 overlap the compute of day N. Blocking work runs off the
+# event loop: ingest, writes and finishing on the default thread pool, compute on its own single-thread executor (it
+# pushes each symbol's result into the write queue as soon as it is done; a full queue blocks it, which is the
+# backpressure). That thread only drives the day: with ``workers`` > 1 the symbols are computed by a process pool
+# (at most 2 x workers in flight, results taken in symbol order), otherwise in the thread itself. A sampler records
+# every queue's depth for tuning the capacities.
+
+ORCHESTRATORS = ("serial", "async")
+
+@dataclass
+class StageStats:
+    items: int = 0; busy_s: float = 0.0; wait_s: float = 0.0     # wait_s: blocked on an empty input or a full output
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, items: int = 0, busy_s: float = 0.0, wait_s: float = 0.0):
+        with self.lock:
+            self.items += items; self.busy_s += busy_s; self.wait_s += wait_s
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            return dict(items=self.items, busy_s=self.busy_s, wait_s=self.wait_s)
+
+@dataclass
+class QueueStats:
+    capacity: int; max_depth: int = 0; depth_sum: int = 0; samples: int = 0
+
+    def as_dict(self) -> dict:
+        return dict(capacity=self.capacity, max_depth=self.max_depth, mean_depth=self.depth_sum / self.samples if self.samples else 0.0)
+
+
+def _ordered_map(pool, fn, items, window: int):
+    """``fn`` over ``items`` on ``pool`` with at most ``window`` tasks in flight; results in input order."""
+    import collections
+    pending: collections.deque = collections.deque()
+    for it in items:
+        pending.append(pool.submit(fn, it))
+        if len(pending) >= window: yield pending.popleft().result()
+    while pending: yield pending.popleft().result()
+
+
+async def _run_days_async(rdas, outdir, freq, baseline10s, quality, export_ipc, cross_panel, compact, journal, all_rows,
+                          prefetch: int, write_queue: int, writer_threads: int, sample_s: float, workers: int = 1,
+                          figdir: str = "figures") -> dict:
+    import asyncio, functools, time
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    from .ofi_utils import (append_panel_row, iter_symbol_frames, pipeline_columns, process_symbol_day, quality_stage, read_rda,
+                            resolve_schema, save_timeseries_parquet, write_symbol_rows)
+    loop = asyncio.get_running_loop()
+    q_in: asyncio.Queue = asyncio.Queue(maxsize=prefetch)           # loaded days
+    q_out: asyncio.Queue = asyncio.Queue(maxsize=write_queue)       # per-symbol results, then an end-of-day marker
+    q_done: asyncio.Queue = asyncio.Queue(maxsize=2)                # days whose timeseries are all on disk
+    queues = dict(ingest=q_in, write=q_out, finish=q_done)
+    qstats = {k: QueueStats(q.maxsize) for k, q in queues.items()}
+    stages = {k: StageStats() for k in ("ingest", "compute", "write", "finish")}
+    done = asyncio.Event()
+
+    async def put(q, item, st):
+        t = time.perf_counter(); await q.put(item); st.add(wait_s=time.perf_counter() - t)
+
+    async def get(q, st):
+        t = time.perf_counter(); item = await q.get(); st.add(wait_s=time.perf_counter() - t)
+        return item
+
+    def load(rp):
+        df = read_rda(rp, pipeline_columns); schema = resolve_schema(df)
+        day = parse_trading_day_from_filename(rp); mask, clean, qrows = quality_stage(df, schema, str(day.date()), quality)
+        return df, schema, day, mask, clean, qrows
+
+    async def ingest():
+        st = stages["ingest"]
+        for rp in rdas:
+            day = str(parse_trading_day_from_filename(rp).date())
+            if day in journal.days:
+                all_rows.append(pd.DataFrame(journal.days[day])); continue
+            t = time.perf_counter(); item = await asyncio.to_thread(load, rp); st.add(1, busy_s=time.perf_counter() - t)
+            await put(q_in, item, st)
+        await put(q_in, None, st)
+
+    def compute_day(procs, df, schema, day, mask, clean):
+        day_str = str(day.date()); st = stages["compute"]; t = time.perf_counter(); waited = 0.0
+        one = functools.partial(process_symbol_day, cmap=schema.cmap, day=day, freq=freq, do_halfhour_10s=baseline10s,
+                                time_unit=schema.time_unit, **clean)
+        frames = iter_symbol_frames(df, schema, mask)
+        results = map(one, frames) if procs is None else _ordered_map(procs, one, frames, 2 * workers)
+        for ts1s, row, hh_rows in results:
+            w = time.perf_counter()
+            asyncio.run_coroutine_threadsafe(q_out.put(("symbol", day_str, ts1s, row, hh_rows)), loop).result()
+            w = time.perf_counter() - w; waited += w; st.add(1, wait_s=w)
+        st.add(busy_s=time.perf_counter() - t - waited)
+
+    async def compute(pool, procs):
+        st = stages["compute"]
+        while (item := await get(q_in, st)) is not None:
+            df, schema, day, mask, clean, qrows = item
+            await loop.run_in_executor(pool, compute_day, procs, df, schema, day, mask, clean)
+            del df, item
+            await put(q_out, ("end", str(day.date()), qrows), st)
+        await put(q_out, None, st)
+
+    async def write():
+        st = stages["write"]; slots = asyncio.Semaphore(max(1, writer_threads)); pending: list = []; results: list = []
+
+        async def save(ts1s, day, symbol):
+            try:
+                t = time.perf_counter(); await asyncio.to_thread(save_timeseries_parquet, ts1s, outdir, day, symbol)
+                st.add(1, busy_s=time.perf_counter() - t)
+            finally:
+                slots.release()
+
+        while (item := await get(q_out, st)) is not None:
+            if item[0] == "symbol":
+                _, day, ts1s, row, hh_rows = item
+                await slots.acquire(); pending.append(asyncio.create_task(save(ts1s, day, row["symbol"]))); results.append((row, hh_rows))
+            else:
+                await asyncio.gather(*pending)
+                await put(q_done, (item[1], item[2], results), st); pending, results = [], []
+        await put(q_done, None, st)
+
+    def finish_one(day, qrows, results):
+        for qrow in qrows: append_panel_row(qrow, outdir, "quality_by_symbol_day.parquet")
+        for row, hh_rows in results: write_symbol_rows(row, hh_rows, outdir)
+        rows = [row for row, _ in results]
+        if rows: finish_day(outdir, day, True, export_ipc, cross_panel, compact, figdir=figdir)
+        journal.mark_day(day, rows)
+        return rows
+
+    async def finish():
+        st = stages["finish"]
+        while (item := await get(q_done, st)) is not None:
+            t = time.perf_counter(); rows = await asyncio.to_thread(finish_one, *item); st.add(1, busy_s=time.perf_counter() - t)
+            if rows: all_rows.append(pd.DataFrame(rows))
+
+    async def sample():
+        while not done.is_set():
+            for k, q in queues.items():
+                d = q.qsize(); qs = qstats[k]; qs.max_depth = max(qs.max_depth, d); qs.depth_sum += d; qs.samples += 1
+            try: await asyncio.wait_for(done.wait(), sample_s)
+            except asyncio.TimeoutError: pass
+
+    t0 = time.perf_counter(); pool = ThreadPoolExecutor(1, thread_name_prefix="ofi-compute")
+    procs = ProcessPoolExecutor(workers) if workers > 1 else None
+    sampler = asyncio.create_task(sample())
+    tasks = [asyncio.create_task(c) for c in (ingest(), compute(pool, procs), write(), finish())]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # on failure the compute thread may be blocked on a put into the write queue; asyncio.run cancels that put
+        # when the loop closes, so the pool must not be joined from inside the loop
+        for t in tasks: t.cancel()
+        done.set(); await sampler; pool.shutdown(wait=False, cancel_futures=True)
+        if procs is not None: procs.shutdown(wait=False, cancel_futures=True)
+    return dict(wall_s=time.perf_counter() - t0, queues={k: q.as_dict() for k, q in qstats.items()},
+                stages={k: v.as_dict() for k, v in stages.items()})
+
+
+def run_batch(raw_dir: str, outdir: str, freq: str = "1s", baseline10s: bool = True, workers: int = 1, writer_threads: int | None = None,
+              cache_dir: str | None = None, memory_limit_mb: float | None = None, figdir: str = "figures", quality=None,
+              engine: str = "pandas", export_ipc: bool = False, executor: str | None = None, retries: int = 2,
+              resume: bool = False, cross_panel: bool = False, compact: bool = False, stream: bool = False,
+              orchestrator: str = "serial", prefetch: int = 2, write_queue: int = 64, seasonality: bool = False) -> dict | None:
+    """Process every .rda in ``raw_dir``, build figures and write regressions/acceptance_summary.json.
+
+    With ``executor`` (serial, process, dask[://addr], ray[://addr]) days are cached as symbol-sorted parquet
+    and scheduled as (day, symbol) tasks across the backend instead of day by day; each task runs ``engine`` under
+    ``memory_limit_mb`` and writes its own timeseries (so ``writer_threads`` does not apply).
+    Finished work is logged to ``<outdir>/journal.jsonl``; ``resume=True`` skips what it records (executor runs
+    log (day, symbol) tasks and day-by-day runs whole days, so a run resumes only a journal of its own mode).
+    ``cross_panel`` also saves each day's aligned (time x symbol) matrices to ``<outdir>/panels/<day>.npz``.
+    ``compact`` rewrites each finished day's timeseries in the compact int-tick layout (ofi_compact).
+    ``stream`` reads each day in chunks (ofi_stream) instead of loading it whole (day-by-day runs only).
+    ``orchestrator="async"`` overlaps ingest, compute and writes across days through bounded queues of
+    ``prefetch`` days and ``write_queue`` symbol results, computing symbols on ``workers`` processes when
+    ``workers`` > 1; stage and queue-depth statistics go to
+    ``summary["pipeline"]`` and ``regressions/pipeline_stats.json``.
+    ``seasonality`` regresses each day on OFI and returns deseasonalized by the intraday profile of the days before it
+    and then adds the day to ``<outdir>/seasonality/profiles.npz`` (ofi_seasonality; day-by-day serial runs only).
+    """
+    import json
+    from .ofi_io import AsyncParquetWriter, RunJournal
+    rdas = sorted(glob.glob(os.path.join(raw_dir, "*.rda")))
+    all_rows = []
+    if orchestrator not in ORCHESTRATORS:
+        raise ValueError(f"orchestrator must be one of {ORCHESTRATORS}, not {orchestrator!r}")
+    if quality is not None and executor is not None:
+        raise ValueError("the quality stage runs on the in-memory pandas path; it does not combine with executor")
+    if writer_threads is not None and executor is not None:
+        raise ValueError("executor tasks write their own timeseries; writer_threads does not combine with executor")
+    writer_threads = 2 if writer_threads is None else writer_threads
+    if seasonality and (orchestrator == "async" or executor is not None):
+        raise ValueError("seasonality needs each day's profile update before the next day starts; run it with the serial orchestrator")
+    with RunJournal(os.path.join(outdir, "journal.jsonl"), resume=resume) as journal:
+        # executor runs journal (day, symbol) units, day-by-day runs whole days: neither can tell what the other did
+        if journal.units if executor is None else journal.days:
+            raise ValueError(f"{outdir}/journal.jsonl was written by a {'executor' if executor is None else 'day-by-day'} run; "
+                             "resume in the same mode or start without resume")
+        if orchestrator == "async":
+            import asyncio
+            if executor is not None or stream or engine != "pandas" or cache_dir is not None:
+                raise ValueError("the async orchestrator runs the in-memory pandas path; it does not combine with executor, stream, "
+                                 "engine or cache_dir")
+            pipeline_stats = asyncio.run(_run_days_async(rdas, outdir, freq, baseline10s, quality, export_ipc, cross_panel, compact,
+                                                         journal, all_rows, prefetch, write_queue, writer_threads, 0.02, workers, figdir))
+            os.makedirs(os.path.join(outdir, "regressions"), exist_ok=True)
+            with atomic_path(os.path.join(outdir, "regressions", "pipeline_stats.json")) as tmp, open(tmp, "w") as f:
+                json.dump(pipeline_stats, f, indent=2)
+        elif executor is not None:
+            all_rows = _run_tasks_batch(rdas, outdir, freq, baseline10s, workers, cache_dir, export_ipc, cross_panel, compact, executor, retries,
+                                        journal, figdir, engine, memory_limit_mb)
+        else:
+            with AsyncParquetWriter(threads=writer_threads) as writer:
+                for rp in rdas:
+                    day = str(parse_trading_day_from_filename(rp).date())
+                    if day in journal.days:
+                        all_rows.append(pd.DataFrame(journal.days[day]))
+                        continue
+                    day_rows = run_one_day(rp, outdir=outdir, freq=freq, baseline10s=baseline10s, make_daily_scatter=True, workers=workers,
+                                           writer=writer, cache_dir=cache_dir, memory_limit_mb=memory_limit_mb, quality=quality, engine=engine,
+                                           export_ipc=export_ipc, cross_panel=cross_panel, compact=compact, stream=stream,
+                                           seasonality=seasonality, figdir=figdir)
+                    writer.flush()
+                    journal.mark_day(day, day_rows.to_dict("records"))
+                    if len(day_rows):
+                        all_rows.append(day_rows)
+
+    build_all_figures(outdir, figdir=figdir)
+    if not all_rows:
+        return None
+    summary = acceptance_summary(pd.concat(all_rows, ignore_index=True), days=len(rdas))
+    if executor is not None:
+        summary["schedule"] = all_rows[0].attrs.get("schedule")
+    if orchestrator == "async":
+        summary["pipeline"] = pipeline_stats
+    os.makedirs(os.path.join(outdir, "regressions"), exist_ok=True)
+    with atomic_path(os.path.join(outdir, "regressions", "acceptance_summary.json")) as tmp, open(tmp, "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
@@ -0,0 +1,202 @@
+# src/ofi_profile.py
+from __future__ import annotations
+import atexit, collections, contextlib, cProfile, json, os, socket, sys, threading, time, tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Counter, Dict, List, Optional, Tuple
+
+# Profiling hooks around every (day, symbol) task (process_symbol_day / process_symbol_arrow).
+#   cprofile : deterministic per-function timings (cProfile), plus the sampler below for stacks
+#   sampling : only a sampler thread that reads the task thread's stack every ``interval`` s (low overhead)
+# With ``memory`` tracemalloc is on during tasks: the sampler charges each increase of traced memory to the stack it
+# sees, and each task records its peak. Every process writes its own part under ``<dir>/parts/`` (throttled, and at
+# exit, including multiprocessing workers); the configuration travels to worker processes in OFI_PROFILE.
+# merge_profiles combines the parts into merged.pstats, stacks.collapsed / alloc.collapsed (collapsed-stack format,
+# one "frame;frame;frame count" line per stack, for flamegraph.pl or speedscope) and report.txt.
+
+ENV = "OFI_PROFILE"
+MODES = ("cprofile", "sampling")
+DUMP_EVERY_S = 2.0
+
+
+@dataclass(frozen=True)
+class ProfileConfig:
+    mode: str; outdir: str; memory: bool = False; interval: float = 0.005
+
+    def __post_init__(self):
+        if self.mode not in MODES: raise ValueError(f"profile mode must be one of {MODES}, not {self.mode!r}")
+
+
+_CFG: Optional[ProfileConfig] = None
+_STATE: Optional["_ProcessProfile"] = None
+
+
+def configure(cfg: Optional[ProfileConfig]):
+    """Turn profiling on (or off with None) for this process and the worker processes it starts."""
+    global _CFG, _STATE
+    if _STATE is not None: _STATE.dump()
+    _CFG, _STATE = cfg, None
+    if cfg is None: os.environ.pop(ENV, None)
+    else: os.environ[ENV] = json.dumps(asdict(cfg))
+
+
+def active() -> Optional[ProfileConfig]:
+    global _CFG
+    if _CFG is None and os.environ.get(ENV):
+        _CFG = ProfileConfig(**json.loads(os.environ[ENV]))
+    return _CFG
+
+
+def _frame_label(code, lineno: int) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})"
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, ident: int, root, interval: float, memory: bool, time_stacks: Counter, alloc_stacks: Counter):
+        super().__init__(name="ofi-profile-sampler", daemon=True)
+        self.ident_, self.root, self.interval, self.memory = ident, root, interval, memory
+        self.time_stacks, self.alloc_stacks = time_stacks, alloc_stacks
+        self.stop = threading.Event(); self.last = tracemalloc.get_traced_memory()[0] if memory else 0
+
+    def _stack(self) -> Optional[Tuple[str, ...]]:
+        f = sys._current_frames().get(self.ident_); out = []
+        while f is not None:                                   # stacks start at the task function
+            out.append(_frame_label(f.f_code, f.f_lineno)); f = None if f is self.root else f.f_back
+        return tuple(reversed(out)) or None
+
+    def sample(self):
+        stack = self._stack()
+        if stack is None or self.stop.is_set(): return         # task finished while walking: profiler overhead
+        self.time_stacks[stack] += 1
+        if self.memory:
+            cur = tracemalloc.get_traced_memory()[0]
+            if cur > self.last: self.alloc_stacks[stack] += cur - self.last
+            self.last = cur
+
+    def run(self):
+        while not self.stop.wait(self.interval): self.sample()
+
+
+class _ProcessProfile:
+    def __init__(self, cfg: ProfileConfig):
+        self.cfg = cfg; self.prof = cProfile.Profile() if cfg.mode == "cprofile" else None
+        self.time_stacks: Counter = collections.Counter(); self.alloc_stacks: Counter = collections.Counter()
+        self.tasks: List[Dict] = []; self.dirty = False; self.last_dump = time.monotonic(); self.pid = os.getpid()
+        self.part = os.path.join(cfg.outdir, "parts", f"{socket.gethostname()}-{os.getpid()}")
+        os.makedirs(os.path.dirname(self.part), exist_ok=True)
+        atexit.register(self.dump)
+        with contextlib.suppress(Exception):
+            import multiprocessing.util
+            multiprocessing.util.Finalize(self, self.dump, exitpriority=10)   # pool workers skip atexit
+
+    @contextlib.contextmanager
+    def task(self, day: str, symbol: str, root=None):
+        cfg = self.cfg; own_tm = cfg.memory and not tracemalloc.is_tracing()
+        if own_tm: tracemalloc.start()
+        if cfg.memory: tracemalloc.reset_peak(); base = tracemalloc.get_traced_memory()[0]
+        sampler = _Sampler(threading.get_ident(), root, cfg.interval, cfg.memory, self.time_stacks, self.alloc_stacks)
+        sampler.start(); t0 = time.perf_counter()
+        if self.prof is not None: self.prof.enable()
+        try:
+            yield
+        finally:
+            if self.prof is not None: self.prof.disable()
+            seconds = time.perf_counter() - t0; sampler.stop.set(); sampler.join()
+            rec = dict(day=day, symbol=symbol, seconds=seconds)
+            if cfg.memory:
+                rec["peak_bytes"] = tracemalloc.get_traced_memory()[1] - base
+                if own_tm: tracemalloc.stop()
+            self.tasks.append(rec); self.dirty = True
+            if time.monotonic() - self.last_dump > DUMP_EVERY_S: self.dump()
+
+    def dump(self):
+        if not self.dirty: return
+        if self.prof is not None:
+            with _atomic(self.part + ".pstats") as tmp: self.prof.dump_stats(tmp)
+        for name, stacks in (("stacks", self.time_stacks), ("alloc", self.alloc_stacks)):
+            with _atomic(f"{self.part}.{name}.collapsed") as tmp, open(tmp, "w") as f:
+                for stack, n in stacks.items(): f.write(f"{';'.join(stack)} {n}\n")
+        with _atomic(self.part + ".tasks.json") as tmp, open(tmp, "w") as f: json.dump(self.tasks, f)
+        self.dirty = False; self.last_dump = time.monotonic()
+
+
+@contextlib.contextmanager
+def _atomic(path: str):
+    from .ofi_utils import atomic_path      # ofi_utils imports this module
+    with atomic_path(path) as tmp:
+        yield tmp
+
+
+def task(day: str, symbol: str):
+    """Context manager around one (day, symbol) task; a no-op unless profiling is configured."""
+    global _STATE
+    cfg = active()
+    if cfg is None: return contextlib.nullcontext()
+    if _STATE is None or _STATE.cfg != cfg or _STATE.pid != os.getpid(): _STATE = _ProcessProfile(cfg)   # forked workers start fresh
+    return _STATE.task(day, symbol, sys._getframe(1))
+
+
+def _read_collapsed(paths: List[str]) -> Counter:
+    out: Counter = collections.Counter()
+    for p in paths:
+        with open(p) as f:
+            for line in f:
+                stack, _, n = line.rstrip("\n").rpartition(" ")
+                if stack: out[stack] += int(n)
+    return out
+
+
+def _inclusive(stacks: Counter) -> Counter:
+    """Per function (file:line dropped): samples or bytes of every stack it appears in, counted once per stack."""
+    out: Counter = collections.Counter()
+    for stack, n in stacks.items():
+        for fn in {fr.rsplit(":", 1)[0] + ")" for fr in stack.split(";")}: out[fn] += n
+    return out
+
+
+def merge_profiles(outdir: str, top: int = 25) -> Dict:
+    """Combine every process part under ``outdir`` into merged files and a text report; returns the report data."""
+    import glob, pstats
+    if _STATE is not None and _STATE.pid == os.getpid(): _STATE.dump()
+    parts = os.path.join(outdir, "parts")
+    tasks = [t for p in sorted(glob.glob(os.path.join(parts, "*.tasks.json"))) for t in json.load(open(p))]
+    stacks = _read_collapsed(sorted(glob.glob(os.path.join(parts, "*.stacks.collapsed"))))
+    alloc = _read_collapsed(sorted(glob.glob(os.path.join(parts, "*.alloc.collapsed"))))
+    for name, c in (("stacks", stacks), ("alloc", alloc)):
+        with _atomic(os.path.join(outdir, f"{name}.collapsed")) as tmp, open(tmp, "w") as f:
+            for stack, n in c.most_common(): f.write(f"{stack} {n}\n")
+    rep: Dict = dict(tasks=len(tasks), processes=len(glob.glob(os.path.join(parts, "*.tasks.json"))),
+                     task_seconds=sum(t["seconds"] for t in tasks), samples=sum(stacks.values()))
+    pfiles = sorted(glob.glob(os.path.join(parts, "*.pstats")))
+    if pfiles:
+        st = pstats.Stats(*pfiles); st.dump_stats(os.path.join(outdir, "merged.pstats"))
+        rows = sorted(((v[3], v[2], v[1], f"{fn} ({os.path.basename(path)}:{line})") for (path, line, fn), v in st.stats.items()), reverse=True)
+        rep["cumulative"] = [dict(function=f, cum_s=c, self_s=s, calls=n) for c, s, n, f in rows[:top]]
+    else:
+        total = max(1, rep["samples"])                         # samples scaled to the measured task time
+        rep["cumulative"] = [dict(function=f, cum_s=n / total * rep["task_seconds"], share=n / total) for f, n in _inclusive(stacks).most_common(top)]
+    leaves: Counter = collections.Counter()
+    for stack, n in stacks.items(): leaves[stack.rsplit(";", 1)[-1]] += n
+    rep["hot_lines"] = [dict(line=l, samples=n) for l, n in leaves.most_common(top)]
+    if alloc:
+        rep["allocation"] = [dict(function=f, bytes=n) for f, n in _inclusive(alloc).most_common(top)]
+    if any("peak_bytes" in t for t in tasks):
+        rep["peak_tasks"] = sorted(tasks, key=lambda t: -t.get("peak_bytes", 0))[:10]
+    rep["slowest_tasks"] = sorted(tasks, key=lambda t: -t["seconds"])[:10]
+    with _atomic(os.path.join(outdir, "report.txt")) as tmp, open(tmp, "w") as f: f.write(format_report(rep))
+    return rep
+
+
+def format_report(rep: Dict, top: Optional[int] = None) -> str:
+    """Text form of merge_profiles' report; ``top`` shortens every ranking."""
+    rep = {k: v[:top] if isinstance(v, list) and top else v for k, v in rep.items()}
+    out = [f"{rep['tasks']} tasks in {rep['processes']} processes, {rep['task_seconds']:.2f}s of task time, {rep['samples']} stack samples", "",
+           "Top functions by cumulative time"]
+    out += [f"  {r['cum_s']:9.3f}s  {r.get('self_s', float('nan')):9.3f}s self  {r['function']}" for r in rep["cumulative"]]
+    out += ["", "Hot lines (sampled, self)"] + [f"  {r['samples']:7d}  {r['line']}" for r in rep["hot_lines"]]
+    if "allocation" in rep:
+        out += ["", "Top functions by allocation (sampled growth of traced memory, inclusive)"]
+        out += [f"  {r['bytes'] / 2**20:9.1f} MB  {r['function']}" for r in rep["allocation"]]
+    if "peak_tasks" in rep:
+        out += ["", "Largest task peaks"] + [f"  {t['peak_bytes'] / 2**20:9.1f} MB  {t['day']} {t['symbol']}" for t in rep["peak_tasks"]]
+    out += ["", "Slowest tasks"] + [f"  {t['seconds']:9.3f}s  {t['day']} {t['symbol']}" for t in rep["slowest_tasks"]]
+    return "\n".join(out) + "\n"
@@ -0,0 +1,80 @@
+# src/ofi_quality.py
+from __future__ import annotations
+import numpy as np, pandas as pd
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from .ofi_utils import ColumnMap, detect_time_unit, _UNIT_NS
+
+RULES = ("crossed", "locked", "zero_size", "stale", "spread_outlier", "session")
+
+@dataclass(frozen=True)
+class QualityConfig:
+    """Quote-level cleaning rules applied once to the raw day. Defaults reproduce the historical filter (ask >= bid)."""
+    drop_crossed: bool = True                       # ask < bid
+    drop_locked: bool = False                       # ask == bid
+    drop_zero_size: bool = False                    # bid or ask size <= 0
+    stale_secs: Optional[float] = None              # quote left in force more than this before the symbol's next quote
+    spread_outlier_mult: Optional[float] = None     # spread > mult * trailing rolling median spread (per symbol, in time order)
+    spread_window: int = 100                        # quotes in the rolling median window
+    session: Optional[Tuple[str, str]] = None       # keep time_m within [open, close] wall-clock, e.g. ("09:30", "16:00")
+    max_abs_bps: Optional[float] = 1000.0           # post-grid d_mid_bps jump filter (compute_ofi_depth_mid)
+
+@dataclass
+class QualityReport:
+    mask: np.ndarray                                 # True = keep; aligned with the raw frame's rows
+    counts: Dict[str, int]
+    by_symbol: pd.DataFrame = field(repr=False)      # symbol, n_raw, n_kept, one rejected_<rule> column per rule
+
+def _clock_secs(hhmm: str) -> int:
+    h, m = hhmm.split(":"); return int(h) * 3600 + int(m) * 60
+
+def quality_mask(df: pd.DataFrame, cmap: ColumnMap, cfg: Optional[QualityConfig] = None, time_unit: Optional[str] = None) -> QualityReport:
+    """Vectorized cleaning over the whole raw day.
+
+    Works on NumPy views of the needed columns only (the frame itself is never copied); per-symbol
+    rules run on the rows sorted by (symbol, time_m). A row rejected by several rules is counted
+    under each of them; rows with a null symbol are never kept and are counted as ``no_symbol``.
+    """
+    cfg = cfg or QualityConfig()
+    bid = df[cmap.bid].to_numpy(); ask = df[cmap.ask].to_numpy()
+    codes, uniques = pd.factorize(df[cmap.symbol], sort=True)
+    rejected: Dict[str, np.ndarray] = {}
+    if cfg.drop_crossed: rejected["crossed"] = ask < bid
+    if cfg.drop_locked: rejected["locked"] = ask == bid
+    if cfg.drop_zero_size: rejected["zero_size"] = (df[cmap.bidsz].to_numpy() <= 0) | (df[cmap.asksz].to_numpy() <= 0)
+    secs = None
+    if cfg.stale_secs is not None or cfg.session is not None or cfg.spread_outlier_mult is not None:
+        t = df[cmap.time_m].to_numpy()
+        secs = t / (_UNIT_NS[time_unit or detect_time_unit(int(np.nanmax(t)))] / 1e9)
+    if cfg.session is not None:
+        lo, hi = (_clock_secs(x) for x in cfg.session)
+        rejected["session"] = (secs < lo) | (secs > hi)
+    if cfg.stale_secs is not None or cfg.spread_outlier_mult is not None:
+        # The per-symbol rules look at neighbouring quotes in time, so they run on rows stably sorted by
+        # (symbol, time_m) and are scattered back to file order; the raw file need not be sorted
+        order = np.lexsort((secs, codes)); c = codes[order]
+        first = np.r_[True, c[1:] != c[:-1]]          # first quote of each symbol in the sorted rows
+        if cfg.stale_secs is not None:
+            s = secs[order]; nxt = np.r_[s[1:], np.nan]
+            nxt[np.r_[first[1:], True]] = np.nan     # the last quote of a symbol has no successor
+            rejected["stale"] = _scatter(nxt - s > cfg.stale_secs, order)
+        if cfg.spread_outlier_mult is not None:
+            spread = (ask - bid)[order]
+            med = pd.Series(spread).groupby(c).rolling(cfg.spread_window, min_periods=1).median().to_numpy()
+            # Compare each quote with the median of the quotes before it, so the outlier cannot mask itself
+            med = np.r_[np.nan, med[:-1]]; med[first] = np.nan
+            rejected["spread_outlier"] = _scatter(spread > cfg.spread_outlier_mult * np.where(med > 0, med, np.inf), order)
+    # Quotes without a symbol cannot be attributed to a series: never kept, and left out of by_symbol
+    mask = codes >= 0
+    for r in rejected.values(): mask &= ~r
+    k = len(uniques); named = codes >= 0; cn = codes[named]
+    by_symbol = pd.DataFrame({"symbol": [str(u) for u in uniques],
+                              "n_raw": np.bincount(cn, minlength=k), "n_kept": np.bincount(cn, weights=mask[named], minlength=k).astype("int64")})
+    for rule in RULES:
+        by_symbol[f"rejected_{rule}"] = np.bincount(cn, weights=rejected[rule][named], minlength=k).astype("int64") if rule in rejected else 0
+    counts = {"n_raw": int(len(df)), "n_kept": int(mask.sum()), "no_symbol": int((~named).sum()),
+              **{r: int(rejected[r].sum()) if r in rejected else 0 for r in RULES}}
+    return QualityReport(mask, counts, by_symbol)
+
+def _scatter(sorted_values: np.ndarray, order: np.ndarray) -> np.ndarray:
+    out = np.empty_like(sorted_values); out[order] = sorted_values; return out
@@ -0,0 +1,393 @@
+# src/ofi_rda.py
+from __future__ import annotations
+import bz2, gzip, lzma, os, struct, numpy as np, pandas as pd
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+# Native reader for .rda files holding a data.frame (the TAQ day files), without pyreadr.
+# The gzip / bzip2 / xz container is decompressed as a stream and the R serialization ("RDX2"/"RDX3", XDR) is
+# walked item by item. Numeric columns are read straight into preallocated big-endian arrays and byte-swapped in
+# place; character columns are decoded run by run (consecutive elements with the same length are compared as one
+# 2-D byte block) into categorical codes, never into one Python string per row. Only the first object of the
+# file is read.
+# Column names are serialized after the column data, so skipping columns needs the layout up front: the names
+# seen in the previous file from the same directory are used as a hint, checked against the real names at the
+# end, and the file is read again in full if they differ. Content this reader does not handle raises
+# RdaFormatError (read_rda then falls back to pyreadr).
+# RdaChunks walks the same format as an iterator of column chunks, so a day can be consumed (spilled, processed)
+# without the whole decoded frame in memory; see src/ofi_stream.py.
+
+NA_INT = -2**31
+CHUNK = 1 << 20
+CHUNK_ROWS = 1 << 18
+_NIL, _REF, _SYM, _LIST, _CLO, _ENV, _PROM, _LANG, _CHAR = 254, 255, 1, 2, 3, 4, 5, 6, 9
+_LGL, _INT, _REAL, _CPLX, _STR, _VEC, _EXPR, _ALTREP, _PKG, _NS = 10, 13, 14, 15, 16, 19, 20, 238, 249, 250
+_SPECIAL = {242, 241, 253, 252, 251, 247}          # empty/base/global env, unbound value, missing arg, base namespace
+_NUM = {_LGL: ">i4", _INT: ">i4", _REAL: ">f8", _CPLX: ">c16"}
+_ATTR, _TAG = 1 << 9, 1 << 10
+_LAYOUTS: Dict[str, List[str]] = {}
+
+
+class RdaFormatError(ValueError):
+    pass
+
+
+class RdaLayoutChanged(RdaFormatError):
+    """The column names at the end of the file differ from the layout hint the columns were selected by."""
+
+
+def open_rda_stream(path: str):
+    """Binary file object over the decompressed payload (gzip, bzip2, xz or uncompressed)."""
+    with open(path, "rb") as f:
+        magic = f.read(6)
+    if magic[:2] == b"\x1f\x8b": return gzip.open(path, "rb")
+    if magic[:3] == b"BZh": return bz2.open(path, "rb")
+    if magic == b"\xfd7zXZ\x00": return lzma.open(path, "rb")
+    return open(path, "rb")
+
+
+class _Stream:
+    """Buffered big-endian reads over a decompressing file object; bulk vectors go through ``readinto``."""
+
+    def __init__(self, f, chunk: int = CHUNK):
+        self.f, self.chunk = f, chunk
+        self.buf, self.pos = b"", 0
+
+    def _fill(self, n: int) -> bool:
+        have = len(self.buf) - self.pos
+        if have >= n: return True
+        self.buf = self.buf[self.pos:] + self.f.read(max(n - have, self.chunk)); self.pos = 0
+        return len(self.buf) >= n
+
+    def read(self, n: int) -> bytes:
+        if not self._fill(n): raise RdaFormatError("unexpected end of file")
+        b = self.buf[self.pos:self.pos + n]; self.pos += n
+        return b
+
+    def int(self) -> int:
+        return struct.unpack(">i", self.read(4))[0]
+
+    def length(self) -> int:
+        n = self.int()
+        if n == -1:                                    # long vector: length follows as two ints
+            hi, lo = struct.unpack(">II", self.read(8)); n = (hi << 32) + lo
+        return n
+
+    def readinto(self, arr: np.ndarray):
+        mv = memoryview(arr).cast("B"); n = len(mv)
+        k = min(n, len(self.buf) - self.pos)
+        mv[:k] = self.buf[self.pos:self.pos + k]; self.pos += k
+        while k < n:
+            got = self.f.readinto(mv[k:])
+            if not got: raise RdaFormatError("unexpected end of file")
+            k += got
+
+    def skip(self, n: int):
+        k = min(n, len(self.buf) - self.pos); self.pos += k; n -= k
+        while n > 0:
+            got = len(self.f.read(min(n, self.chunk)))
+            if not got: raise RdaFormatError("unexpected end of file")
+            n -= got
+
+    def window(self, want: int) -> np.ndarray:
+        """Up to ``want`` buffered bytes at the current position (fewer only at the end of the stream)."""
+        self._fill(want)
+        return np.frombuffer(self.buf, dtype=np.uint8, count=min(want, len(self.buf) - self.pos), offset=self.pos)
+
+    def advance(self, n: int):
+        self.pos += n
+
+
+@dataclass
+class RVector:
+    type: int
+    data: object            # ndarray (numeric), (codes, levels) (character), list (generic vector); None if skipped
+    attrs: Dict[str, object] = field(default_factory=dict)
+
+    def strings(self) -> List[Optional[str]]:
+        codes, levels = self.data
+        return [levels[c] if c >= 0 else None for c in codes]
+
+
+@dataclass
+class _Sym:
+    name: str
+
+
+def _read_strings(s: _Stream, n: int, keep: bool, index: Optional[Dict[bytes, int]] = None, levels: Optional[List[str]] = None):
+    """STRSXP body -> (int32 codes, -1 for NA; levels in first-seen order), or None when not kept.
+
+    ``index``/``levels`` carry the level table across the chunks of one column.
+    """
+    codes = np.empty(n, dtype=np.int32) if keep else None
+    index = {} if index is None else index; levels = [] if levels is None else levels
+
+    def code(key: bytes) -> int:
+        c = index.get(key)
+        if c is None:
+            c = index[key] = len(levels); levels.append(key.decode("utf-8", "replace"))
+        return c
+
+    i = 0
+    while i < n:
+        head = s.window(8)
+        if len(head) < 8: raise RdaFormatError("unexpected end of file")
+        if int.from_bytes(head[:4].tobytes(), "big") & 0xFF != _CHAR: raise RdaFormatError("expected CHARSXP")
+        length = int.from_bytes(head[4:8].tobytes(), "big", signed=True)
+        stride = 8 + max(length, 0)                             # NA_STRING is a bare header (length -1)
+        w = s.window(min(n - i, max(1, CHUNK // stride)) * stride)
+        m = len(w) // stride
+        if m == 0: raise RdaFormatError("unexpected end of file")
+        rec = w[:m * stride].reshape(m, stride)
+        same = (rec[:, :8] == rec[0, :8]).all(axis=1)          # same flags and length: a fixed-width block
+        k = m if same.all() else int(np.argmin(same))
+        if keep and length == -1:
+            codes[i:i + k] = -1
+        elif keep:
+            block = rec[:k, 8:]
+            if length == 0 or (block == block[0]).all():
+                codes[i:i + k] = code(block[0].tobytes())
+            else:
+                uniq, inv = np.unique(np.ascontiguousarray(block).view(f"V{length}").ravel(), return_inverse=True)
+                codes[i:i + k] = np.array([code(u.tobytes()) for u in uniq], dtype=np.int32)[inv.ravel()]
+        s.advance(k * stride); i += k
+    return (codes, levels) if keep else None
+
+
+class _Parser:
+    def __init__(self, s: _Stream, select: Optional[Callable[[int], bool]] = None):
+        self.s, self.select, self.refs = s, select, []
+
+    def item(self, frame: bool = False, column: Optional[int] = None, keep: bool = True, flags: Optional[int] = None):
+        """One serialized item; ``frame`` marks a value whose elements are data.frame columns, ``keep=False`` skips
+        a vector's data, ``flags`` is passed when the caller has already read them."""
+        s = self.s; flags = s.int() if flags is None else flags; t = flags & 0xFF
+        if t == _NIL or t in _SPECIAL: return None
+        if t == _REF: return self.refs[(flags >> 8 or s.int()) - 1]
+        if t == _SYM:
+            sym = _Sym(self.item()); self.refs.append(sym); return sym
+        if t == _CHAR:
+            n = s.int()
+            return None if n == -1 else s.read(n).decode("utf-8", "replace")
+        if t in (_LIST, _LANG, _CLO, _PROM): return self.pairlist(flags)
+        if t == _ENV:
+            s.int(); env: Dict[str, object] = {}; self.refs.append(env)
+            self.item(); frame_ = self.item(); self.item(); self.item()        # enclos, frame, hashtab, attributes
+            env.update(frame_ or {}); return env
+        if t in (_PKG, _NS):
+            s.int(); v = [self.item() for _ in range(s.int())]; self.refs.append(v); return v
+        if t == _ALTREP:
+            info, state, attr = self.item(), self.item(), self.item()
+            return self._altrep(info, state, attr)
+        if t in _NUM or t in (_STR, _VEC, _EXPR):
+            keep = keep and (column is None or self.select is None or self.select(column))
+            n = s.length()
+            if t in _NUM:
+                dt = np.dtype(_NUM[t])
+                if keep:
+                    data = np.empty(n, dtype=dt); s.readinto(data)
+                    data = data.byteswap(inplace=True).view(dt.newbyteorder("="))
+                else:
+                    s.skip(n * dt.itemsize); data = None
+            elif t == _STR:
+                data = _read_strings(s, n, keep)
+            else:
+                data = [self.item(column=j if frame else None) for j in range(n)]
+            # a frame's row.names (c(NA, -n), or "1".."n" as written by pyreadr) are not needed
+            attrs = self.attrs(self.pairlist(s.int(), skip=("row.names",) if frame else ())) if flags & _ATTR else {}
+            return RVector(t, data, attrs)
+        raise RdaFormatError(f"unsupported SEXP type {t}")
+
+    def pairlist(self, flags: int, frame: bool = False, skip: Sequence[str] = ()) -> Dict[str, object]:
+        out: Dict[str, object] = {}
+        while True:
+            if flags & _ATTR: self.item()
+            tag = self.item() if flags & _TAG else None
+            name = tag.name if isinstance(tag, _Sym) else str(len(out))
+            out[name] = self.item(frame=frame, keep=name not in skip)
+            if frame: return out                               # top level: stop after the first object
+            flags = self.s.int(); t = flags & 0xFF
+            if t == _NIL: return out
+            if t not in (_LIST, _LANG): raise RdaFormatError(f"malformed pairlist (SEXP type {t})")
+
+    @staticmethod
+    def attrs(pl) -> Dict[str, object]:
+        return {k: (v.strings() if isinstance(v, RVector) and v.type == _STR and v.data is not None else v) for k, v in (pl or {}).items()}
+
+    def _altrep(self, info, state, attr) -> RVector:
+        cls = info.get("0").name if isinstance(info, dict) and isinstance(info.get("0"), _Sym) else None
+        attrs = self.attrs(attr) if isinstance(attr, dict) else {}
+        if cls in ("compact_intseq", "compact_realseq"):
+            n, start, step = (float(x) for x in state.data)
+            seq = start + step * np.arange(int(n), dtype="float64")
+            return RVector(_INT, seq.astype("int32"), attrs) if cls == "compact_intseq" else RVector(_REAL, seq, attrs)
+        if cls and cls.startswith("wrap_") and isinstance(state, dict):
+            inner = state["0"]
+            return RVector(inner.type, inner.data, {**inner.attrs, **attrs})
+        raise RdaFormatError(f"unsupported ALTREP class {cls}")
+
+
+def _header(s: _Stream):
+    magic = s.read(5)
+    if magic not in (b"RDX2\n", b"RDX3\n"): raise RdaFormatError(f"not an XDR .rda file (magic {magic!r})")
+    if s.read(2) != b"X\n": raise RdaFormatError("only XDR serialization is supported")
+    version = s.int(); s.int(); s.int()
+    if version == 3: s.read(s.int())                          # native encoding name
+
+
+def _column(v: RVector):
+    cls = v.attrs.get("class") or []
+    if v.type == _STR:
+        codes, levels = v.data                                 # levels sorted, so groupby order matches strings
+        order = np.argsort(np.array(levels, dtype=object), kind="stable"); rank = np.empty(len(order) + 1, dtype=np.int32)
+        rank[order] = np.arange(len(order)); rank[-1] = -1
+        return pd.Categorical.from_codes(rank[codes], categories=pd.Index(np.array(levels, dtype=object)[order], dtype=object))
+    if v.type == _INT and "factor" in cls:
+        return pd.Categorical.from_codes(np.where(v.data == NA_INT, -1, v.data - 1).astype("int32"),
+                                         categories=pd.Index(v.attrs.get("levels") or [], dtype=object))
+    if v.type in (_INT, _LGL):
+        na = v.data == NA_INT
+        if v.type == _LGL: return v.data.astype(bool) if not na.any() else pd.array(np.where(na, None, v.data.astype(bool)), dtype="boolean")
+        return v.data.astype("int32", copy=False) if not na.any() else np.where(na, np.nan, v.data)
+    if v.type == _REAL and "POSIXct" in cls: return pd.to_datetime(v.data * 1e9, unit="ns")
+    if v.type == _REAL and "Date" in cls: return pd.to_datetime(v.data, unit="D")
+    return v.data
+
+
+ColumnSpec = Union[None, Sequence[str], Callable[[List[str]], Sequence[str]]]
+
+
+def select_columns(columns: ColumnSpec, names: List[str]) -> List[str]:
+    if columns is None: return list(names)
+    want = set(columns(names) if callable(columns) else columns)
+    return [c for c in names if c in want]
+
+
+def _parse_frame(path: str, select: Optional[Callable[[int], bool]]):
+    with open_rda_stream(path) as f:
+        s = _Stream(f); _header(s)
+        flags = s.int()
+        if flags & 0xFF != _LIST: raise RdaFormatError("expected a pairlist of saved objects")
+        obj = next(iter(_Parser(s, select).pairlist(flags, frame=True).values()))
+    if not isinstance(obj, RVector) or obj.type != _VEC or "data.frame" not in (obj.attrs.get("class") or []):
+        raise RdaFormatError("first object is not a data.frame")
+    return obj
+
+
+def read_rda_native(path: str, columns: ColumnSpec = None) -> pd.DataFrame:
+    """First data.frame in ``path``; ``columns`` is a list of names or a function of the full name list."""
+    key = os.path.dirname(os.path.abspath(path)); hint = _LAYOUTS.get(key)
+    select = None
+    if columns is not None and hint is not None:
+        try: keep = set(select_columns(columns, hint))
+        except ValueError: keep = None                        # selector rejects the old layout: no hint
+        if keep is not None: select = lambda j: j < len(hint) and hint[j] in keep
+    obj = _parse_frame(path, select)
+    names = list(obj.attrs.get("names") or [])
+    if select is not None and names != hint:
+        obj = _parse_frame(path, None)                        # layout changed: read everything
+    _LAYOUTS[key] = names
+    want = select_columns(columns, names)
+    if len(set(names)) != len(names): raise RdaFormatError("duplicate column names")
+    cols = dict(zip(names, obj.data))
+    return pd.DataFrame({c: _column(cols[c]) for c in want})
+
+
+@dataclass
+class RdaChunk:
+    column: int             # position in the data.frame
+    start: int              # first row of the chunk
+    values: np.ndarray      # raw values in native byte order; character columns as int32 codes into RdaChunks.levels
+                            # (factor columns keep R's 1-based codes: RdaChunks.codes maps both)
+    n_rows: int             # length of the column
+
+
+class RdaChunks:
+    """Iterate the first data.frame of ``path`` as :class:`RdaChunk` s of at most ``chunk_rows`` rows, in file order
+    (column-major: all of column 0, then column 1, ...), decompressing as it goes.
+
+    ``columns`` (names or a function of the name list) can only skip columns when a layout hint exists for the
+    directory (``expected``); without one every column is yielded. ``names``, ``types``, ``attrs`` and the final
+    ``levels`` (of character columns, and of factors once their attributes are read) are complete once the iterator
+    is exhausted; if the names differ from the hint that chose the
+    skipped columns, RdaLayoutChanged is raised at the end (the hint is updated first, so a retry is correct).
+    """
+
+    def __init__(self, path: str, columns: ColumnSpec = None, chunk_rows: int = CHUNK_ROWS):
+        self.path, self.chunk_rows = path, max(1, int(chunk_rows))
+        self.key = os.path.dirname(os.path.abspath(path)); hint = _LAYOUTS.get(self.key)
+        self.expected: Optional[List[str]] = list(hint) if hint is not None else None
+        self.keep: Optional[set] = None
+        if columns is not None and hint is not None:
+            try: self.keep = {j for j, c in enumerate(hint) if c in set(select_columns(columns, hint))}
+            except ValueError: self.keep = None
+        self.names: List[str] = []; self.n_rows = 0
+        self.types: Dict[int, int] = {}; self.attrs: Dict[int, Dict[str, object]] = {}; self.levels: Dict[int, List[str]] = {}
+
+    def selected(self, j: int) -> bool:
+        return self.keep is None or j in self.keep
+
+    def __iter__(self):
+        with open_rda_stream(self.path) as f:
+            s = _Stream(f); _header(s); p = _Parser(s)
+            flags = s.int()
+            if flags & 0xFF != _LIST: raise RdaFormatError("expected a pairlist of saved objects")
+            if flags & _ATTR: p.item()
+            if flags & _TAG: p.item()
+            vflags = s.int()
+            if vflags & 0xFF != _VEC: raise RdaFormatError("first object is not a data.frame")
+            for j in range(s.length()):
+                yield from self._chunks(s, p, j)
+            attrs = p.attrs(p.pairlist(s.int(), skip=("row.names",))) if vflags & _ATTR else {}
+        if "data.frame" not in (attrs.get("class") or []): raise RdaFormatError("first object is not a data.frame")
+        self.names = list(attrs.get("names") or [])
+        if len(set(self.names)) != len(self.names): raise RdaFormatError("duplicate column names")
+        _LAYOUTS[self.key] = self.names
+        if self.keep is not None and self.names != self.expected:
+            raise RdaLayoutChanged(f"{self.path}: columns {self.names} differ from the layout hint {self.expected}")
+
+    def _chunks(self, s: _Stream, p: _Parser, j: int):
+        flags = s.int(); t = flags & 0xFF; keep = self.selected(j); step = self.chunk_rows
+        self.types[j] = t                                      # attributes (class, levels) follow the data
+        if t in _NUM and t != _CPLX:
+            n = s.length(); dt = np.dtype(_NUM[t]); self.n_rows = n
+            for a in range(0, n, step):
+                m = min(step, n - a)
+                if not keep: s.skip(m * dt.itemsize); continue
+                arr = np.empty(m, dtype=dt); s.readinto(arr)
+                yield RdaChunk(j, a, arr.byteswap(inplace=True).view(dt.newbyteorder("=")), n)
+        elif t == _STR:
+            n = s.length(); index: Dict[bytes, int] = {}; levels = self.levels[j] = []; self.n_rows = n
+            for a in range(0, n, step):
+                m = min(step, n - a); got = _read_strings(s, m, keep, index, levels)
+                if keep: yield RdaChunk(j, a, got[0], n)
+        else:                                                  # ALTREP (compact sequences, wrappers): decoded whole
+            v = p.item(keep=keep, flags=flags)
+            if not isinstance(v, RVector) or (v.type not in _NUM and v.type != _STR):
+                raise RdaFormatError(f"unsupported column SEXP type {t}")
+            self.types[j], self.attrs[j] = v.type, v.attrs
+            if v.type == _STR: self.levels[j] = v.data[1] if v.data is not None else []
+            self._factor_levels(j)
+            data = v.data[0] if v.type == _STR and v.data is not None else v.data
+            if data is not None:
+                self.n_rows = len(data)
+                if keep: yield RdaChunk(j, 0, data, len(data))
+            return
+        self.attrs[j] = p.attrs(p.pairlist(s.int())) if flags & _ATTR else {}
+        self._factor_levels(j)
+
+    def _factor_levels(self, j: int):
+        a = self.attrs.get(j) or {}
+        if self.types[j] == _INT and "factor" in (a.get("class") or []): self.levels[j] = list(a.get("levels") or [])
+
+    def codes(self, j: int, values: np.ndarray) -> np.ndarray:
+        """int32 codes into ``levels[j]`` (-1 for NA) of a character or factor column ``j``."""
+        if j not in self.levels: raise RdaFormatError(f"{self.path}: column {j} is neither character nor a factor")
+        if self.types[j] == _STR: return values
+        return np.where(values == NA_INT, -1, values - 1).astype(np.int32, copy=False)
+
+    def column(self, j: int, values: np.ndarray):
+        """pandas-facing column from raw values of column ``j``, as read_rda_native returns it; class attributes
+        (factor, POSIXct) are applied once the column has been read to the end."""
+        t = self.types[j]
+        return _column(RVector(t, (values, self.levels[j]) if t == _STR else values, self.attrs.get(j, {})))
@@ -0,0 +1,176 @@
+# src/ofi_seasonality.py
+from __future__ import annotations
+import os, numpy as np, pandas as pd
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Sequence
+from .ofi_calendar import NY
+from .ofi_cross import FIELDS, DayPanel, load_day_panel
+from .ofi_utils import atomic_path
+
+# Intraday seasonality of normalized_OFI and d_mid_bps. A profile keeps, per (field, symbol, time-of-day bucket), the
+# count, sum and sum of squares of the finite observations of every day added so far. The moments are additive, so a
+# new day is folded in with one grouped reduction (np.bincount over a combined field/symbol/bucket key) of its aligned
+# (time x symbol) panel and earlier days are never re-read. Each day's own moments are also kept (seasonality/days/), so
+# the profile a day is regressed with holds only the days before it, whatever the saved profile has seen since:
+# profile_before subtracts the moments of that day and of every later one.
+# Buckets are taken on New York wall-clock time, so a bucket holds the same hour of trading in EST and EDT.
+# The adjustment standardizes each observation by its bucket's moments and rescales it to the symbol's all-day spread,
+#   x_adj = (x - mean_b) / sd_b * sd
+# so the series keep their units and only the time-of-day shape is removed. Buckets with fewer than ``min_count``
+# observations, and symbols the profile has not seen, are left as they are.
+
+BUCKET_SECS = 300
+MIN_COUNT = 300
+
+
+def profile_path(results_root: str) -> str:
+    return os.path.join(results_root, "seasonality", "profiles.npz")
+
+
+def day_profile_path(results_root: str, day: str) -> str:
+    return os.path.join(results_root, "seasonality", "days", f"{day}.npz")
+
+
+def seconds_of_day(index: pd.DatetimeIndex, tz: str = NY) -> np.ndarray:
+    """Wall-clock seconds since midnight in ``tz`` (naive stamps are taken as already local)."""
+    idx = index.tz_convert(tz) if index.tz is not None else index
+    return (idx.hour * 3600 + idx.minute * 60 + idx.second).to_numpy(dtype=np.int64)
+
+
+@dataclass
+class SeasonalProfile:
+    bucket_secs: int = BUCKET_SECS
+    fields: List[str] = field(default_factory=lambda: list(FIELDS))
+    symbols: List[str] = field(default_factory=list)
+    days: List[str] = field(default_factory=list)
+    count: Optional[np.ndarray] = None   # (len(fields), len(symbols), buckets) int64
+    total: Optional[np.ndarray] = None   # same shape, float64 sums
+    sumsq: Optional[np.ndarray] = None   # same shape, float64 sums of squares
+
+    def __post_init__(self):
+        if 86400 % self.bucket_secs: raise ValueError(f"bucket_secs must divide a day, not {self.bucket_secs}")
+        shape = (len(self.fields), len(self.symbols), self.buckets)
+        if self.count is None: self.count = np.zeros(shape, dtype=np.int64)
+        if self.total is None: self.total = np.zeros(shape)
+        if self.sumsq is None: self.sumsq = np.zeros(shape)
+
+    @property
+    def buckets(self) -> int:
+        return 86400 // self.bucket_secs
+
+    def _positions(self, symbols: Sequence[str]) -> np.ndarray:
+        """Profile rows of ``symbols``, appending empty rows for new ones."""
+        known = {s: i for i, s in enumerate(self.symbols)}
+        new = [s for s in symbols if s not in known]
+        if new:
+            pad = ((0, 0), (0, len(new)), (0, 0))
+            self.count, self.total, self.sumsq = (np.pad(a, pad) for a in (self.count, self.total, self.sumsq))
+            known.update((s, len(self.symbols) + i) for i, s in enumerate(new)); self.symbols += new
+        return np.array([known[s] for s in symbols], dtype=np.int64)
+
+    def add_panel(self, panel: DayPanel) -> bool:
+        """Fold one day into the moments; False (and no change) if the day is already in."""
+        if panel.day in self.days: return False
+        sym = self._positions(panel.symbols)
+        bucket = seconds_of_day(pd.DatetimeIndex(panel.time_ns.view("datetime64[ns]")).tz_localize("UTC")) // self.bucket_secs
+        fpos = np.array([panel.fields.index(f) for f in self.fields])
+        values = panel.values[fpos]                                              # (F, T, N)
+        S, B = len(self.symbols), self.buckets
+        key = (np.arange(len(fpos))[:, None, None] * S + sym[None, None, :]) * B + bucket[None, :, None]
+        ok = np.isfinite(values); k = np.broadcast_to(key, values.shape)[ok]; v = values[ok]; n = self.count.size
+        self.count += np.bincount(k, minlength=n).reshape(self.count.shape)
+        self.total += np.bincount(k, weights=v, minlength=n).reshape(self.total.shape)
+        self.sumsq += np.bincount(k, weights=v * v, minlength=n).reshape(self.sumsq.shape)
+        self.days = sorted(self.days + [panel.day])
+        return True
+
+    def _combine(self, other: "SeasonalProfile", sign: int):
+        if (other.bucket_secs, other.fields) != (self.bucket_secs, self.fields):
+            raise ValueError(f"cannot combine {other.bucket_secs}s / {other.fields} moments with {self.bucket_secs}s / {self.fields}")
+        sym = self._positions(other.symbols)
+        for mine, theirs in ((self.count, other.count), (self.total, other.total), (self.sumsq, other.sumsq)):
+            mine[:, sym] += sign * theirs
+
+    def merge(self, other: "SeasonalProfile") -> bool:
+        """Add the moments of ``other`` (days not in this profile only); False (and no change) if any day is already in."""
+        if set(other.days) & set(self.days): return False
+        self._combine(other, 1); self.days = sorted(self.days + other.days)
+        return True
+
+    def without(self, other: "SeasonalProfile") -> "SeasonalProfile":
+        """Copy with the moments of ``other``'s days (all of which must be in this profile) taken out."""
+        if not set(other.days) <= set(self.days):
+            raise ValueError(f"days {sorted(set(other.days) - set(self.days))} are not in the profile")
+        out = SeasonalProfile(self.bucket_secs, list(self.fields), list(self.symbols), [d for d in self.days if d not in other.days],
+                              self.count.copy(), self.total.copy(), self.sumsq.copy())
+        out._combine(other, -1)
+        return out
+
+    def factors(self, symbol: str, min_count: int = MIN_COUNT):
+        """(mean, scale) per field and bucket, each (len(fields), buckets): x_adj = (x - mean) / scale."""
+        F, B = len(self.fields), self.buckets
+        mean, scale = np.zeros((F, B)), np.ones((F, B))
+        if symbol not in self.symbols: return mean, scale
+        i = self.symbols.index(symbol); c, s, q = self.count[:, i], self.total[:, i], self.sumsq[:, i]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            m_b = s / c; sd_b = np.sqrt(q / c - m_b ** 2)
+            C = c.sum(axis=1, keepdims=True); m = s.sum(axis=1, keepdims=True) / C
+            sd = np.sqrt(q.sum(axis=1, keepdims=True) / C - m ** 2)
+            use = (c >= min_count) & (sd_b > 0) & (sd > 0)
+            mean[use] = m_b[use]; scale[use] = (sd_b / sd)[use]
+        return mean, scale
+
+    def adjust(self, ts: pd.DataFrame, symbol: str, min_count: int = MIN_COUNT) -> pd.DataFrame:
+        """Copy of ``ts`` with the profiled fields deseasonalized (one gather per field over the bucket index)."""
+        mean, scale = self.factors(symbol, min_count)
+        b = seconds_of_day(pd.DatetimeIndex(ts.index)) // self.bucket_secs
+        out = ts.copy()
+        for f, name in enumerate(self.fields):
+            if name in out: out[name] = (out[name].to_numpy(dtype="float64") - mean[f, b]) / scale[f, b]
+        return out
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with atomic_path(path) as tmp, open(tmp, "wb") as f:
+            np.savez_compressed(f, count=self.count, total=self.total, sumsq=self.sumsq, bucket_secs=np.asarray(self.bucket_secs),
+                                fields=np.asarray(self.fields, dtype=str), symbols=np.asarray(self.symbols, dtype=str),
+                                days=np.asarray(self.days, dtype=str))
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "SeasonalProfile":
+        with np.load(path) as z:
+            return cls(int(z["bucket_secs"]), z["fields"].tolist(), z["symbols"].tolist(), z["days"].tolist(),
+                       z["count"], z["total"], z["sumsq"])
+
+
+def load_profiles(results_root: str) -> Optional[SeasonalProfile]:
+    """The saved profile of ``results_root``, or None before any day has been added."""
+    path = profile_path(results_root)
+    return SeasonalProfile.load(path) if os.path.exists(path) else None
+
+
+def profile_before(results_root: str, day: str) -> Optional[SeasonalProfile]:
+    """The saved profile restricted to the days before ``day`` (None if it has none), so reruns and profiles built
+    over a whole batch never let a day see itself or later days."""
+    prof = load_profiles(results_root)
+    if prof is None: return None
+    for d in prof.days:
+        if d >= day: prof = prof.without(SeasonalProfile.load(day_profile_path(results_root, d)))
+    return prof if prof.days else None
+
+
+def update_profiles(results_root: str, days: Iterable[str], bucket_secs: Optional[int] = None) -> SeasonalProfile:
+    """Add the days not yet in the saved profile (from their panels, see ofi_cross.load_day_panel) and save it, keeping
+    each added day's own moments for profile_before."""
+    prof = load_profiles(results_root)
+    if prof is None: prof = SeasonalProfile(bucket_secs or BUCKET_SECS)
+    elif bucket_secs is not None and bucket_secs != prof.bucket_secs:
+        raise ValueError(f"profile in {results_root} uses {prof.bucket_secs}s buckets, not {bucket_secs}s")
+    added = False
+    for d in days:
+        if d in prof.days: continue
+        one = SeasonalProfile(prof.bucket_secs, list(prof.fields)); one.add_panel(load_day_panel(results_root, d))
+        one.save(day_profile_path(results_root, d)); added = prof.merge(one) or added
+    if added or not os.path.exists(profile_path(results_root)): prof.save(profile_path(results_root))
+    return prof
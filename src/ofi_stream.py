@@ -0,0 +1,145 @@
+# src/ofi_stream.py
+from __future__ import annotations
+import contextlib, os, shutil, tempfile, numpy as np, pandas as pd
+from typing import Dict, Iterator, List, Optional, Tuple
+from .ofi_rda import CHUNK_ROWS, RdaChunk, RdaChunks, RdaFormatError
+from .ofi_utils import (ColumnMap, detect_time_unit, parse_trading_day_from_filename, pipeline_columns, process_day_rda,
+                        process_symbol_day, resolve_column_names, write_symbol_rows)
+
+# Streaming ingest of one .rda day. RdaChunks yields column chunks as they are decompressed and each chunk is copied
+# into a per-column .npy memmap in a scratch directory, so the decoded day is never held in memory: resident data is
+# one chunk plus the rows of the symbol being processed.
+# The file is column-major, so a row is complete once the last needed column has reached it. When the directory's
+# layout is known (an earlier day from the same directory), the symbol and time columns precede that last column and
+# the symbols are stored in sorted runs (as TAQ days are), each symbol is processed as soon as the last needed column
+# passes the end of its run, while the remaining chunks and the unused trailing columns are still being read.
+# Otherwise the day is processed after the last chunk, grouped through a stable argsort of the symbol codes.
+# Panel rows are written only after the column names at the end of the file confirm the layout; if they do not, or
+# the file has something the chunk reader does not handle, the day is redone by process_day_rda.
+# Symbols may be a character column or a factor; both are grouped through RdaChunks.codes.
+
+
+class DaySpill:
+    """Raw column values of one day as .npy memmaps under a scratch directory (removed on close)."""
+
+    def __init__(self, spill_dir: Optional[str] = None):
+        if spill_dir: os.makedirs(spill_dir, exist_ok=True)
+        self.dir = tempfile.mkdtemp(prefix="ofi_spill_", dir=spill_dir); self.raw: Dict[int, np.ndarray] = {}
+
+    def add(self, ch: RdaChunk):
+        mm = self.raw.get(ch.column)
+        if mm is None:
+            mm = self.raw[ch.column] = np.lib.format.open_memmap(os.path.join(self.dir, f"{ch.column}.npy"), mode="w+",
+                                                                 dtype=ch.values.dtype, shape=(ch.n_rows,))
+        mm[ch.start:ch.start + len(ch.values)] = ch.values
+
+    def close(self):
+        self.raw.clear(); shutil.rmtree(self.dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def symbol_runs(codes: np.ndarray, levels: List[str]) -> Optional[List[Tuple[str, int, int]]]:
+    """[(symbol, start, stop)] when every symbol occupies one contiguous run and runs are in sorted order, else None."""
+    if not len(codes): return []
+    bounds = np.concatenate([[0], np.flatnonzero(codes[1:] != codes[:-1]) + 1, [len(codes)]])
+    first = codes[bounds[:-1]]
+    if (first < 0).any(): return None                         # NA symbols: grouped (and dropped) the general way
+    syms = [levels[c] for c in first]
+    if any(a >= b for a, b in zip(syms, syms[1:])): return None
+    return [(s, int(a), int(b)) for s, a, b in zip(syms, bounds[:-1], bounds[1:])]
+
+
+def sorted_groups(codes: np.ndarray, levels: List[str]) -> Iterator[Tuple[str, np.ndarray]]:
+    """(symbol, ascending row positions) in symbol order, as ``df.groupby(symbol).indices`` gives them."""
+    order = np.argsort(np.array(levels, dtype=object), kind="stable"); rank = np.full(len(levels) + 1, -1, dtype=np.int64)
+    rank[order] = np.arange(len(levels)); r = rank[codes]
+    rows = np.argsort(r, kind="stable"); rows = rows[r[rows] >= 0]
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(r[rows])) + 1, [len(rows)]])
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        if b > a: yield levels[codes[rows[a]]], rows[a:b]
+
+
+class _Day:
+    """Resolved columns of a spilled day; ``frame`` builds one symbol's rows (a copy) for process_symbol_day."""
+
+    def __init__(self, reader: RdaChunks, spill: DaySpill, names: List[str]):
+        self.reader, self.spill = reader, spill
+        self.cmap: ColumnMap = resolve_column_names(names)
+        self.pos = {c: names.index(c) for c in pipeline_columns(names)}
+        self.sym_j, self.time_j = self.pos[self.cmap.symbol], self.pos[self.cmap.time_m]
+        self.last = max(self.pos.values())
+
+    def plausible(self) -> bool:
+        """Column types agree with the layout so far: character or factor symbols, everything else numeric."""
+        return all((j in self.reader.levels) == (j == self.sym_j) for j in self.pos.values() if j != self.last)
+
+    def symbol_codes(self) -> np.ndarray:
+        return self.reader.codes(self.sym_j, self.spill.raw[self.sym_j])
+
+    def time_unit(self) -> str:
+        t = self.reader.column(self.time_j, self.spill.raw[self.time_j])
+        return detect_time_unit(int(pd.Series(t, copy=False).max()))
+
+    def frame(self, symbol: str, rows) -> pd.DataFrame:
+        cols = {c: self.reader.column(j, self.spill.raw[j][rows]) for c, j in self.pos.items() if j != self.sym_j}
+        cols[self.cmap.symbol] = np.full(len(next(iter(cols.values()))), symbol, dtype=object)
+        return pd.DataFrame(cols)[list(self.pos)]
+
+
+def process_day_stream(path: str, outdir: str, freq: str = "1s", do_halfhour_10s: bool = True, source: str = "taq",
+                       chunk_rows: int = CHUNK_ROWS, spill_dir: Optional[str] = None, writer=None, seasonal=None) -> pd.DataFrame:
+    """process_day_rda over RdaChunks: the decoded day is spilled to disk chunk by chunk and symbols are processed
+    while later chunks are still being read (see the module comment). ``stats`` in ``.attrs`` records when the first
+    symbol finished, relative to the start."""
+    import time
+    from .ofi_io import open_writer
+    t0 = time.perf_counter(); day = parse_trading_day_from_filename(path); day_str = str(day.date())
+    reader = RdaChunks(path, pipeline_columns, chunk_rows)
+    writer, owned = open_writer(writer); done: List[Tuple[Dict, List[Dict]]] = []; stats = dict(first_result_s=None, early=0)
+
+    def run(d: _Day, unit: str, symbol: str, rows):
+        ts1s, row, hh_rows = process_symbol_day(d.frame(symbol, rows), d.cmap, day, freq=freq, do_halfhour_10s=do_halfhour_10s, time_unit=unit,
+                                                seasonal=seasonal)
+        writer.submit(ts1s, outdir, day_str, row["symbol"]); done.append((row, hh_rows))
+        if stats["first_result_s"] is None: stats["first_result_s"] = time.perf_counter() - t0
+
+    try:
+        with writer if owned else contextlib.nullcontext(writer), DaySpill(spill_dir) as spill:
+            early = None
+            try: early = _Day(reader, spill, reader.expected) if reader.expected is not None else None
+            except ValueError: pass
+            if early is not None and early.last in (early.sym_j, early.time_j): early = None
+            runs: Optional[List[Tuple[str, int, int]]] = None; k = 0
+            for ch in reader:
+                spill.add(ch)
+                if early is None or ch.column != early.last: continue
+                if ch.start == 0:                              # symbol and time columns are complete
+                    if not early.plausible(): early = None; continue
+                    runs = symbol_runs(early.symbol_codes(), reader.levels[early.sym_j]); unit = early.time_unit()
+                    if runs is None: early = None; continue
+                end = ch.start + len(ch.values)
+                while k < len(runs) and runs[k][2] <= end:
+                    run(early, unit, runs[k][0], slice(runs[k][1], runs[k][2])); k += 1
+            stats["early"] = k
+            if runs is None and reader.n_rows:
+                d = _Day(reader, spill, reader.names); unit = d.time_unit()
+                for symbol, rows in sorted_groups(d.symbol_codes(), reader.levels[d.sym_j]):
+                    run(d, unit, symbol, rows)
+    except RdaFormatError:
+        # the columns were chosen by a stale layout (RdaLayoutChanged), or the file needs the whole-frame reader
+        # (read_rda falls back to pyreadr): redo the day from scratch
+        stray = {row["symbol"] for row, _ in done}
+        res = process_day_rda(path, outdir, freq=freq, do_halfhour_10s=do_halfhour_10s, source=source, writer=None if owned else writer,
+                              seasonal=seasonal)
+        if not owned: writer.flush()
+        for sym in stray - set(res["symbol"] if len(res) else ()):
+            with contextlib.suppress(FileNotFoundError): os.remove(os.path.join(outdir, "timeseries", day_str, f"{sym}.parquet"))
+        return res
+    for row, hh_rows in done: write_symbol_rows(row, hh_rows, outdir)
+    res = pd.DataFrame([row for row, _ in done]); res.attrs["stats"] = stats
+    return res
@@ -1,13 +1,11 @@
 # src/ofi_utils.py
 from __future__ import annotations
-import os, numpy as np, pandas as pd
+import os, contextlib, threading, numpy as np, pandas as pd
 from dataclasses import dataclass
 from typing import List, Optional, Dict
-try:
-    import pyreadr
-except Exception:
-    pyreadr=None
-from statsmodels.api import OLS, add_constant
+from . import ofi_profile
+from .ofi_cache import cached
+from .ofi_calendar import NY, session
 try:
     from zoneinfo import ZoneInfo
     _NY_TZ = ZoneInfo("America/New_York")
@@ -36,7 +34,9 @@ def _choose(cols: List[str], cands: List[str])->Optional[str]:
     return None
 
 def resolve_columns(df: pd.DataFrame)->ColumnMap:
-    cols=list(df.columns)
+    return resolve_column_names(list(df.columns))
+
+def resolve_column_names(cols: List[str])->ColumnMap:
     symbol=_choose(cols,SYMBOL_CANDIDATES); time_m=_choose(cols,TIMECOL_CANDIDATES)
     bid=_choose(cols,BID_CANDIDATES); ask=_choose(cols,ASK_CANDIDATES)
     bidsz=_choose(cols,BIDSZ_CANDIDATES); asksz=_choose(cols,ASKSZ_CANDIDATES)
@@ -55,17 +55,61 @@ def _localize(ts: pd.Series)->pd.Series:
         return ts.dt.tz_localize("America/New_York")
     return ts.dt.tz_convert("America/New_York")
 
-def time_m_to_timedelta(df: pd.DataFrame, col:str)->pd.Series:
-    maxv=int(pd.Series(df[col]).max()); unit=detect_time_unit(maxv)
-    if unit=="s":   return pd.to_timedelta(df[col].astype("int64"),unit="s")
-    if unit=="ms":  return pd.to_timedelta(df[col].astype("int64"),unit="ms")
-    return pd.to_timedelta(df[col].astype("int64"),unit="us")
+_UNIT_NS={"s":1_000_000_000,"ms":1_000_000,"us":1_000}
+
+def time_m_to_ns(values,unit:str)->np.ndarray:
+    # Direct int64 scale to nanoseconds; truncates fractional time_m exactly like astype("int64")
+    return np.asarray(values).astype("int64",copy=False)*np.int64(_UNIT_NS[unit])
+
+def time_m_to_timedelta(df: pd.DataFrame, col:str, unit:Optional[str]=None)->pd.Series:
+    if unit is None: unit=detect_time_unit(int(pd.Series(df[col]).max()))
+    return pd.Series(time_m_to_ns(df[col].to_numpy(),unit).view("timedelta64[ns]"),index=df.index,name=col)
+
+@dataclass(frozen=True)
+class SchemaInfo:
+    cmap: ColumnMap; time_unit: str; columns: tuple; dtypes: tuple
+
+_SCHEMA_CACHE: Dict[str,SchemaInfo]={}
+
+def _schema_signature(df: pd.DataFrame)->tuple:
+    return tuple(df.columns),tuple(str(t) for t in df.dtypes)
+
+def resolve_schema(df: pd.DataFrame,source:str="taq")->SchemaInfo:
+    """Resolve ColumnMap and time unit once per source format; re-resolve if the column set or dtypes drift."""
+    cols,dtypes=_schema_signature(df); hit=_SCHEMA_CACHE.get(source)
+    if hit is not None and hit.columns==cols and hit.dtypes==dtypes: return hit
+    cmap=resolve_columns(df); unit=detect_time_unit(int(pd.Series(df[cmap.time_m]).max()))
+    info=SchemaInfo(cmap,unit,cols,dtypes); _SCHEMA_CACHE[source]=info
+    return info
 
-def read_rda(path:str)->pd.DataFrame:
-    if pyreadr is None: raise ImportError("pyreadr not installed")
+def clear_schema_cache():
+    _SCHEMA_CACHE.clear()
+
+def _ols():
+    # statsmodels (and scipy) load on first regression, not at import: keeps CLI/worker start-up light
+    from statsmodels.regression.linear_model import OLS
+    from statsmodels.tools.tools import add_constant
+    return OLS,add_constant
+
+def pipeline_columns(names: List[str])->List[str]:
+    """The six resolved columns of a raw day, in ColumnMap order (a ``columns`` selector for read_rda)."""
+    c=resolve_column_names(list(names)); return [c.symbol,c.time_m,c.bid,c.ask,c.bidsz,c.asksz]
+
+def read_rda(path:str,columns=None)->pd.DataFrame:
+    """First data.frame in ``path``; ``columns`` is a list of names or a function of the full name list.
+
+    The native reader (src/ofi_rda.py) decodes only the selected columns, character columns as categoricals;
+    files it does not handle are read with pyreadr.
+    """
+    from .ofi_rda import RdaFormatError, read_rda_native, select_columns
+    try: return read_rda_native(path,columns)
+    except RdaFormatError: pass
+    try:
+        import pyreadr
+    except ImportError as e: raise ImportError("pyreadr not installed") from e
     res=pyreadr.read_r(path); name,df=next(iter(res.items()))
     if not isinstance(df,pd.DataFrame): raise ValueError("Top-level object not a DataFrame")
-    return df
+    return df if columns is None else df[select_columns(columns,list(df.columns))]
 
 def filter_crossed(df: pd.DataFrame,bid_col:str,ask_col:str)->pd.DataFrame:
     return df.loc[df[ask_col]>=df[bid_col]].copy()
@@ -79,26 +123,28 @@ def parse_trading_day_from_filename(path:str)->pd.Timestamp:
     ts=pd.Timestamp(os.path.getmtime(path),unit="s",tz="UTC").tz_convert("America/New_York")
     return pd.Timestamp(ts.date(),tz="America/New_York")
 
-def build_tob_series_1s(df: pd.DataFrame,cmap:ColumnMap,trading_day:pd.Timestamp,freq:str="1s")->pd.DataFrame:
-    offsets=time_m_to_timedelta(df,cmap.time_m)
-    day_midnight=pd.Timestamp(trading_day.year,trading_day.month,trading_day.day,tz="America/New_York")
-    ts=day_midnight+offsets; ts=_localize(pd.Series(ts)).astype("datetime64[ns, America/New_York]")
-    df=df.copy(); df["ts"]=ts.values
-    df=filter_crossed(df,cmap.bid,cmap.ask).set_index("ts").sort_index()
-    # Remove duplicate timestamps, keeping the last occurrence
+@cached(version="1")
+def build_tob_series_1s(df: pd.DataFrame,cmap:ColumnMap,trading_day:pd.Timestamp,freq:str="1s",time_unit:Optional[str]=None,prefiltered:bool=False)->pd.DataFrame:
+    if time_unit is None: time_unit=detect_time_unit(int(pd.Series(df[cmap.time_m]).max()))
+    sess=session(trading_day,freq)
+    # Quote instants (local midnight + time_m) as epoch ns by int64 arithmetic; no per-row Timedelta/Timestamp objects
+    inst=sess.midnight_ns+time_m_to_ns(df[cmap.time_m].to_numpy(),time_unit)
+    df=df.copy(); df["ts"]=inst.view("datetime64[ns]")
+    # prefiltered: quotes already passed the day-level quality stage (ofi_quality), skip the crossed filter
+    df=(df if prefiltered else filter_crossed(df,cmap.bid,cmap.ask)).set_index("ts").sort_index(kind="stable")
+    # Remove duplicate timestamps, keeping the last occurrence (in file order: the sort above is stable)
     df = df[~df.index.duplicated(keep='last')]
-    start=pd.Timestamp(trading_day.date(),tz="America/New_York")+pd.Timedelta(hours=9,minutes=30)
-    end  =pd.Timestamp(trading_day.date(),tz="America/New_York")+pd.Timedelta(hours=16)
-    # Convert index to timezone-aware if it's not already
-    if df.index.tz is None:
-        df.index = df.index.tz_localize("America/New_York")
-    df=df.loc[(df.index>=start)&(df.index<=end)]
-    grid=pd.date_range(start=start,end=end,freq=freq,tz="America/New_York")
+    # Keep the regular session (open..close, early closes from the calendar) and label the instants in New York time
+    inst=df.index.as_unit("ns").asi8
+    keep=(inst>=sess.open.value)&(inst<=sess.close.value)
+    df=df.loc[keep]; df.index=pd.DatetimeIndex(inst[keep].view("datetime64[ns]")).tz_localize("UTC").tz_convert(NY)
+    grid=sess.grid
     df=df[[cmap.bid,cmap.ask,cmap.bidsz,cmap.asksz]].reindex(grid).ffill()
     df=df.dropna(subset=[cmap.bid,cmap.ask,cmap.bidsz,cmap.asksz])
     return df.rename(columns={cmap.bid:"bid",cmap.ask:"ask",cmap.bidsz:"bid_sz",cmap.asksz:"ask_sz"})
 
-def compute_ofi_depth_mid(df: pd.DataFrame)->pd.DataFrame:
+@cached(version="1")
+def compute_ofi_depth_mid(df: pd.DataFrame,max_abs_bps:Optional[float]=1000.0)->pd.DataFrame:
     bP,aP=df["bid"],df["ask"]; bS,aS=df["bid_sz"],df["ask_sz"]
     dbP,daP=bP.diff(),aP.diff(); dbS,daS=bS.diff(),aS.diff()
     ofi=pd.Series(np.zeros(len(df)),index=df.index,dtype="float64")
@@ -110,10 +156,12 @@ def compute_ofi_depth_mid(df: pd.DataFrame)->pd.DataFrame:
     
     # Filter out unrealistic price jumps (>10% move in 1 second = >1000 bps)
     # These are likely data errors or symbol mix-ups
-    d_mid_bps = d_mid_bps.where(abs(d_mid_bps) < 1000, np.nan)
+    if max_abs_bps is not None:
+        d_mid_bps = d_mid_bps.where(abs(d_mid_bps) < max_abs_bps, np.nan)
     
     return pd.DataFrame({"bid":bP,"ask":aP,"bid_sz":bS,"ask_sz":aS,"depth":depth,"ofi":ofi,"mid":mid,"d_mid_bps":d_mid_bps},index=df.index)
 
+@cached(version="1")
 def normalize_ofi(df: pd.DataFrame,window_secs:int=600,min_periods:int=50)->pd.DataFrame:
     roll=df["depth"].rolling(window=window_secs,min_periods=min_periods).mean()
     out=df.copy(); out["depth_roll_10m"]=roll; out["normalized_OFI"]=out["ofi"]/roll.replace(0,np.nan)
@@ -122,6 +170,7 @@ def normalize_ofi(df: pd.DataFrame,window_secs:int=600,min_periods:int=50)->pd.D
 def run_ols_xy(x: pd.Series, y: pd.Series):
     d=pd.concat([x,y],axis=1).dropna(); n=len(d)
     if n<10: return dict(alpha=np.nan,beta=np.nan,se_beta=np.nan,r2=np.nan,n=n,notes="n<10")
+    OLS,add_constant=_ols()
     X=add_constant(d.iloc[:,0].values); Y=d.iloc[:,1].values
     try:
         res=OLS(Y,X).fit(cov_type="HC1")
@@ -141,9 +190,26 @@ def resample_to(df: pd.DataFrame,freq:str)->pd.DataFrame:
     agg=compute_ofi_depth_mid(agg); agg=normalize_ofi(agg,window_secs=600,min_periods=10 if freq!="1s" else 50)
     return agg
 
+@contextlib.contextmanager
+def atomic_path(path:str):
+    """Yield a temp path next to ``path`` and rename it over ``path`` only if the block succeeds (readers never see partial files).
+
+    The temp file is fsynced before the rename and the directory after it, so a crash leaves the old or the new file, never an empty one."""
+    tmp=f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp
+        with open(tmp,"rb") as f: os.fsync(f.fileno())
+        os.replace(tmp,path)
+        if os.name=="posix":
+            fd=os.open(os.path.dirname(os.path.abspath(path)),os.O_RDONLY)
+            try: os.fsync(fd)
+            finally: os.close(fd)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+
 def save_timeseries_parquet(ts_df: pd.DataFrame,outdir:str,day:str,symbol:str):
     dd=os.path.join(outdir,"timeseries",day); os.makedirs(dd,exist_ok=True)
-    ts_df.to_parquet(os.path.join(dd,f"{symbol}.parquet"),index=True)
+    with atomic_path(os.path.join(dd,f"{symbol}.parquet")) as tmp: ts_df.to_parquet(tmp,index=True)
 
 def append_panel_row(row:Dict,outdir:str,name:str):
     path=os.path.join(outdir,"regressions",name); os.makedirs(os.path.dirname(path),exist_ok=True)
@@ -153,40 +219,91 @@ def append_panel_row(row:Dict,outdir:str,name:str):
         if keys: pan=pan.drop_duplicates(subset=keys,keep="last")
     else:
         pan=pd.DataFrame([row])
-    pan.to_parquet(path,index=False)
-
-def process_day_rda(path:str,outdir:str,freq:str="1s",do_halfhour_10s:bool=True)->pd.DataFrame:
-    df=read_rda(path); cmap=resolve_columns(df); day=parse_trading_day_from_filename(path); day_str=str(day.date())
-    rows=[]
-    for symbol,g in df.groupby(cmap.symbol):
-        symbol=str(symbol)
-        ts1s_raw=build_tob_series_1s(g,cmap,trading_day=day,freq=freq)
-        ts1s=normalize_ofi(compute_ofi_depth_mid(ts1s_raw),window_secs=600,min_periods=50)
-        save_timeseries_parquet(ts1s,outdir,day_str,symbol)
-        st=run_ols_symbol_day(ts1s); row=dict(symbol=symbol,day=day_str,**st); append_panel_row(row,outdir,"by_symbol_day.parquet"); rows.append(row)
-        if do_halfhour_10s:
-            ts10=resample_to(ts1s_raw, "10s")
-            bins=ts10.index.floor("30min")
-            for hstart,sub in ts10.groupby(bins):
-                st=run_ols_xy(sub["normalized_OFI"],sub["d_mid_bps"])
-                rowh=dict(symbol=symbol,day=day_str,half_hour_start=str(hstart),mean_depth=float(sub["depth"].mean()),**st)
-                append_panel_row(rowh,outdir,"by_symbol_day_halfhour.parquet")
+    with atomic_path(path) as tmp: pan.to_parquet(tmp,index=False)
+
+def process_symbol_day(g: pd.DataFrame,cmap:ColumnMap,day:pd.Timestamp,freq:str="1s",do_halfhour_10s:bool=True,time_unit:Optional[str]=None,
+                       prefiltered:bool=False,max_abs_bps:Optional[float]=1000.0,seasonal=None):
+    """Per-symbol unit of work: returns (1s timeseries, by_symbol_day row, half-hour rows) without writing anything.
+    ``seasonal`` (ofi_seasonality.SeasonalProfile): the daily regression runs on deseasonalized OFI and returns."""
+    day_str=str(day.date()); symbol=str(g[cmap.symbol].iloc[0]) if len(g) else ""
+    with ofi_profile.task(day_str,symbol): return _symbol_day(g,cmap,day,day_str,symbol,freq,do_halfhour_10s,time_unit,prefiltered,max_abs_bps,seasonal)
+
+def _symbol_day(g,cmap,day,day_str,symbol,freq,do_halfhour_10s,time_unit,prefiltered,max_abs_bps,seasonal=None):
+    ts1s_raw=build_tob_series_1s(g,cmap,trading_day=day,freq=freq,time_unit=time_unit,prefiltered=prefiltered)
+    ts1s=normalize_ofi(compute_ofi_depth_mid(ts1s_raw,max_abs_bps=max_abs_bps),window_secs=600,min_periods=50)
+    # the saved timeseries stay raw; only the daily regression sees the adjusted series
+    st=run_ols_symbol_day(ts1s if seasonal is None else seasonal.adjust(ts1s,symbol)); row=dict(symbol=symbol,day=day_str,**st); hh_rows=[]
+    if seasonal is not None: row["seasonal_days"]=len(seasonal.days)
+    if do_halfhour_10s:
+        ts10=resample_to(ts1s_raw, "10s")
+        bins=ts10.index.floor("30min")
+        for hstart,sub in ts10.groupby(bins):
+            st=run_ols_xy(sub["normalized_OFI"],sub["d_mid_bps"])
+            hh_rows.append(dict(symbol=symbol,day=day_str,half_hour_start=str(hstart),mean_depth=float(sub["depth"].mean()),**st))
+    return ts1s,row,hh_rows
+
+def write_symbol_rows(row:Dict,hh_rows:List[Dict],outdir:str):
+    append_panel_row(row,outdir,"by_symbol_day.parquet")
+    for rowh in hh_rows: append_panel_row(rowh,outdir,"by_symbol_day_halfhour.parquet")
+
+def quality_stage(df: pd.DataFrame,schema:SchemaInfo,day_str:str,quality=None):
+    """(row mask or None, cleaning kwargs for process_symbol_day, quality_by_symbol_day rows) for a loaded day."""
+    if quality is None: return None,dict(prefiltered=False,max_abs_bps=1000.0),[]
+    # One vectorized cleaning pass over the raw day; per-rule rejection counts go next to the regression panel
+    from .ofi_quality import quality_mask
+    report=quality_mask(df,schema.cmap,quality,time_unit=schema.time_unit)
+    return report.mask,dict(prefiltered=True,max_abs_bps=quality.max_abs_bps),report.by_symbol.assign(day=day_str).to_dict("records")
+
+def iter_symbol_frames(df: pd.DataFrame,schema:SchemaInfo,mask=None):
+    """Each symbol's rows of a loaded day (kept by ``mask``), in symbol order."""
+    for _,idx in df.groupby(schema.cmap.symbol).indices.items():
+        if mask is not None: idx=idx[mask[idx]]
+        if len(idx): yield df.iloc[idx]
+
+def iter_symbol_results(df: pd.DataFrame,schema:SchemaInfo,day:pd.Timestamp,freq:str="1s",do_halfhour_10s:bool=True,mask=None,**clean):
+    """(1s timeseries, by_symbol_day row, half-hour rows) per symbol of a loaded day, in symbol order."""
+    for g in iter_symbol_frames(df,schema,mask):
+        yield process_symbol_day(g,schema.cmap,day,freq=freq,do_halfhour_10s=do_halfhour_10s,time_unit=schema.time_unit,**clean)
+
+def process_day_rda(path:str,outdir:str,freq:str="1s",do_halfhour_10s:bool=True,source:str="taq",workers:int=1,writer=None,quality=None,
+                    seasonal=None)->pd.DataFrame:
+    df=read_rda(path,pipeline_columns); schema=resolve_schema(df,source); day=parse_trading_day_from_filename(path); day_str=str(day.date())
+    mask,clean,qrows=quality_stage(df,schema,day_str,quality)
+    if seasonal is not None: clean["seasonal"]=seasonal
+    for qrow in qrows: append_panel_row(qrow,outdir,"quality_by_symbol_day.parquet")
+    if workers>1:
+        from .ofi_parallel import process_day_parallel
+        if mask is not None: df=df.loc[mask]
+        return process_day_parallel(df,schema,day,outdir,freq=freq,do_halfhour_10s=do_halfhour_10s,workers=workers,**clean)
+    from .ofi_io import open_writer
+    writer,owned=open_writer(writer); rows=[]
+    # Parquet compression/IO runs on writer threads while the next symbol computes
+    with writer if owned else contextlib.nullcontext(writer):
+        for ts1s,row,hh_rows in iter_symbol_results(df,schema,day,freq=freq,do_halfhour_10s=do_halfhour_10s,mask=mask,**clean):
+            writer.submit(ts1s,outdir,day_str,row["symbol"])
+            write_symbol_rows(row,hh_rows,outdir); rows.append(row)
     return pd.DataFrame(rows)
 
+DENSITY_THRESHOLD=20000  # above this many points make_scatter draws a binned density (src/ofi_density.py)
+
 def make_scatter(ts_df: pd.DataFrame,symbol:str,day:str,figdir:str):
     import matplotlib.pyplot as plt, numpy as np, os
     os.makedirs(figdir,exist_ok=True); d=ts_df.dropna(subset=["d_mid_bps","normalized_OFI"]).copy(); n=len(d)
     plt.figure()
     if n==0:
         plt.text(0.5,0.5,"No valid points",ha="center",va="center"); plt.axis("off")
+    elif n>DENSITY_THRESHOLD:
+        # Binned density of every point: drawing cost depends on the bins, the fit uses the full sample
+        from .ofi_density import Density2D
+        dens=Density2D.from_data(d["normalized_OFI"].values,d["d_mid_bps"].values); dens.plot(plt.gca())
+        _,b,r2=dens.fit(); plt.xlabel("normalized_OFI"); plt.ylabel("d_mid_bps"); plt.title(f"{symbol} {day}  β={b:.3g}, R²={r2:.3f}, n={n}")
     else:
         X=d["normalized_OFI"].values; y=d["d_mid_bps"].values
-        if n>20000:
-            idx=np.random.choice(n,20000,replace=False); X=X[idx]; y=y[idx]; n=len(X)
         plt.scatter(X,y,s=4,alpha=0.3)
         title=""
         if n>=10:
             try:
+                OLS,add_constant=_ols()
                 res=OLS(y,add_constant(X)).fit(cov_type="HC1")
                 xg=np.linspace(np.nanpercentile(X,1),np.nanpercentile(X,99),100)
                 yg=res.params[0]+res.params[1]*xg; plt.plot(xg,yg,linewidth=2)
@@ -198,12 +315,15 @@ def make_scatter(ts_df: pd.DataFrame,symbol:str,day:str,figdir:str):
     out=os.path.join(figdir,f"scatter_{symbol}_{day}.png"); plt.tight_layout(); plt.savefig(out,dpi=150); plt.close()
 
 def beta_histogram(panel_path:str,figdir:str):
-    import matplotlib.pyplot as plt, os, pandas as pd
+    plot_beta_histogram(pd.read_parquet(panel_path) if os.path.exists(panel_path) else None,figdir)
+
+def plot_beta_histogram(pan:Optional[pd.DataFrame],figdir:str):
+    import matplotlib.pyplot as plt
     os.makedirs(figdir,exist_ok=True); plt.figure()
-    if not os.path.exists(panel_path):
+    if pan is None:
         plt.text(0.5,0.5,"No panel parquet found",ha="center",va="center"); plt.axis("off")
     else:
-        pan=pd.read_parquet(panel_path).dropna(subset=["beta"])
+        pan=pan.dropna(subset=["beta"])
         if len(pan)==0:
             plt.text(0.5,0.5,"No valid β to plot",ha="center",va="center"); plt.axis("off")
         else:
@@ -211,23 +331,29 @@ def beta_histogram(panel_path:str,figdir:str):
     out=os.path.join(figdir,"beta_hist.png"); plt.tight_layout(); plt.savefig(out,dpi=150); plt.close()
 
 def intraday_beta_vs_depth(panel_halfhour:str,timeseries_root:str,figdir:str):
-    import matplotlib.pyplot as plt, os, pandas as pd, numpy as np
     if not os.path.exists(panel_halfhour): return
-    pan=pd.read_parquet(panel_halfhour).dropna(subset=["beta"])
-    if len(pan)==0: return
-    pan["hh"]=pd.to_datetime(pan["half_hour_start"])
-    beta_prof=pan.groupby(pan["hh"].dt.strftime("%H:%M")).agg(beta_med=("beta","median")).reset_index()
-    depths=[]
+    from .ofi_compact import load_timeseries
+    frames=[]
     if os.path.isdir(timeseries_root):
         for day in os.listdir(timeseries_root):
             ddir=os.path.join(timeseries_root,day)
             if not os.path.isdir(ddir): continue
             for pq in os.listdir(ddir):
-                if not pq.endswith(".parquet"): continue
-                ts=pd.read_parquet(os.path.join(ddir,pq))
-                hh=pd.to_datetime(ts.index).floor("30min").strftime("%H:%M")
-                df=pd.DataFrame({"hh":hh,"depth":ts["depth"].values})
-                depths.append(df.groupby("hh").agg(depth_med=("depth","median")))
+                if pq.endswith(".parquet"): frames.append(load_timeseries(os.path.join(ddir,pq),columns=["depth"]))
+    plot_intraday_beta_vs_depth(pd.read_parquet(panel_halfhour),frames,figdir)
+
+def plot_intraday_beta_vs_depth(pan:pd.DataFrame,depth_frames:List[pd.DataFrame],figdir:str):
+    """Median half-hour β against the median depth profile of ``depth_frames`` (timeseries with a ``depth`` column)."""
+    import matplotlib.pyplot as plt
+    pan=pan.dropna(subset=["beta"])
+    if len(pan)==0: return
+    pan["hh"]=pd.to_datetime(pan["half_hour_start"])
+    beta_prof=pan.groupby(pan["hh"].dt.strftime("%H:%M")).agg(beta_med=("beta","median")).reset_index()
+    depths=[]
+    for ts in depth_frames:
+        hh=pd.to_datetime(ts.index).floor("30min").strftime("%H:%M")
+        df=pd.DataFrame({"hh":hh,"depth":ts["depth"].values})
+        depths.append(df.groupby("hh").agg(depth_med=("depth","median")))
     if depths:
         depth_prof=pd.concat(depths).groupby(level=0).median().reset_index()
     else:
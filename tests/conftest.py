@@ -0,0 +1,52 @@
+import numpy as np, pandas as pd, pytest
+
+
+def _make_raw(seed=0,n=4000):
+    rng=np.random.default_rng(seed); parts=[]
+    for s in ["ZZ","AAA","MMM"]:
+        t=np.sort(rng.uniform(34200,57600,n)); bid=50+np.round(np.cumsum(rng.normal(0,0.01,n)),2)
+        parts.append(pd.DataFrame({"sym_root":s,"time_m":t,"best_bid":bid,"best_ask":bid+0.01*rng.integers(0,3,n),
+                                   "best_bidsiz":rng.integers(1,50,n).astype(float),"best_asksiz":rng.integers(1,50,n).astype(float)}))
+    return pd.concat(parts).sample(frac=1,random_state=seed).reset_index(drop=True)
+
+
+@pytest.fixture
+def make_raw():
+    """Factory of synthetic TAQ quote days: ``make_raw(seed=0, n=4000)``, three symbols of ``n`` quotes, rows shuffled."""
+    return _make_raw
+
+
+@pytest.fixture
+def day_caches(tmp_path):
+    """``day_caches(n_days=2)`` -> (rda paths, parquet caches) of make_raw() days 2017-01-03, 2017-01-04 under tmp_path."""
+    pyreadr=pytest.importorskip("pyreadr")
+    from src.ofi_outofcore import cache_day_parquet
+
+    def build(n_days=2):
+        rdas, caches = [], []
+        for i,day in enumerate(["2017-01-03","2017-01-04"][:n_days]):
+            rda=tmp_path/f"{day}.rda"; pyreadr.write_rdata(str(rda),_make_raw(i),df_name="q")
+            rdas.append(rda); caches.append(cache_day_parquet(str(rda),str(tmp_path/"cache"),row_group_rows=700))
+        return rdas, caches
+    return build
+
+
+def pytest_addoption(parser):
+    g = parser.getgroup("perf", "performance regression suite (tests/perf)")
+    g.addoption("--perf", action="store_true", help="Run the perf suite against tests/perf/baselines.json.")
+    g.addoption("--update-baselines", action="store_true", help="Run the perf suite and rewrite its baselines.")
+    g.addoption("--perf-time-tol", type=float, default=0.5, help="Allowed relative slowdown (normalized time), default 0.5.")
+    g.addoption("--perf-mem-tol", type=float, default=0.2, help="Allowed relative growth of peak traced memory, default 0.2.")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "perf: time/memory budget test, runs only with --perf or --update-baselines")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--perf") or config.getoption("--update-baselines"):
+        return
+    skip = pytest.mark.skip(reason="perf suite: pass --perf")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip)
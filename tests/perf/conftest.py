@@ -0,0 +1,92 @@
+import gc, json, os, platform, time, tracemalloc
+import numpy as np, pandas as pd, pytest
+
+# Budgets for the hot functions. Times are stored in calibration units (best-of-N wall time divided by the
+# best-of-N time of a fixed NumPy/pandas workload on the same host), so baselines recorded on one machine are
+# comparable on another; peak memory is the tracemalloc peak of one call, which is host independent.
+#   pytest tests/perf --perf                # check against baselines.json
+#   pytest tests/perf --update-baselines    # re-measure and rewrite baselines.json
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+_MEM_SLACK_MB = 1.0   # absolute allowance on top of the relative tolerance, for tiny peaks
+
+
+def _calibration_workload():
+    rng = np.random.default_rng(0)
+    v = rng.standard_normal(1_000_000)
+    np.sort(v)
+    s = pd.Series(v)
+    s.rolling(600, min_periods=50).mean()
+    s.diff().where(s > 0, 0.0).cumsum()
+    pd.DataFrame({"k": rng.integers(0, 100, v.size), "v": v}).groupby("k")["v"].mean()
+
+
+def best_of(fn, repeat: int, min_sample: float = 0.1) -> float:
+    """Best per-call time over ``repeat`` samples; fast callables are looped until a sample lasts ``min_sample``."""
+    gc.collect(); was = gc.isenabled(); gc.disable()
+    try:
+        number, t0 = 1, time.perf_counter(); fn(); first = time.perf_counter() - t0
+        if first < min_sample:
+            number = int(min_sample / max(first, 1e-6)) + 1
+        best = first
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for _ in range(number): fn()
+            best = min(best, (time.perf_counter() - t0) / number)
+    finally:
+        if was: gc.enable()
+    return best
+
+
+def peak_mb(fn) -> float:
+    gc.collect(); tracemalloc.start()
+    try:
+        fn(); return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+class PerfRecorder:
+    """Measure a callable, compare it with its stored budget, or record it when updating baselines."""
+
+    def __init__(self, config, calibration: float):
+        self.calibration = calibration
+        self.update = config.getoption("--update-baselines")
+        self.time_tol, self.mem_tol = config.getoption("--perf-time-tol"), config.getoption("--perf-mem-tol")
+        self.baselines = {}
+        if os.path.exists(BASELINES):
+            with open(BASELINES) as f:
+                self.baselines = json.load(f)
+        self.measured = {}
+
+    def check(self, name: str, fn, items: int = 0, repeat: int = 5):
+        fn()                                                   # warm-up: imports, caches, page faults
+        units = best_of(fn, repeat) / self.calibration; mem = peak_mb(fn)
+        self.measured[name] = dict(units=round(units, 4), peak_mb=round(mem, 2), items=items)
+        if self.update:
+            return
+        base = self.baselines.get("benchmarks", {}).get(name)
+        if base is None:
+            pytest.skip(f"no baseline for {name}; run pytest tests/perf --update-baselines")
+        rate = lambda u: f" ({items / (u * self.calibration):,.0f} items/s)" if items else ""
+        assert units <= base["units"] * (1 + self.time_tol), (
+            f"{name}: {units:.3f} calibration units{rate(units)} vs baseline {base['units']:.3f}{rate(base['units'])}, "
+            f"tolerance +{self.time_tol:.0%}")
+        assert mem <= base["peak_mb"] * (1 + self.mem_tol) + _MEM_SLACK_MB, (
+            f"{name}: peak {mem:.1f} MB vs baseline {base['peak_mb']:.1f} MB, tolerance +{self.mem_tol:.0%}")
+
+    def write(self):
+        out = dict(self.baselines); out["benchmarks"] = {**out.get("benchmarks", {}), **self.measured}
+        out["machine"] = dict(calibration_seconds=round(self.calibration, 5), platform=platform.platform(),
+                              python=platform.python_version(), numpy=np.__version__, pandas=pd.__version__)
+        with open(BASELINES, "w") as f:
+            json.dump(out, f, indent=2, sort_keys=True); f.write("\n")
+
+
+@pytest.fixture(scope="session")
+def perf(request):
+    _calibration_workload()
+    rec = PerfRecorder(request.config, best_of(_calibration_workload, 7))
+    yield rec
+    if rec.update and rec.measured:
+        rec.write()
@@ -0,0 +1,45 @@
+import pandas as pd, pytest
+from src.ofi_sim import SimConfig, simulate_day
+from src.ofi_utils import (resolve_schema, build_tob_series_1s, compute_ofi_depth_mid, normalize_ofi, run_ols_xy,
+                           process_day_rda)
+
+pytestmark = pytest.mark.perf
+DAY = pd.Timestamp("2017-01-03", tz="America/New_York")
+
+
+@pytest.fixture(scope="module")
+def one_symbol():
+    df, _ = simulate_day(SimConfig(n_symbols=1, quote_rate=20, seed=0))
+    schema = resolve_schema(df)
+    raw = build_tob_series_1s(df, schema.cmap, trading_day=DAY, time_unit=schema.time_unit)
+    ofi = compute_ofi_depth_mid(raw)
+    return df, schema, raw, ofi, normalize_ofi(ofi)
+
+
+def test_build_tob_series_1s(perf, one_symbol):
+    df, schema, *_ = one_symbol
+    perf.check("build_tob_series_1s", lambda: build_tob_series_1s(df, schema.cmap, trading_day=DAY, time_unit=schema.time_unit),
+               items=len(df))
+
+
+def test_compute_ofi_depth_mid(perf, one_symbol):
+    raw = one_symbol[2]
+    perf.check("compute_ofi_depth_mid", lambda: compute_ofi_depth_mid(raw), items=len(raw))
+
+
+def test_normalize_ofi(perf, one_symbol):
+    ofi = one_symbol[3]
+    perf.check("normalize_ofi", lambda: normalize_ofi(ofi), items=len(ofi))
+
+
+def test_run_ols_xy(perf, one_symbol):
+    ts = one_symbol[4]
+    perf.check("run_ols_xy", lambda: run_ols_xy(ts["normalized_OFI"], ts["d_mid_bps"]), items=len(ts))
+
+
+def test_process_day_rda(perf, tmp_path):
+    pyreadr = pytest.importorskip("pyreadr")
+    df, _ = simulate_day(SimConfig(n_symbols=4, quote_rate=2, seed=1))
+    rda = tmp_path / "2017-01-03.rda"; pyreadr.write_rdata(str(rda), df, df_name="quotes")
+    runs = iter(range(100))   # fresh outdir per call: panels are appended to, not rewritten
+    perf.check("process_day_rda", lambda: process_day_rda(str(rda), str(tmp_path / f"out{next(runs)}")), items=len(df), repeat=3)
@@ -0,0 +1,39 @@
+import numpy as np, pandas as pd, pyarrow as pa, pytest
+from src.ofi_utils import resolve_schema, build_tob_series_1s, compute_ofi_depth_mid, normalize_ofi, process_day_rda
+from src.ofi_arrow import session_grid, tob_grid, ofi_arrays, to_arrow_timeseries, process_day_arrow
+from src.ofi_io import AsyncParquetWriter
+from src.ofi_pipeline import run_one_day
+
+def _one_symbol(seed=0,n=6000):
+    rng=np.random.default_rng(seed)
+    t=np.round(rng.uniform(34200,57600,n),1)   # unsorted, many same-second ties
+    bid=50+np.round(rng.normal(0,0.05,n),2)
+    return pd.DataFrame({"sym_root":"X","time_m":t,"best_bid":bid,"best_ask":bid+0.01*rng.integers(-1,3,n),
+                         "best_bidsiz":rng.integers(1,50,n).astype(float),"best_asksiz":rng.integers(1,50,n).astype(float)})
+
+@pytest.mark.parametrize("day",["2017-01-03","2017-03-12"])
+def test_arrow_grid_and_ofi_match_pandas(day):
+    df=_one_symbol(); sch=resolve_schema(df,"arrow-test"); d=pd.Timestamp(day,tz="America/New_York")
+    ref=normalize_ofi(compute_ofi_depth_mid(build_tob_series_1s(df,sch.cmap,d,time_unit=sch.time_unit)))
+    grid=session_grid(d)
+    grid_ns,tob=tob_grid(pa.Table.from_pandas(df),sch.cmap,d,sch.time_unit,grid)
+    got=to_arrow_timeseries(grid_ns,ofi_arrays(tob),grid.unit).to_pandas()
+    pd.testing.assert_frame_equal(ref,got,rtol=1e-9,check_freq=False)
+
+def test_process_day_arrow_matches_pandas(tmp_path, make_raw):
+    pyreadr=pytest.importorskip("pyreadr")
+    rda=tmp_path/"2017-01-03.rda"; pyreadr.write_rdata(str(rda),make_raw(4,n=3000),df_name="q")
+    a=process_day_rda(str(rda),str(tmp_path/"pd")); b=process_day_arrow(str(rda),str(tmp_path/"ar"))
+    pd.testing.assert_frame_equal(a,b,rtol=1e-9)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path/"pd/timeseries/2017-01-03/ZZ.parquet"),
+                                  pd.read_parquet(tmp_path/"ar/timeseries/2017-01-03/ZZ.parquet"),rtol=1e-9,check_freq=False)
+
+def test_arrow_engine_uses_the_callers_writer(tmp_path, make_raw):
+    pyreadr=pytest.importorskip("pyreadr")
+    rda=tmp_path/"2017-01-03.rda"; pyreadr.write_rdata(str(rda),make_raw(5,n=1500),df_name="q")
+    with AsyncParquetWriter(threads=1) as w:
+        res=process_day_arrow(str(rda),str(tmp_path/"ar"),writer=w); w.flush()
+        assert w.written==len(res)==3
+    assert pd.read_parquet(tmp_path/"ar/timeseries/2017-01-03/AAA.parquet").index.tz is not None
+    with pytest.raises(ValueError,match="workers"):
+        run_one_day(str(rda),str(tmp_path/"x"),engine="arrow",workers=2)
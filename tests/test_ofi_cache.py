@@ -0,0 +1,70 @@
+import os, pandas as pd
+import src.ofi_utils as U
+from src.ofi_cache import DiskCache, cache_key, cached
+
+def _tob(g):
+    cmap = U.resolve_columns(g)
+    return U.normalize_ofi(U.compute_ofi_depth_mid(U.build_tob_series_1s(g, cmap, pd.Timestamp("2017-01-03"))))
+
+def test_context_hits_and_matches_uncached(tmp_path, make_raw):
+    g = make_raw(0, 2000); g = g[g["sym_root"] == "AAA"]
+    ref = _tob(g)
+    with DiskCache(str(tmp_path)) as c:
+        a = _tob(g); assert (c.hits, c.misses) == (0, 3)
+        b = _tob(g); assert (c.hits, c.misses) == (3, 3)
+        U.build_tob_series_1s(g, U.resolve_columns(g), pd.Timestamp("2017-01-03"), freq="1s"); assert c.hits == 4  # defaults bound
+    pd.testing.assert_frame_equal(a, ref); pd.testing.assert_frame_equal(b, ref)
+    g2 = g.copy(); g2.iloc[0, g2.columns.get_loc("best_bid")] += 0.01
+    k = lambda df: cache_key(U.normalize_ofi.__wrapped__, "1", (df,), {})
+    assert k(g) != k(g2) and k(g) == k(g.copy())
+    assert cache_key(U.normalize_ofi.__wrapped__, "2", (g,), {}) != k(g)
+
+def test_lru_eviction_and_memoize(tmp_path):
+    c = DiskCache(str(tmp_path), max_bytes=3500); calls = []
+
+    @c.memoize(version="1")
+    def blob(i):
+        calls.append(i); return b"x" * 1000
+    path = lambda i: c._path(cache_key(blob.__wrapped__, "1", (i,), {}))
+    for i in range(3): blob(i); os.utime(path(i), (10 * (i + 1),) * 2)
+    blob(0)  # hit refreshes entry 0, so entry 1 is now least recently used
+    blob(3)
+    assert calls == [0, 1, 2, 3] and c.size() <= 3500 and not os.path.exists(path(1))
+    blob(0); blob(2); assert calls == [0, 1, 2, 3]
+
+def test_inactive_decorator_is_plain_call(tmp_path):
+    @cached
+    def f(x): return x + 1
+    assert f(1) == 2 and not os.listdir(tmp_path)
+
+def test_hit_survives_concurrent_evict(tmp_path, monkeypatch):
+    import src.ofi_cache as C
+    c = DiskCache(str(tmp_path)); c.put("k", 1)
+    def gone(path, *a): raise FileNotFoundError(path)
+    monkeypatch.setattr(C.os, "utime", gone)
+    assert c.get("k") == (True, 1)
+
+KEY_SCRIPT = '''
+from src.ofi_cache import cache_key
+def f(xs): return [x * 2 for x in xs if (lambda y: y > 0)(x)]
+print(cache_key(f, "1", ([1, 2],), {}))
+import src.ofi_utils as U, src.ofi_compact as K
+print(cache_key(U.build_tob_series_1s.__wrapped__, "1", (), {}), cache_key(K.encode, "1", (), {}))
+'''
+
+def test_key_stable_across_processes():
+    import subprocess, sys
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    run = lambda: subprocess.run([sys.executable, "-c", KEY_SCRIPT], cwd=root, capture_output=True, text=True, check=True).stdout
+    assert run() == run()
+
+def test_key_follows_callees_and_calendar(monkeypatch):
+    import src.ofi_calendar as cal
+    fn = U.build_tob_series_1s.__wrapped__
+    key = lambda: cache_key(fn, "1", (), {})
+    k0 = key()
+    monkeypatch.setattr(U, "time_m_to_ns", lambda t, unit: t)
+    assert key() != k0
+    monkeypatch.undo(); assert key() == k0
+    monkeypatch.setitem(cal._EXCEPTIONS, pd.Timestamp("2017-01-03").date(), None)
+    assert key() != k0
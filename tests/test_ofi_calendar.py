@@ -0,0 +1,54 @@
+import numpy as np, pandas as pd
+from src.ofi_calendar import session, is_trading_day, session_close, load_calendar
+from src.ofi_arrow import session_grid
+from src.ofi_utils import resolve_schema, build_tob_series_1s
+
+NY = "America/New_York"
+
+def test_regular_session_is_cached_and_shared():
+    s = session("2017-01-03")
+    assert s is session(pd.Timestamp("2017-01-03", tz=NY)) and s.grid is session("2017-01-03").grid
+    assert s.grid[0] == pd.Timestamp("2017-01-03 09:30", tz=NY) and s.grid[-1] == pd.Timestamp("2017-01-03 16:00", tz=NY)
+    assert len(s.grid) == 23401 and not s.early_close and s.midnight_ns == pd.Timestamp("2017-01-03 05:00", tz="UTC").value
+    assert session("2017-07-05").grid[0] == pd.Timestamp("2017-07-05 13:30", tz="UTC")               # EDT
+    assert not s.grid_ns.flags.writeable and (s.grid_ns == s.grid.as_unit("ns").asi8).all()
+
+def test_early_close_and_holidays():
+    s = session("2017-11-24")
+    assert s.early_close and session_close("2017-11-24").hour == 13 and s.close == pd.Timestamp("2017-11-24 13:00", tz=NY)
+    assert s.grid[-1] == s.close and len(s.grid) == 3.5 * 3600 + 1
+    g = session_grid(pd.Timestamp("2017-11-24", tz=NY))
+    assert g.end_ns == s.close.value and g.grid_ns is s.grid_ns
+    assert not is_trading_day("2017-11-23") and not is_trading_day("2017-01-07") and is_trading_day("2017-11-24")
+
+def test_no_dst_change_on_trading_days():
+    for d in pd.bdate_range("2016-01-01", "2025-12-31"):
+        a, b = pd.Timestamp(d).tz_localize(NY).utcoffset(), (pd.Timestamp(d) + pd.Timedelta(hours=23)).tz_localize(NY).utcoffset()
+        assert a == b, d
+    assert session("2017-03-13").open.utcoffset() == pd.Timedelta(hours=-4) and session("2017-03-10").open.utcoffset() == pd.Timedelta(hours=-5)
+
+def test_calendar_table_override(tmp_path):
+    p = tmp_path / "cal.csv"; p.write_text("date,close\n2017-01-03,12:00\n2017-01-04,closed\n")
+    table = load_calendar(str(p))
+    assert table[pd.Timestamp("2017-01-03").date()].hour == 12 and table[pd.Timestamp("2017-01-04").date()] is None
+    assert table[pd.Timestamp("2017-11-24").date()].hour == 13
+
+def test_symbols_reuse_the_session_grid(make_raw):
+    raw = make_raw(); schema = resolve_schema(raw)
+    for day, end in (("2017-01-03", "16:00"), ("2017-11-24", "13:00"), ("2017-07-05", "16:00")):
+        d = pd.Timestamp(day, tz=NY); grid = session(d).grid
+        for _, g in raw.groupby(schema.cmap.symbol):
+            tob = build_tob_series_1s(g, schema.cmap, d, time_unit=schema.time_unit)
+            assert tob.index[-1] == pd.Timestamp(f"{day} {end}", tz=NY)
+            assert tob.index.equals(grid[len(grid) - len(tob):])
+
+def test_quotes_are_labeled_at_their_new_york_time():
+    # time_m is seconds since New York midnight: a 10:00 quote is labeled 10:00 in EST and EDT, and quotes after an
+    # early close are dropped
+    q = pd.DataFrame({"sym_root": ["X", "X"], "time_m": [10 * 3600.0, 14 * 3600.0], "best_bid": [10.0, 11.0],
+                      "best_ask": [10.01, 11.01], "best_bidsiz": [5.0, 5.0], "best_asksiz": [7.0, 7.0]})
+    schema = resolve_schema(q)
+    for day, end in (("2017-01-03", "16:00"), ("2017-07-05", "16:00"), ("2017-11-24", "13:00")):
+        tob = build_tob_series_1s(q, schema.cmap, pd.Timestamp(day, tz=NY), time_unit="s")
+        assert tob.index[0] == pd.Timestamp(f"{day} 10:00", tz=NY) and tob.index[-1] == pd.Timestamp(f"{day} {end}", tz=NY)
+        assert tob["bid"].iloc[-1] == (10.0 if end == "13:00" else 11.0)
@@ -0,0 +1,34 @@
+import os, subprocess, sys, json
+
+ROOT=os.path.abspath(os.path.join(os.path.dirname(__file__),".."))
+HEAVY=["statsmodels","scipy","matplotlib","seaborn","pyreadr"]
+# Generous wall-clock budgets (seconds) for a cold interpreter; they catch a heavy import sneaking back in
+CLI_IMPORT_BUDGET=0.5
+UTILS_IMPORT_BUDGET=3.0
+
+def _probe(module):
+    code=("import sys,time,json;t=time.perf_counter();import %s;dt=time.perf_counter()-t;"
+          "print(json.dumps(dict(dt=dt,loaded=[m for m in %r if m in sys.modules])))")%(module,HEAVY+["pandas"])
+    out=subprocess.run([sys.executable,"-c",code],cwd=ROOT,capture_output=True,text=True,check=True).stdout
+    return json.loads(out)
+
+def test_cli_import_is_light():
+    r=_probe("src.ofi_cli")
+    assert r["loaded"]==[] and r["dt"]<CLI_IMPORT_BUDGET, r
+
+def test_utils_import_skips_heavy_deps():
+    r=_probe("src.ofi_utils")
+    assert set(r["loaded"])<={"pandas"} and r["dt"]<UTILS_IMPORT_BUDGET, r
+
+def test_cli_help_runs():
+    out=subprocess.run([sys.executable,"-m","src.ofi_cli","--help"],cwd=ROOT,capture_output=True,text=True,check=True).stdout
+    for cmd in ["day","batch","figures","validate","bench"]: assert cmd in out
+
+def test_quality_flags_reach_the_config():
+    import argparse
+    from src.ofi_cli import _add_run_args, _quality
+    ap=argparse.ArgumentParser(); _add_run_args(ap)
+    assert _quality(ap.parse_args([])) is None
+    cfg=_quality(ap.parse_args(["--session","09:30","16:00","--spread-window","20"]))
+    assert cfg.session==("09:30","16:00") and cfg.spread_window==20 and cfg.stale_secs is None
+    assert _quality(ap.parse_args(["--quality"])).spread_window==100
@@ -0,0 +1,52 @@
+import os, numpy as np, pandas as pd, pytest
+import pyarrow.parquet as pq
+from src.ofi_compact import encode, decode, load_timeseries, write_compact, compact_results, is_compact, KEY
+from src.ofi_utils import resolve_schema, process_symbol_day, save_timeseries_parquet
+from src.ofi_cross import build_day_panel
+
+DAY = pd.Timestamp("2017-01-03", tz="America/New_York")
+
+@pytest.fixture
+def pipeline_frames(make_raw):
+    raw = make_raw(); raw["best_bid"] = raw["best_bid"].round(2); raw["best_ask"] = raw["best_ask"].round(2)
+    schema = resolve_schema(raw)
+    return {s: process_symbol_day(g, schema.cmap, DAY, do_halfhour_10s=False, time_unit=schema.time_unit)[0]
+            for s, g in raw.groupby("sym_root")}
+
+def test_pandas_output_keeps_only_ticks_and_sizes(tmp_path, pipeline_frames):
+    for sym, ts in pipeline_frames.items():
+        path = write_compact(ts, str(tmp_path / f"{sym}.parquet"))
+        assert pq.read_schema(path).names == ["ts_ns", "bid", "ask", "bid_sz", "ask_sz"]
+        assert str(pq.read_schema(path).field("bid").type) == "int32"
+        pd.testing.assert_frame_equal(load_timeseries(path), ts, check_exact=True, check_freq=False)
+        sub = load_timeseries(path, columns=["normalized_OFI", "d_mid_bps"])
+        pd.testing.assert_frame_equal(sub, ts[["normalized_OFI", "d_mid_bps"]], check_exact=True, check_freq=False)
+
+def test_columns_that_do_not_reproduce_are_stored(pipeline_frames):
+    ts = next(iter(pipeline_frames.values())).copy()
+    ts.iloc[7, ts.columns.get_loc("bid")] += 1e-7                 # sub-tick price
+    ts["depth_roll_10m"] *= 1 + 1e-15                             # e.g. another rolling implementation
+    meta = encode(ts).schema.metadata[KEY].decode()
+    assert '"bid": "float"' in meta and '"depth_roll_10m": "float"' in meta and '"ask": "ticks"' in meta
+    pd.testing.assert_frame_equal(decode(encode(ts)), ts, check_exact=True, check_freq=False)
+
+def test_compact_results_in_place(tmp_path, pipeline_frames):
+    frames = pipeline_frames; out = str(tmp_path)
+    for sym, ts in frames.items(): save_timeseries_parquet(ts, out, "2017-01-03", sym)
+    before = build_day_panel(out, "2017-01-03")
+    r = compact_results(out)
+    assert r["files"] == 3 and r["bytes_after"] * 3 < r["bytes_before"]
+    assert compact_results(out)["files"] == 0                     # already compact
+    ddir = os.path.join(out, "timeseries", "2017-01-03")
+    assert all(is_compact(os.path.join(ddir, f)) for f in os.listdir(ddir))
+    after = build_day_panel(out, "2017-01-03")
+    assert np.array_equal(before.values, after.values, equal_nan=True) and (before.time_ns == after.time_ns).all()
+    for sym, ts in frames.items():
+        pd.testing.assert_frame_equal(load_timeseries(os.path.join(ddir, f"{sym}.parquet")), ts, check_exact=True, check_freq=False)
+
+def test_plain_files_read_unchanged(tmp_path, pipeline_frames):
+    ts = next(iter(pipeline_frames.values()))
+    save_timeseries_parquet(ts, str(tmp_path), "d", "X")
+    path = os.path.join(str(tmp_path), "timeseries", "d", "X.parquet")
+    assert not is_compact(path)
+    pd.testing.assert_frame_equal(load_timeseries(path, ["ofi"]), pd.read_parquet(path, columns=["ofi"]))
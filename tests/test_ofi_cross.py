@@ -0,0 +1,58 @@
+import numpy as np, pandas as pd, pytest
+from src.ofi_cross import DayPanel, build_day_panel, cross_impact, load_day_panel, panel_path
+from src.ofi_pipeline import run_one_day
+
+def _write_ts(root, day, sym, start, n, seed):
+    rng=np.random.default_rng(seed); d=root/"timeseries"/day; d.mkdir(parents=True,exist_ok=True)
+    idx=pd.date_range(f"{day} {start}",periods=n,freq="1s",tz="America/New_York")
+    ts=pd.DataFrame({"depth":100.0,"normalized_OFI":rng.normal(size=n),"d_mid_bps":rng.normal(size=n)},index=idx)
+    ts.to_parquet(d/f"{sym}.parquet"); return ts
+
+def test_panel_alignment_and_roundtrip(tmp_path):
+    a=_write_ts(tmp_path,"2017-01-03","BBB","14:30",100,0); b=_write_ts(tmp_path,"2017-01-03","AAA","14:30:10",100,1)
+    p=build_day_panel(str(tmp_path),"2017-01-03")
+    assert p.symbols==["AAA","BBB"] and p.values.shape==(2,110,2) and p.values.flags.c_contiguous
+    f=p.frame("normalized_OFI")
+    np.testing.assert_array_equal(f["BBB"].dropna().to_numpy(),a["normalized_OFI"].to_numpy())
+    assert f["AAA"].isna().sum()==10 and f["BBB"].isna().sum()==10
+    q=DayPanel.load(p.save(panel_path(str(tmp_path),"2017-01-03")))
+    np.testing.assert_array_equal(q.values,p.values); assert q.symbols==p.symbols and q.day=="2017-01-03"
+
+def _synthetic(T=4000,N=6,seed=0):
+    rng=np.random.default_rng(seed); X=rng.normal(size=(T,N))
+    B=np.diag(np.linspace(0.5,1.5,N)); B[0,1]=0.3                          # one cross effect: OFI of s1 moves s0
+    Y=0.1+X@B.T+0.5*rng.normal(size=(T,N)); Y[7,3]=np.nan
+    return DayPanel("d",np.arange(T,dtype="int64"),[f"s{i}" for i in range(N)],["normalized_OFI","d_mid_bps"],np.stack([X,Y])),B
+
+def test_ols_recovers_matrix_and_matches_per_target_lstsq():
+    p,B=_synthetic(); res=cross_impact(p)
+    assert res.n==3999 and np.abs(res.beta-B).max()<0.05 and np.allclose(res.intercept,0.1,atol=0.05)
+    X,Y=p.field("normalized_OFI"),p.field("d_mid_bps"); ok=np.isfinite(Y).all(1)
+    A=np.column_stack([np.ones(ok.sum()),X[ok]])
+    for j in (0,3):
+        np.testing.assert_allclose(res.beta[j],np.linalg.lstsq(A,Y[ok,j],rcond=None)[0][1:],atol=1e-10)
+
+def test_ridge_shrinks_and_lasso_selects():
+    p,B=_synthetic(); ols=cross_impact(p)
+    ridge=cross_impact(p,method="ridge",alpha=0.5)
+    assert np.abs(ridge.beta).sum()<np.abs(ols.beta).sum()
+    lasso=cross_impact(p,method="lasso",alpha=0.05)
+    assert lasso.iterations>0 and ((lasso.beta!=0)==(B!=0)).all()
+    with pytest.raises(ValueError): cross_impact(p,method="svm")
+
+def test_low_coverage_symbol_dropped(tmp_path):
+    _write_ts(tmp_path,"2017-01-03","AAA","14:30",600,0); _write_ts(tmp_path,"2017-01-03","BBB","14:30",600,1)
+    _write_ts(tmp_path,"2017-01-03","CCC","14:39",60,2)
+    res=cross_impact(load_day_panel(str(tmp_path),"2017-01-03"))
+    assert res.symbols==["AAA","BBB"] and res.dropped==["CCC"] and res.n==600
+
+def test_pipeline_writes_panel_own_impact_matches_sim(tmp_path):
+    pyreadr=pytest.importorskip("pyreadr")
+    from src.ofi_sim import SimConfig, simulate_day
+    df,truth=simulate_day(SimConfig(n_symbols=3,impact_bps=[0.3,0.6,0.9],quote_rate=1,seed=3))
+    rda=tmp_path/"2017-01-03.rda"; pyreadr.write_rdata(str(rda),df,df_name="q")
+    run_one_day(str(rda),str(tmp_path/"out"),baseline10s=False,make_daily_scatter=False,cross_panel=True)
+    p=DayPanel.load(panel_path(str(tmp_path/"out"),"2017-01-03"))
+    res=cross_impact(p)
+    own=np.diag(res.beta)
+    assert np.all(np.abs(own/truth["beta_bps"]-1)<0.25) and np.abs(res.beta-np.diag(own)).max()<0.1
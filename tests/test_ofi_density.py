@@ -0,0 +1,32 @@
+import numpy as np, pandas as pd, pytest
+from src.ofi_density import Density2D, density_from_timeseries
+from src.ofi_utils import make_scatter
+
+def _xy(n=50000, seed=0):
+    rng=np.random.default_rng(seed); x=rng.normal(0,0.6,n); y=0.8*x+rng.normal(0,1.5,n); y[::97]=np.nan
+    return x,y
+
+def test_counts_match_histogram2d_and_fit_uses_all_points():
+    x,y=_xy(); d=Density2D((-2,2),(-4,4),(40,30)).add(x,y)
+    ok=np.isfinite(y); h,_,_=np.histogram2d(x[ok],y[ok],bins=d.edges)
+    np.testing.assert_array_equal(d.counts,h.astype("int64"))
+    assert d.n==ok.sum() and d.outside==d.n-h.sum()
+    b,a=np.polyfit(x[ok],y[ok],1); fa,fb,r2=d.fit()
+    assert np.isclose(fa,a) and np.isclose(fb,b) and np.isclose(r2,np.corrcoef(x[ok],y[ok])[0,1]**2)
+
+def test_per_day_counts_merge_to_the_pooled_density(tmp_path):
+    parts=[]
+    for i in range(3):
+        x,y=_xy(10000,seed=i); p=tmp_path/f"d{i}.parquet"
+        pd.DataFrame({"normalized_OFI":x,"d_mid_bps":y}).to_parquet(p); parts.append((p,x,y))
+    pooled=density_from_timeseries([p for p,_,_ in parts])
+    whole=Density2D().add(np.concatenate([x for _,x,_ in parts]),np.concatenate([y for _,_,y in parts]))
+    np.testing.assert_array_equal(pooled.counts,whole.counts); np.testing.assert_allclose(pooled.moments,whole.moments)
+    back=Density2D.load(pooled.save(str(tmp_path/"pooled.npz")))
+    np.testing.assert_array_equal(back.counts,pooled.counts); assert back.fit()==pooled.fit()
+    with pytest.raises(ValueError): pooled.merge(Density2D(bins=(10,10)))
+
+def test_make_scatter_draws_density_for_large_days(tmp_path):
+    x,y=_xy(60000); ts=pd.DataFrame({"normalized_OFI":x,"d_mid_bps":y})
+    make_scatter(ts,"BIG","2017-01-03",str(tmp_path))
+    assert (tmp_path/"scatter_BIG_2017-01-03.png").stat().st_size>0
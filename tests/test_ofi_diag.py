@@ -0,0 +1,39 @@
+import numpy as np, pandas as pd
+from src.ofi_diag import column_stats, diagnose_results
+from src.ofi_cli import main
+
+def _ts(n=20000, seed=0, day="2017-01-03"):
+    rng=np.random.default_rng(seed); idx=pd.date_range(f"{day} 09:30",periods=n,freq="1s",tz="America/New_York")
+    x=rng.normal(0,0.5,n); ts=pd.DataFrame({"bid":50.0,"ask":50.01,"ofi":np.round(rng.normal(0,100,n)),"depth_roll_10m":100.0,
+                                            "normalized_OFI":x,"d_mid_bps":0.8*x+rng.normal(size=n)},index=idx)
+    ts.iloc[:50,4]=np.nan; ts.iloc[7,5]=np.inf; ts.iloc[9,0]=50.02; ts.iloc[11,3]=0.5
+    return ts
+
+def test_blocked_pass_matches_pandas():
+    ts=_ts(); stats,checks=column_stats(ts,block_rows=777)
+    fin=ts.replace([np.inf,-np.inf],np.nan)
+    for c in ts.columns:
+        r=stats.loc[c]; v=fin[c]
+        assert r["n"]==v.notna().sum() and r["n_nan"]==ts[c].isna().sum() and r["n_inf"]==np.isinf(ts[c]).sum()
+        assert r["n_zero"]==(ts[c]==0).sum()
+        np.testing.assert_allclose([r["mean"],r["std"],r["min"],r["max"]],[v.mean(),v.std(),v.min(),v.max()],rtol=1e-9,atol=1e-9)
+    ok=fin[["normalized_OFI","d_mid_bps"]].dropna(); b=np.polyfit(ok["normalized_OFI"],ok["d_mid_bps"],1)[0]
+    assert np.isclose(checks["beta"],b) and checks["reg_n"]==len(ok)
+    assert checks["crossed"]==1 and checks["depth_roll_lt1"]==1 and checks["max_gap_s"]==1.0
+
+def test_results_panels_and_cli(tmp_path, capsys):
+    for i,(day,sym) in enumerate([("2017-01-03","AAA"),("2017-01-03","BBB"),("2017-01-04","AAA")]):
+        d=tmp_path/"timeseries"/day; d.mkdir(parents=True,exist_ok=True)
+        ts=_ts(3000,seed=i,day=day)
+        if sym=="BBB": ts=ts.iloc[::2]                         # every other second: coverage 0.5
+        ts.to_parquet(d/f"{sym}.parquet")
+    cols,health=diagnose_results(str(tmp_path),workers=2)
+    assert len(cols)==18 and len(health)==3
+    saved=pd.read_parquet(tmp_path/"regressions"/"diagnostics_by_symbol_day.parquet")
+    tags=saved.set_index(["day","symbol"])["issues"].str.split(";")
+    assert set(tags[("2017-01-03","BBB")])=={"coverage<0.9"}                     # odd rows (inf, crossed, depth) dropped
+    assert set(tags[("2017-01-03","AAA")])=={"inf:d_mid_bps","crossed_quotes","depth_roll<1"}
+    q=pd.read_parquet(tmp_path/"regressions"/"diagnostics_columns.parquet").query("column=='d_mid_bps' and n_inf>0")
+    assert len(q)==2
+    assert main(["diagnose","--results",str(tmp_path),"--workers","1","--strict"])==1
+    assert "flagged symbol-days: 3/3" in capsys.readouterr().out
@@ -0,0 +1,101 @@
+import pandas as pd, pytest
+from src.ofi_utils import process_day_rda
+from src.ofi_outofcore import symbol_row_counts
+from src.ofi_exec import SerialExecutor, Task, plan_tasks, process_days_distributed, run_tasks
+
+def test_plan_is_size_ordered(tmp_path, day_caches):
+    _, caches = day_caches()
+    counts = symbol_row_counts(caches[0])
+    assert counts == pd.read_parquet(caches[0])["sym_root"].value_counts().to_dict()
+    rows = [t.rows for t in plan_tasks(caches)]
+    assert rows == sorted(rows, reverse=True) and len(rows) == 6
+
+@pytest.mark.parametrize("executor", ["serial", "process"])
+def test_tasks_match_serial_days(tmp_path, executor, day_caches):
+    rdas, caches = day_caches()
+    ref = pd.concat([process_day_rda(str(r), str(tmp_path/"ref")) for r in rdas], ignore_index=True)
+    got = process_days_distributed(caches, str(tmp_path/"ex"), executor=executor, workers=2)
+    pd.testing.assert_frame_equal(ref, got)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path/"ref/regressions/by_symbol_day_halfhour.parquet"),
+                                  pd.read_parquet(tmp_path/"ex/regressions/by_symbol_day_halfhour.parquet"))
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path/"ref/timeseries/2017-01-04/ZZ.parquet"),
+                                  pd.read_parquet(tmp_path/"ex/timeseries/2017-01-04/ZZ.parquet"))
+
+_calls = {}
+def _flaky(task, fail_times):
+    _calls[task] = _calls.get(task, 0) + 1
+    if _calls[task] <= fail_times: raise OSError("transient")
+    return task.symbol
+
+def test_retry_then_give_up():
+    t = Task("2017-01-03", "AAA", "x.parquet", 10)
+    assert list(run_tasks(SerialExecutor(), _flaky, [t], args=(2,), retries=2)) == [(t, "AAA")]
+    _calls.clear()
+    with pytest.raises(RuntimeError, match="failed after 2 attempts"):
+        list(run_tasks(SerialExecutor(), _flaky, [t], args=(5,), retries=1))
+
+def test_dask_local_cluster(tmp_path, day_caches):
+    pytest.importorskip("dask.distributed")
+    rdas, caches = day_caches(1)
+    ref = process_day_rda(str(rdas[0]), str(tmp_path/"ref"))
+    pd.testing.assert_frame_equal(ref, process_days_distributed(caches, str(tmp_path/"ex"), executor="dask", workers=2))
+
+def test_lpt_makespan():
+    from src.ofi_exec import lpt_makespan
+    assert lpt_makespan([5, 1, 1, 1, 1, 1], 2) == 5
+    assert lpt_makespan([3, 3, 2, 2, 2], 2) == 7  # greedy LPT, not the 6 optimum
+    assert lpt_makespan([], 4) == 0
+
+def test_timings_feed_next_run(tmp_path, day_caches):
+    from src.ofi_exec import CostModel, TIMINGS_FILE
+    _, caches = day_caches(1)
+    res = process_days_distributed(caches, str(tmp_path/"ex"))
+    rep = res.attrs["schedule"]
+    assert rep["tasks"] == 3 and rep["slots"] == 1 and rep["actual_makespan_s"] >= rep["actual_work_s"] * 0.9
+    t = pd.read_parquet(tmp_path/"ex/regressions"/TIMINGS_FILE)
+    assert len(t) == 3 and (t["seconds"] > 0).all()
+    t.assign(rows=[100, 1000, 10000], seconds=[1.0, 1.9, 10.9]).to_parquet(tmp_path/"t.parquet")
+    cm = CostModel.from_timings(str(tmp_path/"t.parquet"))
+    assert abs(cm.per_quote - 1e-3) < 1e-6 and abs(cm.overhead - 0.9) < 1e-3
+    assert CostModel.from_timings(str(tmp_path/"missing.parquet")).per_quote > 0
+
+def test_executor_is_abstract():
+    from src.ofi_exec import Executor
+    with pytest.raises(TypeError): Executor()
+
+def test_tasks_pass_engine_and_memory_limit(tmp_path, day_caches):
+    rdas, caches = day_caches(1)
+    ref = process_days_distributed(caches, str(tmp_path/"pd"))
+    got = process_days_distributed(caches, str(tmp_path/"ar"), engine="arrow")
+    pd.testing.assert_frame_equal(ref, got, rtol=1e-9)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path/"pd/timeseries/2017-01-03/ZZ.parquet"),
+                                  pd.read_parquet(tmp_path/"ar/timeseries/2017-01-03/ZZ.parquet"), rtol=1e-9, check_freq=False)
+    with pytest.raises(RuntimeError, match="failed after"):
+        process_days_distributed(caches, str(tmp_path/"lim"), retries=1, memory_limit_bytes=1000)
+
+def test_batch_rejects_writer_threads_with_executor(tmp_path):
+    from src.ofi_pipeline import run_batch
+    with pytest.raises(ValueError, match="writer_threads"):
+        run_batch(str(tmp_path), str(tmp_path/"out"), executor="serial", writer_threads=4)
+
+def test_task_day_is_new_york_like_serial(tmp_path, day_caches, monkeypatch):
+    import src.ofi_exec as E
+    rdas, caches = day_caches(1); seen = []
+    real = E.process_symbol_day
+    monkeypatch.setattr(E, "process_symbol_day", lambda g, cmap, day, **kw: seen.append(day) or real(g, cmap, day, **kw))
+    task = plan_tasks(caches)[0]
+    E.run_task(task, str(tmp_path))
+    from src.ofi_utils import parse_trading_day_from_filename
+    assert seen == [parse_trading_day_from_filename(str(rdas[0]))] and str(seen[0].tz) == "America/New_York"
+
+def test_ray_leaves_a_caller_instance_running():
+    ray = pytest.importorskip("ray")
+    from src.ofi_exec import RayExecutor
+    ray.init(num_cpus=1)
+    try:
+        RayExecutor().close()
+        assert ray.is_initialized()
+    finally:
+        ray.shutdown()
+    ex = RayExecutor(workers=1); ex.close()
+    assert not ray.is_initialized()
@@ -0,0 +1,56 @@
+import os, numpy as np, pandas as pd
+from src.ofi_figures import Figure, Input, build_figures, results_figures
+
+def _results(root):
+    rng=np.random.default_rng(0); reg=root/"regressions"; reg.mkdir(parents=True)
+    for sym in ("AAA","BBB"):
+        d=root/"timeseries"/"2017-01-03"; d.mkdir(parents=True,exist_ok=True)
+        idx=pd.date_range("2017-01-03 14:30",periods=300,freq="1s",tz="America/New_York")
+        pd.DataFrame({"depth":100+rng.random(300),"normalized_OFI":rng.normal(size=300),"d_mid_bps":rng.normal(size=300)},index=idx).to_parquet(d/f"{sym}.parquet")
+    pd.DataFrame({"symbol":["AAA","BBB"],"day":"2017-01-03","beta":[0.5,0.7]}).to_parquet(reg/"by_symbol_day.parquet")
+    pd.DataFrame({"symbol":["AAA"]*2,"half_hour_start":["2017-01-03 14:30:00-05:00","2017-01-03 15:00:00-05:00"],"beta":[0.4,0.6]}).to_parquet(reg/"by_symbol_day_halfhour.parquet")
+
+def test_results_graph_renders_in_parallel_then_skips(tmp_path):
+    _results(tmp_path); figdir=str(tmp_path/"figs")
+    rep=build_figures(results_figures(str(tmp_path),figdir),workers=2)
+    assert len(rep["rendered"])==5 and not rep["skipped"] and rep["shared_inputs"]==0   # density_all reads its own files
+    assert sorted(os.listdir(figdir))==[".figure_manifest.json","beta_hist.png","density_all.png","intraday_beta_vs_depth.png",
+                                        "scatter_AAA_2017-01-03.png","scatter_BBB_2017-01-03.png"]
+    assert build_figures(results_figures(str(tmp_path),figdir))["rendered"]==[]
+    # a changed timeseries re-renders only the figures that read it
+    ts=tmp_path/"timeseries"/"2017-01-03"/"BBB.parquet"; st=os.stat(ts); os.utime(ts,ns=(st.st_atime_ns,st.st_mtime_ns+10**9))
+    rep=build_figures(results_figures(str(tmp_path),figdir))
+    assert sorted(map(os.path.basename,rep["rendered"]))==["density_all.png","intraday_beta_vs_depth.png","scatter_BBB_2017-01-03.png"]
+    assert len(build_figures(results_figures(str(tmp_path),figdir),force=True)["rendered"])==5
+
+RENDER_SCRIPT='''
+def draw(out, *frames, tag=""):
+    with open(out, "w") as f: f.write(tag + ":" + ",".join(str(None if x is None else len(x)) for x in frames))
+'''
+
+def test_shared_inputs_load_once_and_script_renderers(tmp_path, monkeypatch):
+    script=tmp_path/"figs_script.py"; script.write_text(RENDER_SCRIPT)
+    a=tmp_path/"a.parquet"; pd.DataFrame({"x":range(5)}).to_parquet(a)
+    figs=[Figure(str(tmp_path/f"f{i}.txt"),f"{script}:draw",(Input(str(a)),Input(str(tmp_path/"missing.parquet"))),dict(tag=str(i))) for i in range(3)]
+    loads=[]; orig=Input.load
+    monkeypatch.setattr(Input,"load",lambda self: loads.append(self.path) or orig(self))
+    rep=build_figures(figs,manifest=str(tmp_path/"m.json"))
+    assert rep["shared_inputs"]==2 and loads.count(str(a))==1
+    assert (tmp_path/"f2.txt").read_text()=="2:5,None"
+    assert build_figures(figs,manifest=str(tmp_path/"m.json"))["rendered"]==[]
+
+def test_pooled_density_reads_paths_in_its_render(tmp_path, monkeypatch):
+    _results(tmp_path); figs=results_figures(str(tmp_path),str(tmp_path/"figs"))
+    dens=next(f for f in figs if f.output.endswith("density_all.png"))
+    assert all(i.as_path for i in dens.inputs)
+    loads=[]; orig=Input.load
+    monkeypatch.setattr(Input,"load",lambda self: loads.append(self.path) or orig(self))
+    rep=build_figures([dens]+[f for f in figs if "scatter_" in f.output])
+    assert len(rep["rendered"])==3 and rep["shared_inputs"]==0 and len(loads)==2   # one load per scatter, none for the density
+
+def test_serial_build_selects_agg(tmp_path, monkeypatch):
+    import matplotlib
+    _results(tmp_path); used=[]; orig=matplotlib.use
+    monkeypatch.setattr(matplotlib,"use",lambda b,*a,**k: used.append(b) or orig(b,*a,**k))
+    rep=build_figures(results_figures(str(tmp_path),str(tmp_path/"figs"))[:1],workers=1)
+    assert len(rep["rendered"])==1 and used==["Agg"]
@@ -0,0 +1,28 @@
+import os, numpy as np, pandas as pd, pytest
+from src.ofi_io import AsyncParquetWriter
+
+def make_ts(n=50):
+    idx=pd.date_range("2017-01-03 09:30:00",periods=n,freq="1s",tz="America/New_York")
+    return pd.DataFrame({"ofi":np.arange(n,dtype=float)},index=idx)
+
+def test_async_writer_writes_all(tmp_path):
+    with AsyncParquetWriter(threads=2,max_pending=2) as w:
+        for i in range(6): w.submit(make_ts(),str(tmp_path),"2017-01-03",f"S{i}")
+    assert w.written==6
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path/"timeseries/2017-01-03/S3.parquet"),make_ts(),check_freq=False)
+
+def test_async_writer_surfaces_errors_on_close(tmp_path):
+    blocker=tmp_path/"file"; blocker.write_text("x")
+    w=AsyncParquetWriter(threads=1)
+    w.submit(make_ts(),str(blocker),"d","S")   # outdir is a regular file -> makedirs fails in the thread
+    with pytest.raises(RuntimeError,match="async parquet write failed"):
+        w.close()
+
+def test_concurrent_submitters_account_blocked_time(tmp_path):
+    import threading, time
+    def slow(ts, outdir, day, symbol): time.sleep(0.02)
+    with AsyncParquetWriter(threads=1,max_pending=1) as w:
+        subs=[threading.Thread(target=lambda k=k: [w.submit(make_ts(),str(tmp_path),"d",f"S{k}{i}",save=slow) for i in range(5)]) for k in range(4)]
+        for t in subs: t.start()
+        for t in subs: t.join()
+    assert w.written==20 and w.blocked_seconds>0.1
@@ -0,0 +1,30 @@
+import numpy as np, pandas as pd
+from src.ofi_mmap import export_timeseries_ipc, export_results_ipc, MmapTimeseries, TimeseriesStore
+
+def make_ts(day="2017-01-03", n=600, seed=0):
+    rng=np.random.default_rng(seed)
+    idx=pd.date_range(f"{day} 14:30", periods=n, freq="1s", tz="America/New_York")
+    ts=pd.DataFrame({"mid":100+rng.normal(size=n).cumsum()*0.01,"normalized_OFI":rng.normal(size=n)},index=idx)
+    ts.iloc[5,1]=np.nan
+    return ts
+
+def test_roundtrip_and_window_views(tmp_path):
+    ts=make_ts(); path=export_timeseries_ipc(ts,str(tmp_path),"2017-01-03","AAA")
+    m=MmapTimeseries(path)
+    pd.testing.assert_frame_equal(m.to_pandas(),ts,check_freq=False,check_index_type=False)
+    w=m.window("14:31","14:32",columns=["normalized_OFI"])
+    exp=ts.between_time("14:31","14:32")["normalized_OFI"].to_numpy()
+    np.testing.assert_array_equal(w["normalized_OFI"],exp)
+    assert not w["normalized_OFI"].flags.owndata and not w["normalized_OFI"].flags.writeable
+    assert np.isnan(m.column("normalized_OFI")[5])
+    m.close()
+
+def test_store_spans_days(tmp_path):
+    ts_dir=tmp_path/"timeseries"
+    for i,day in enumerate(["2017-01-03","2017-01-04"]):
+        (ts_dir/day).mkdir(parents=True); make_ts(day,seed=i).to_parquet(ts_dir/day/"AAA.parquet")
+    assert export_results_ipc(str(tmp_path))==2
+    st=TimeseriesStore(str(tmp_path),max_open=1)
+    out=st.window("AAA","14:35","14:35:09")
+    assert list(out)==["2017-01-03","2017-01-04"] and all(len(v["mid"])==10 for v in out.values())
+    st.close()
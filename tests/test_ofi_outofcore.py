@@ -0,0 +1,45 @@
+import os, numpy as np, pandas as pd, pyarrow.parquet as pq, pytest
+from src.ofi_utils import process_day_rda
+from src.ofi_outofcore import cache_day_parquet, iter_symbol_frames, process_day_cached
+
+def test_out_of_core_matches_in_memory(tmp_path,make_raw):
+    pyreadr=pytest.importorskip("pyreadr")
+    rda=tmp_path/"2017-01-03.rda"; pyreadr.write_rdata(str(rda),make_raw(1),df_name="q")
+    cache=cache_day_parquet(str(rda),str(tmp_path/"cache"),row_group_rows=1500)
+    assert [s for s,_ in iter_symbol_frames(cache)]==["AAA","MMM","ZZ"]
+    a=process_day_rda(str(rda),str(tmp_path/"mem")); b=process_day_cached(cache,str(tmp_path/"ooc"),memory_limit_bytes=2**22)
+    pd.testing.assert_frame_equal(a,b)
+    for name in ["by_symbol_day.parquet","by_symbol_day_halfhour.parquet"]:
+        pd.testing.assert_frame_equal(pd.read_parquet(tmp_path/"mem"/"regressions"/name),pd.read_parquet(tmp_path/"ooc"/"regressions"/name))
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path/"mem/timeseries/2017-01-03/MMM.parquet"),pd.read_parquet(tmp_path/"ooc/timeseries/2017-01-03/MMM.parquet"))
+
+def test_memory_ceiling_enforced(tmp_path,make_raw):
+    pyreadr=pytest.importorskip("pyreadr")
+    rda=tmp_path/"2017-01-04.rda"; pyreadr.write_rdata(str(rda),make_raw(2),df_name="q")
+    cache=cache_day_parquet(str(rda),str(tmp_path/"cache"),row_group_rows=500)
+    with pytest.raises(MemoryError):
+        list(iter_symbol_frames(cache,memory_limit_bytes=10_000))
+
+def test_cache_is_built_in_chunks(tmp_path,monkeypatch,make_raw):
+    pyreadr=pytest.importorskip("pyreadr")
+    import src.ofi_outofcore as ooc
+    from src.ofi_utils import read_rda, pipeline_columns
+    rda=tmp_path/"2017-01-03.rda"; pyreadr.write_rdata(str(rda),make_raw(1),df_name="q")
+    whole=cache_day_parquet(str(rda),str(tmp_path/"whole"),row_group_rows=400,df=read_rda(str(rda),pipeline_columns))
+    monkeypatch.setattr(ooc,"read_rda",lambda *a,**k: pytest.fail("read the day whole"))
+    chunked=cache_day_parquet(str(rda),str(tmp_path/"chunked"),row_group_rows=400)
+    md=pq.ParquetFile(chunked).metadata
+    assert max(md.row_group(i).num_rows for i in range(md.num_row_groups))<=400
+    a,b=pd.read_parquet(whole),pd.read_parquet(chunked)
+    pd.testing.assert_frame_equal(a.astype({"sym_root":object}),b.astype({"sym_root":object}),check_dtype=False)
+    assert ooc.cached_schema(whole).time_unit==ooc.cached_schema(chunked).time_unit
+
+def test_stale_cache_is_rebuilt(tmp_path,make_raw):
+    pyreadr=pytest.importorskip("pyreadr")
+    from src.ofi_outofcore import cache_is_current, cached_day
+    rda=tmp_path/"2017-01-03.rda"; pyreadr.write_rdata(str(rda),make_raw(1),df_name="q")
+    cache=cached_day(str(rda),str(tmp_path/"cache")); assert cache_is_current(cache,str(rda))
+    mtime=os.path.getmtime(cache); assert cached_day(str(rda),str(tmp_path/"cache"))==cache and os.path.getmtime(cache)==mtime
+    pyreadr.write_rdata(str(rda),make_raw(2,n=500),df_name="q"); os.utime(rda,(1e9,1e9))
+    assert not cache_is_current(cache,str(rda))
+    assert len(pd.read_parquet(cached_day(str(rda),str(tmp_path/"cache"))))==len(pyreadr.read_r(str(rda))["q"].dropna(subset=["sym_root"]))
@@ -0,0 +1,36 @@
+import numpy as np, pandas as pd, pytest
+from src.ofi_utils import process_day_rda
+from src.ofi_parallel import SharedColumns, symbol_offsets
+
+def test_symbol_offsets_stable():
+    order,syms,bounds=symbol_offsets(pd.Series(["b","a","b","a","c"]))
+    assert syms==["a","b","c"] and list(bounds)==[0,2,4,5] and list(order)==[1,3,0,2,4]
+    order,syms,bounds=symbol_offsets(pd.Series(["b",None,"a",np.nan,"b"],dtype=object))
+    assert syms==["a","b"] and list(bounds)==[0,1,3] and list(order)==[2,0,4]
+
+def test_shared_columns_roundtrip():
+    sh=SharedColumns.from_arrays({"x":np.arange(5,dtype="int64"),"y":np.linspace(0,1,5)})
+    try:
+        other=SharedColumns.attach(sh.spec)
+        assert (other.arrays["x"]==np.arange(5)).all() and other.arrays["y"][-1]==1.0
+        other.close()
+    finally:
+        sh.close()
+
+def test_shared_columns_gather_in_order():
+    order=np.array([3,0,4]); sh=SharedColumns.from_arrays({"x":np.arange(5,dtype="int32"),"y":np.linspace(0,1,5)},order)
+    try:
+        assert sh.spec[1]==3 and sh.arrays["x"].tolist()==[3,0,4] and sh.arrays["y"].tolist()==[0.75,0.0,1.0]
+    finally:
+        sh.close()
+
+def test_parallel_day_matches_serial(tmp_path, make_raw):
+    pyreadr=pytest.importorskip("pyreadr")
+    raw=make_raw(); raw.loc[raw.index[::97],"sym_root"]=None                 # null symbols are dropped on both paths
+    rda=tmp_path/"2017-01-03.rda"; pyreadr.write_rdata(str(rda),raw,df_name="q")
+    a=process_day_rda(str(rda),str(tmp_path/"ser")); b=process_day_rda(str(rda),str(tmp_path/"par"),workers=2)
+    assert a["symbol"].tolist()==["AAA","MMM","ZZ"]
+    pd.testing.assert_frame_equal(a,b)
+    for name in ["by_symbol_day.parquet","by_symbol_day_halfhour.parquet"]:
+        pd.testing.assert_frame_equal(pd.read_parquet(tmp_path/"ser"/"regressions"/name),pd.read_parquet(tmp_path/"par"/"regressions"/name))
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path/"ser/timeseries/2017-01-03/AAA.parquet"),pd.read_parquet(tmp_path/"par/timeseries/2017-01-03/AAA.parquet"))
@@ -0,0 +1,54 @@
+import json, os, pandas as pd, pytest
+import src.ofi_pipeline as ofi_pipeline
+from src.ofi_pipeline import run_batch
+
+pyreadr = pytest.importorskip("pyreadr")
+
+@pytest.fixture
+def raw_dir(tmp_path, make_raw):
+    d = tmp_path / "raw"; d.mkdir()
+    for i, day in enumerate(["2017-01-03", "2017-01-04", "2017-01-05"]):
+        pyreadr.write_rdata(str(d / f"{day}.rda"), make_raw(i, n=1500), df_name="q")
+    return str(d)
+
+def panel(out, name):
+    return pd.read_parquet(os.path.join(out, "regressions", name)).sort_values(["day", "symbol"], kind="stable").reset_index(drop=True)
+
+def test_async_batch_matches_serial(tmp_path, raw_dir):
+    a, b = str(tmp_path / "serial"), str(tmp_path / "async")
+    sa = run_batch(raw_dir, a, figdir=str(tmp_path / "fa"))
+    sb = run_batch(raw_dir, b, figdir=str(tmp_path / "fb"), orchestrator="async", prefetch=1, write_queue=2)
+    pipe = sb.pop("pipeline")
+    assert sa == sb
+    for name in ("by_symbol_day.parquet", "by_symbol_day_halfhour.parquet"):
+        pd.testing.assert_frame_equal(panel(a, name), panel(b, name))
+    for day in os.listdir(os.path.join(a, "timeseries")):
+        for f in os.listdir(os.path.join(a, "timeseries", day)):
+            pd.testing.assert_frame_equal(pd.read_parquet(os.path.join(a, "timeseries", day, f)), pd.read_parquet(os.path.join(b, "timeseries", day, f)))
+    assert pipe["stages"]["compute"]["items"] == pipe["stages"]["write"]["items"] == 9 and pipe["stages"]["finish"]["items"] == 3
+    assert pipe["queues"]["write"]["capacity"] == 2 and pipe["queues"]["write"]["max_depth"] <= 2
+    assert json.load(open(os.path.join(b, "regressions", "pipeline_stats.json")))["queues"] == pipe["queues"]
+    assert sorted(os.listdir(tmp_path / "fb")) == sorted(os.listdir(tmp_path / "fa")) and "scatter_AAA_2017-01-04.png" in os.listdir(tmp_path / "fb")
+
+def test_async_batch_symbol_workers(tmp_path, raw_dir):
+    a, b = str(tmp_path / "serial"), str(tmp_path / "async")
+    run_batch(raw_dir, a, figdir=str(tmp_path / "fa"))
+    s = run_batch(raw_dir, b, figdir=str(tmp_path / "fb"), orchestrator="async", workers=2)
+    assert s["pipeline"]["stages"]["compute"]["items"] == 9
+    for name in ("by_symbol_day.parquet", "by_symbol_day_halfhour.parquet"):
+        pd.testing.assert_frame_equal(panel(a, name), panel(b, name))
+    with pytest.raises(ValueError, match="orchestrator"):
+        run_batch(raw_dir, b, orchestrator="asyncio")
+
+def test_async_batch_failure_stops_and_resumes(tmp_path, raw_dir, monkeypatch):
+    out = str(tmp_path / "out"); real = ofi_pipeline.finish_day
+
+    def failing(outdir, day, *a, **kw):
+        if day == "2017-01-04": raise OSError("disk full")
+        return real(outdir, day, *a, **kw)
+    monkeypatch.setattr(ofi_pipeline, "finish_day", failing)
+    with pytest.raises(OSError):
+        run_batch(raw_dir, out, figdir=str(tmp_path / "f"), orchestrator="async")
+    monkeypatch.setattr(ofi_pipeline, "finish_day", real)
+    s = run_batch(raw_dir, out, figdir=str(tmp_path / "f"), orchestrator="async", resume=True)
+    assert s["pipeline"]["stages"]["ingest"]["items"] == 2 and s["rows"] == 9
@@ -0,0 +1,41 @@
+import contextlib, os, pstats, pandas as pd, pytest
+from src import ofi_profile
+from src.ofi_profile import ProfileConfig, configure, merge_profiles
+from src.ofi_utils import _ols, process_day_rda, process_symbol_day, resolve_schema
+
+DAY = pd.Timestamp("2017-01-03", tz="America/New_York")
+
+@pytest.fixture
+def profiling(tmp_path):
+    def on(mode, memory=False):
+        configure(ProfileConfig(mode, str(tmp_path / "prof"), memory=memory, interval=0.001)); return str(tmp_path / "prof")
+    yield on
+    configure(None)
+
+def test_inactive_is_a_no_op():
+    assert ofi_profile.active() is None and isinstance(ofi_profile.task("d", "s"), contextlib.nullcontext)
+
+def test_sampling_with_memory(profiling, make_raw):
+    _ols(); out = profiling("sampling", memory=True)                              # statsmodels import outside the tasks
+    raw = make_raw(n=3000); schema = resolve_schema(raw)
+    for _, g in raw.groupby("sym_root"):
+        process_symbol_day(g, schema.cmap, DAY, do_halfhour_10s=False, time_unit=schema.time_unit)
+    rep = merge_profiles(out)
+    assert rep["tasks"] == 3 and rep["processes"] == 1 and rep["samples"] > 0
+    assert not os.path.exists(os.path.join(out, "merged.pstats"))
+    stacks = open(os.path.join(out, "stacks.collapsed")).read().splitlines()
+    assert stacks and all(l.startswith("process_symbol_day (ofi_utils.py:") for l in stacks)
+    assert any(r["function"].startswith("build_tob_series_1s") for r in rep["cumulative"])
+    assert rep["allocation"] and all(t["peak_bytes"] > 0 for t in rep["peak_tasks"])
+    assert "Top functions by allocation" in open(os.path.join(out, "report.txt")).read()
+
+def test_cprofile_merges_worker_processes(tmp_path, profiling, make_raw):
+    pyreadr = pytest.importorskip("pyreadr")
+    rda = tmp_path / "2017-01-03.rda"; pyreadr.write_rdata(str(rda), make_raw(n=3000), df_name="q")
+    out = profiling("cprofile")
+    process_day_rda(str(rda), str(tmp_path / "res"), workers=2)
+    rep = merge_profiles(out)
+    assert rep["tasks"] == 3 and rep["processes"] == 2
+    st = pstats.Stats(os.path.join(out, "merged.pstats"))
+    assert any(fn == "compute_ofi_depth_mid" for _, _, fn in st.stats)
+    assert rep["cumulative"][0]["cum_s"] >= rep["cumulative"][-1]["cum_s"]
@@ -0,0 +1,52 @@
+import numpy as np, pandas as pd, pytest
+from src.ofi_utils import resolve_columns, process_day_rda
+from src.ofi_quality import QualityConfig, quality_mask
+from src.ofi_pipeline import run_batch, run_one_day
+
+def raw_quotes():
+    return pd.DataFrame({"sym_root":["A","A","A","A","B","B","B"],
+                         "time_m":[34200,34201,34202,34100,34200,34300,70000],
+                         "best_bid":[10.0,10.0,10.02,10.0,5.0,5.0,5.0],"best_ask":[10.01,10.0,10.01,10.01,5.01,5.5,5.01],
+                         "best_bidsiz":[1,1,1,1,0,1,1],"best_asksiz":[1,1,1,1,1,1,1]})
+
+def test_rules_and_counts():
+    df=raw_quotes(); cmap=resolve_columns(df)
+    rep=quality_mask(df,cmap,QualityConfig(drop_locked=True,drop_zero_size=True,stale_secs=60,spread_outlier_mult=5,spread_window=3,session=("09:30","16:00")),time_unit="s")
+    assert rep.counts["crossed"]==1 and rep.counts["locked"]==1 and rep.counts["zero_size"]==1
+    assert rep.counts["stale"]==3 and rep.counts["session"]==2 and rep.counts["spread_outlier"]==1
+    assert rep.mask.tolist()==[True,False,False,False,False,False,False]
+    b=rep.by_symbol.set_index("symbol")
+    assert b.loc["A","n_raw"]==4 and b.loc["B","rejected_zero_size"]==1 and b["n_kept"].sum()==rep.counts["n_kept"]
+
+def test_symbol_rules_follow_time_not_file_order(make_raw):
+    df=make_raw(1,n=500); cmap=resolve_columns(df)
+    cfg=QualityConfig(stale_secs=120,spread_outlier_mult=2,spread_window=20)
+    rep=quality_mask(df,cmap,cfg,time_unit="s")
+    ordered=df.sort_values(["sym_root","time_m"],kind="stable")
+    ref=quality_mask(ordered.reset_index(drop=True),cmap,cfg,time_unit="s")
+    assert (rep.mask[ordered.index.to_numpy()]==ref.mask).all() and rep.counts==ref.counts
+    assert rep.counts["stale"]>0 and rep.counts["spread_outlier"]>0
+
+def test_null_symbols_are_dropped_and_left_out_of_by_symbol():
+    df=raw_quotes(); df["sym_root"]=df["sym_root"].astype(object); df.loc[[1,5],"sym_root"]=None; cmap=resolve_columns(df)
+    rep=quality_mask(df,cmap,QualityConfig(stale_secs=60,spread_outlier_mult=5,spread_window=3),time_unit="s")
+    assert not rep.mask[[1,5]].any() and rep.counts["no_symbol"]==2
+    b=rep.by_symbol.set_index("symbol")
+    assert b["n_raw"].tolist()==[3,2] and b["n_kept"].sum()==rep.counts["n_kept"]
+
+def test_default_config_matches_unfiltered_pipeline(tmp_path, make_raw):
+    pyreadr=pytest.importorskip("pyreadr")
+    rda=tmp_path/"2017-01-03.rda"; pyreadr.write_rdata(str(rda),make_raw(3),df_name="q")
+    a=process_day_rda(str(rda),str(tmp_path/"a")); b=process_day_rda(str(rda),str(tmp_path/"b"),quality=QualityConfig())
+    pd.testing.assert_frame_equal(a,b)
+    q=pd.read_parquet(tmp_path/"b"/"regressions"/"quality_by_symbol_day.parquet")
+    assert list(q["symbol"])==["AAA","MMM","ZZ"] and (q["n_raw"]==4000).all()
+
+@pytest.mark.parametrize("kw", [dict(engine="arrow"), dict(cache_dir="cache")])
+def test_quality_rejected_on_paths_without_it(tmp_path, kw):
+    with pytest.raises(ValueError, match="quality"):
+        run_one_day(str(tmp_path/"2017-01-03.rda"), str(tmp_path/"out"), quality=QualityConfig(), **kw)
+
+def test_quality_rejected_with_executor(tmp_path):
+    with pytest.raises(ValueError, match="quality"):
+        run_batch(str(tmp_path), str(tmp_path/"out"), quality=QualityConfig(), executor="serial")
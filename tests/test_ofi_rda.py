@@ -0,0 +1,63 @@
+import bz2, lzma, struct, numpy as np, pandas as pd, pytest
+from src.ofi_rda import RdaFormatError, open_rda_stream, read_rda_native
+from src.ofi_utils import pipeline_columns, read_rda
+
+pyreadr = pytest.importorskip("pyreadr")
+
+def raw_with_strings(make_raw, seed=0):
+    df = make_raw(seed, n=1500); rng = np.random.default_rng(seed)
+    df["ex"] = rng.choice(["N", "P", "TQ", ""], len(df))
+    df["sym_suffix"] = np.where(rng.random(len(df)) < 0.3, None, "A")
+    df["n"] = rng.integers(-5, 5, len(df)).astype("int32")
+    return df
+
+def as_plain(df):
+    return pd.DataFrame({c: df[c].astype(object) if isinstance(df[c].dtype, pd.CategoricalDtype) else df[c] for c in df}).reset_index(drop=True)
+
+@pytest.mark.parametrize("comp", [None, "gzip", "bz2", "xz"])
+def test_matches_pyreadr(tmp_path, comp, make_raw):
+    path = str(tmp_path / "2017-01-03.rda")
+    pyreadr.write_rdata(path, raw_with_strings(make_raw), df_name="q", compress="gzip" if comp == "gzip" else None)
+    if comp in ("bz2", "xz"):
+        payload = open(path, "rb").read()
+        open(path, "wb").write(bz2.compress(payload) if comp == "bz2" else lzma.compress(payload))
+    ref = as_plain(next(iter(pyreadr.read_r(path).values())))
+    got = read_rda_native(path)
+    assert isinstance(got["sym_root"].dtype, pd.CategoricalDtype) and list(got["sym_root"].cat.categories) == ["AAA", "MMM", "ZZ"]
+    pd.testing.assert_frame_equal(as_plain(got), ref, check_dtype=False)
+    assert got["sym_suffix"].isna().sum() == ref["sym_suffix"].isna().sum() > 0
+
+def test_column_subset_and_layout_change(tmp_path, make_raw):
+    a, b = str(tmp_path / "2017-01-03.rda"), str(tmp_path / "2017-01-04.rda")
+    df = raw_with_strings(make_raw, 1)
+    pyreadr.write_rdata(a, df, df_name="q"); pyreadr.write_rdata(b, df[df.columns[::-1]], df_name="q")
+    for path in (a, a, b):                          # second read skips columns by hint; b has another layout
+        got = read_rda(path, pipeline_columns)
+        cols = ["sym_root", "time_m", "best_bid", "best_ask", "best_bidsiz", "best_asksiz"]
+        assert list(got.columns) == (cols if path == a else cols[::-1])            # file order
+        pd.testing.assert_frame_equal(as_plain(got), df[list(got.columns)].reset_index(drop=True), check_dtype=False)
+    assert list(read_rda(a, ["n", "ex"]).columns) == ["ex", "n"]
+
+def _sym(name):
+    return struct.pack(">ii", 1, 9) + struct.pack(">i", len(name)) + name.encode()
+
+def _str(*xs):
+    return struct.pack(">ii", 16, len(xs)) + b"".join(struct.pack(">ii", 9, len(x)) + x.encode() for x in xs)
+
+def test_compact_intseq_column(tmp_path):
+    # R >= 3.5 writes 1:n as an ALTREP compact sequence: (class info, state = c(n, start, step), attributes)
+    info = struct.pack(">i", 2) + _sym("compact_intseq") + struct.pack(">i", 2) + _sym("base") \
+        + struct.pack(">i", 2) + struct.pack(">iii", 13, 1, 1) + struct.pack(">i", 254)
+    col = struct.pack(">i", 238) + info + struct.pack(">ii", 14, 3) + struct.pack(">ddd", 4, 10, 1) + struct.pack(">i", 254)
+    attrs = struct.pack(">i", 2 | 1 << 10) + _sym("names") + _str("k") \
+        + struct.pack(">i", 2 | 1 << 10) + _sym("class") + _str("data.frame") + struct.pack(">i", 254)
+    body = struct.pack(">i", 2 | 1 << 10) + _sym("q") + struct.pack(">ii", 19 | 1 << 9, 1) + col + attrs + struct.pack(">i", 254)
+    path = tmp_path / "x.rda"
+    path.write_bytes(b"RDX3\nX\n" + struct.pack(">iiii", 3, 0x40100, 0x30500, 5) + b"UTF-8" + body)
+    got = read_rda_native(str(path))
+    assert got["k"].tolist() == [10, 11, 12, 13] and got["k"].dtype == "int32"
+
+def test_unsupported_files_raise(tmp_path):
+    path = tmp_path / "x.rda"; path.write_bytes(b"RDA2\nA\n1\n")
+    with pytest.raises(RdaFormatError): read_rda_native(str(path))
+    with open_rda_stream(str(path)) as f: assert f.read(4) == b"RDA2"
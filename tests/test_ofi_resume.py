@@ -0,0 +1,68 @@
+import json, os, pandas as pd, pytest
+import src.ofi_exec as ofi_exec
+from src.ofi_io import RunJournal
+from src.ofi_utils import atomic_path, process_day_rda
+
+def test_atomic_path_leaves_old_file_on_failure(tmp_path):
+    p = tmp_path/"x.parquet"; pd.DataFrame({"a": [1]}).to_parquet(p)
+    with pytest.raises(ValueError):
+        with atomic_path(str(p)) as tmp:
+            open(tmp, "wb").write(b"partial"); raise ValueError
+    assert pd.read_parquet(p)["a"].tolist() == [1] and os.listdir(tmp_path) == ["x.parquet"]
+
+def test_atomic_path_fsyncs_before_replace(tmp_path, monkeypatch):
+    calls = []; real_fsync, real_replace = os.fsync, os.replace
+    monkeypatch.setattr(os, "fsync", lambda fd: calls.append("fsync") or real_fsync(fd))
+    monkeypatch.setattr(os, "replace", lambda a, b: calls.append("replace") or real_replace(a, b))
+    with atomic_path(str(tmp_path/"x.txt")) as tmp:
+        open(tmp, "w").write("done")
+    assert calls == ["fsync", "replace"] + (["fsync"] if os.name == "posix" else []) and (tmp_path/"x.txt").read_text() == "done"
+
+def test_journal_ignores_torn_line(tmp_path):
+    path = str(tmp_path/"journal.jsonl")
+    with RunJournal(path) as j:
+        j.mark_unit("2017-01-03", "AAA", {"symbol": "AAA", "beta": float("nan")}, [], 0.1)
+    open(path, "a").write('{"kind": "unit", "day": "2017-01-03", "sym')
+    j = RunJournal(path, resume=True); j.close()
+    assert list(j.units) == [("2017-01-03", "AAA")]
+    assert RunJournal(path).units == {} and open(path).read() == ""
+
+def test_crash_resume_resume_keeps_records_after_torn_line(tmp_path):
+    path = str(tmp_path/"journal.jsonl")
+    with RunJournal(path) as j: j.mark_day("2017-01-03", [{"symbol": "AAA"}])
+    open(path, "a").write('{"kind": "day", "day": "2017-01-04", "ro')           # crash mid-write
+    with RunJournal(path, resume=True) as j: j.mark_day("2017-01-05", [{"symbol": "AAA"}])
+    j = RunJournal(path, resume=True); j.close()
+    assert sorted(j.days) == ["2017-01-03", "2017-01-05"]
+
+def test_resume_rejects_a_journal_of_the_other_mode(tmp_path):
+    from src.ofi_pipeline import run_batch
+    out = tmp_path/"out"; out.mkdir()
+    with RunJournal(str(out/"journal.jsonl")) as j: j.mark_unit("2017-01-03", "AAA", {"symbol": "AAA"}, [], 0.1)
+    with pytest.raises(ValueError, match="executor run"):
+        run_batch(str(tmp_path), str(out), resume=True)
+    with RunJournal(str(out/"journal.jsonl")) as j: j.mark_day("2017-01-03", [{"symbol": "AAA"}])
+    with pytest.raises(ValueError, match="day-by-day run"):
+        run_batch(str(tmp_path), str(out), executor="serial", resume=True)
+
+def test_resume_after_crash_skips_finished_tasks(tmp_path, monkeypatch, day_caches):
+    rdas, caches = day_caches()
+    ref = pd.concat([process_day_rda(str(r), str(tmp_path/"ref")) for r in rdas], ignore_index=True)
+    out = str(tmp_path/"ex"); real = ofi_exec.run_task; calls = []
+
+    def crashing(task, *a):
+        if task.symbol == "MMM" and task.day == "2017-01-04": raise OSError("node preempted")
+        calls.append((task.day, task.symbol)); return real(task, *a)
+    monkeypatch.setattr(ofi_exec, "run_task", crashing)
+    with RunJournal(os.path.join(out, "journal.jsonl")) as j, pytest.raises(RuntimeError):
+        ofi_exec.process_days_distributed(caches, out, retries=0, journal=j)
+    assert not os.path.exists(os.path.join(out, "regressions", "by_symbol_day.parquet"))
+
+    first = set(calls); calls.clear()
+    monkeypatch.setattr(ofi_exec, "run_task", lambda task, *a: (calls.append((task.day, task.symbol)), real(task, *a))[1])
+    with RunJournal(os.path.join(out, "journal.jsonl"), resume=True) as j:
+        got = ofi_exec.process_days_distributed(caches, out, journal=j)
+    assert ("2017-01-04", "MMM") in calls and not first & set(calls) and len(first) + len(calls) == 6
+    pd.testing.assert_frame_equal(ref, got, check_dtype=False)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path/"ref/regressions/by_symbol_day_halfhour.parquet"),
+                                  pd.read_parquet(os.path.join(out, "regressions/by_symbol_day_halfhour.parquet")), check_dtype=False)
@@ -0,0 +1,73 @@
+import os, numpy as np, pandas as pd, pytest
+from src.ofi_cross import DayPanel
+from src.ofi_pipeline import run_one_day
+from src.ofi_seasonality import SeasonalProfile, seconds_of_day, load_profiles, profile_before, profile_path
+
+def _panel(day, symbols, seed, T=23400):
+    # one trading session at 1s; the spread of both fields follows a U shape over the day
+    rng=np.random.default_rng(seed); t=pd.date_range(f"{day} 09:30",periods=T,freq="1s",tz="America/New_York")
+    u=np.linspace(-1,1,T); sd=(1+2*u**2)[None,:,None]
+    v=rng.normal(size=(2,T,len(symbols)))*sd+0.5; v[0,:50]=np.nan
+    return DayPanel(day,t.tz_convert("UTC").as_unit("ns").asi8,list(symbols),["normalized_OFI","d_mid_bps"],v)
+
+def test_incremental_moments_match_groupby(tmp_path):
+    a,b=_panel("2017-01-03",["AAA","MMM"],0),_panel("2017-01-04",["ZZ","AAA"],1)
+    inc=SeasonalProfile(600); assert inc.add_panel(a) and inc.add_panel(b) and not inc.add_panel(a)
+    assert inc.symbols==["AAA","MMM","ZZ"] and inc.days==["2017-01-03","2017-01-04"]
+    rows=[]
+    for p in (a,b):
+        sod=seconds_of_day(pd.DatetimeIndex(p.time_ns.view("datetime64[ns]")).tz_localize("UTC"))
+        for j,s in enumerate(p.symbols): rows.append(pd.DataFrame({"symbol":s,"bucket":sod//600,"x":p.values[1,:,j]}))
+    ref=pd.concat(rows).groupby(["symbol","bucket"])["x"].agg(["count","sum",lambda x:(x**2).sum()])
+    for (s,bk),r in ref.iterrows():
+        i=inc.symbols.index(s)
+        assert inc.count[1,i,bk]==r.iloc[0]; np.testing.assert_allclose([inc.total[1,i,bk],inc.sumsq[1,i,bk]],r.iloc[1:].to_numpy())
+    assert inc.count[0].sum()==inc.count[1].sum()-4*50
+    back=SeasonalProfile.load(inc.save(profile_path(str(tmp_path))))
+    assert back.symbols==inc.symbols and back.days==inc.days and back.bucket_secs==600
+    np.testing.assert_array_equal(back.sumsq,inc.sumsq)
+    one,two=SeasonalProfile(600),SeasonalProfile(600); one.add_panel(a); two.add_panel(b); less=inc.without(two)
+    assert less.days==["2017-01-03"] and not less.count[:,2].any() and not inc.merge(one)
+    np.testing.assert_array_equal(less.count[:,:2],one.count); np.testing.assert_allclose(less.sumsq[:,:2],one.sumsq,atol=1e-6)
+    assert one.merge(two) and one.days==inc.days; np.testing.assert_array_equal(one.count,inc.count)
+
+def test_buckets_follow_true_time_across_dst():
+    # 10:00 New York is 15:00 UTC in EST and 14:00 UTC in EDT; both land in the 10:00 bucket
+    est=pd.DatetimeIndex(["2017-03-10 15:00"]).tz_localize("UTC")
+    edt=pd.DatetimeIndex(["2017-03-14 14:00"]).tz_localize("UTC")
+    assert seconds_of_day(est)[0]==seconds_of_day(edt)[0]==10*3600
+
+def test_adjust_flattens_intraday_spread():
+    prof=SeasonalProfile()
+    for i,day in enumerate(["2017-01-03","2017-01-04","2017-01-05"]): prof.add_panel(_panel(day,["AAA"],i))
+    p=_panel("2017-01-06",["AAA"],9); ts=p.frame("d_mid_bps").rename(columns={"AAA":"d_mid_bps"})
+    ts["normalized_OFI"]=p.field("normalized_OFI")[:,0]; ts["depth"]=1.0
+    adj=prof.adjust(ts,"AAA"); b=seconds_of_day(ts.index)//prof.bucket_secs
+    raw_sd,adj_sd=ts.groupby(b)["d_mid_bps"].std(),adj.groupby(b)["d_mid_bps"].std()
+    cv=lambda sd:sd.std()/sd.mean()
+    assert cv(raw_sd)>0.3 and cv(adj_sd)<0.06
+    assert abs(adj["d_mid_bps"].mean())<0.05 and adj["normalized_OFI"].isna().sum()==50
+    assert (adj["depth"]==1.0).all()
+    pd.testing.assert_frame_equal(prof.adjust(ts,"NEW"),ts)                 # unseen symbol: unchanged
+
+def test_pipeline_applies_earlier_days_then_updates(tmp_path, make_raw):
+    pyreadr=pytest.importorskip("pyreadr"); out=str(tmp_path/"out"); plain=str(tmp_path/"plain")
+    for i,day in enumerate(["2017-01-03","2017-01-04"]):
+        rda=str(tmp_path/f"{day}.rda"); pyreadr.write_rdata(rda,make_raw(i,n=1500),df_name="q")
+        res=run_one_day(rda,out,make_daily_scatter=False,seasonality=True)
+        ref=run_one_day(rda,plain,make_daily_scatter=False)
+        assert load_profiles(out).days==["2017-01-03","2017-01-04"][:i+1]
+        ts=f"timeseries/{day}/AAA.parquet"
+        pd.testing.assert_frame_equal(pd.read_parquet(os.path.join(out,ts)),pd.read_parquet(os.path.join(plain,ts)))
+        if i==0:
+            assert "seasonal_days" not in res and np.allclose(res["beta"],ref["beta"])
+        else:
+            assert (res["seasonal_days"]==1).all() and not np.allclose(res["beta"],ref["beta"])
+            assert (res["n"]==ref["n"]).all()
+    with pytest.raises(ValueError): run_one_day(rda,out,engine="arrow",seasonality=True)
+    # reruns see only earlier days, even though the saved profile now holds both
+    first=str(tmp_path/"2017-01-03.rda"); again=run_one_day(first,out,make_daily_scatter=False,seasonality=True)
+    assert "seasonal_days" not in again and np.allclose(again["beta"],run_one_day(first,plain,make_daily_scatter=False)["beta"])
+    assert profile_before(out,"2017-01-04").days==["2017-01-03"] and profile_before(out,"2017-01-03") is None
+    again=run_one_day(rda,out,make_daily_scatter=False,seasonality=True)
+    assert (again["seasonal_days"]==1).all() and np.allclose(again["beta"],res["beta"])
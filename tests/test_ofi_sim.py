@@ -0,0 +1,25 @@
+import numpy as np, pandas as pd
+from src.ofi_sim import SimConfig, simulate_day
+from src.ofi_utils import resolve_schema, process_symbol_day, run_ols_xy
+
+DAY = pd.Timestamp("2017-01-03", tz="America/New_York")
+
+def test_taq_shape_and_whole_second_quotes():
+    df, truth = simulate_day(SimConfig(n_symbols=3, quote_rate=2, seed=1))
+    schema = resolve_schema(df)
+    assert schema.cmap.symbol == "sym_root" and schema.time_unit == "s" and truth["quotes"] == len(df)
+    assert df["time_m"].is_monotonic_increasing and (df["best_ask"] > df["best_bid"]).all()
+    whole = df[df["time_m"] == np.floor(df["time_m"])]
+    assert (whole.groupby("sym_root").size() == 23401).all() and (df[["best_bidsiz", "best_asksiz"]] >= 1).all().all()
+
+def test_pipeline_recovers_known_beta():
+    df, truth = simulate_day(SimConfig(n_symbols=2, impact_bps=[0.2, 0.8], quote_rate=1, seed=7))
+    schema = resolve_schema(df)
+    for j, (sym, g) in enumerate(df.groupby("sym_root")):
+        ts, row, _ = process_symbol_day(g, schema.cmap, DAY, do_halfhour_10s=False, time_unit=schema.time_unit)
+        assert truth["exact_share"][j] > 0.95
+        assert abs(row["beta"] / truth["beta_bps"][j] - 1) < 0.2
+        # the latent flow is an exact regressor: only sampling error remains
+        x = pd.Series(truth["flow"][:len(ts), j], index=ts.index)
+        st = run_ols_xy(x, ts["d_mid_bps"])
+        assert abs(st["beta"] - truth["beta_bps"][j]) < 4 * st["se_beta"]
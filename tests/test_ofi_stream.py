@@ -0,0 +1,93 @@
+import os, struct, numpy as np, pandas as pd, pytest
+from src.ofi_rda import RdaChunks, read_rda_native, _LAYOUTS
+from src.ofi_stream import process_day_stream, symbol_runs, sorted_groups
+from src.ofi_utils import process_day_rda
+
+pyreadr = pytest.importorskip("pyreadr")
+
+def write(path, df):
+    pyreadr.write_rdata(str(path), df, df_name="q", compress="gzip"); return str(path)
+
+def sort_raw(df):
+    df = df.sort_values(["sym_root", "time_m"], kind="stable").reset_index(drop=True)
+    df["ex"] = np.where(np.arange(len(df)) % 7 == 0, None, "N")                  # trailing, unused columns
+    return df
+
+def test_chunks_reassemble_the_frame(tmp_path, make_raw):
+    path = write(tmp_path / "2017-01-03.rda", sort_raw(make_raw()))
+    r = RdaChunks(path, chunk_rows=1000); parts = {}
+    for ch in r:
+        assert len(ch.values) <= 1000 and ch.n_rows == r.n_rows
+        parts.setdefault(ch.column, []).append(ch.values)
+    got = pd.DataFrame({r.names[j]: r.column(j, np.concatenate(v)) for j, v in parts.items()})
+    pd.testing.assert_frame_equal(got, read_rda_native(path))
+
+def test_runs_and_groups():
+    codes = np.array([1, 1, 0, 0, 0, 2], dtype=np.int32)
+    assert symbol_runs(codes, ["B", "A", "C"]) == [("A", 0, 2), ("B", 2, 5), ("C", 5, 6)]
+    assert symbol_runs(codes, ["A", "B", "C"]) is None                                 # runs out of order
+    groups = [(s, list(rows)) for s, rows in sorted_groups(np.array([1, 0, -1, 1], dtype=np.int32), ["B", "A"])]
+    assert groups == [("A", [0, 3]), ("B", [1])]
+
+@pytest.mark.parametrize("layout, early", [("sorted", 3), ("shuffled", 0)])
+def test_stream_matches_process_day_rda(tmp_path, make_raw, layout, early):
+    raw = lambda seed: sort_raw(make_raw(seed)) if layout == "sorted" else make_raw(seed)
+    _LAYOUTS.clear()
+    write(tmp_path / "2017-01-03.rda", raw(1)); path = write(tmp_path / "2017-01-04.rda", raw(2))
+    cold = process_day_stream(str(tmp_path / "2017-01-03.rda"), str(tmp_path / "s"), chunk_rows=2500)
+    assert cold.attrs["stats"]["early"] == 0                                           # no layout known yet
+    ref = process_day_rda(path, str(tmp_path / "ref"))
+    got = process_day_stream(path, str(tmp_path / "s"), chunk_rows=2500)
+    assert got.attrs["stats"]["early"] == early
+    pd.testing.assert_frame_equal(got, ref)
+    for name in ("by_symbol_day.parquet", "by_symbol_day_halfhour.parquet"):
+        a = pd.read_parquet(tmp_path / "ref" / "regressions" / name); b = pd.read_parquet(tmp_path / "s" / "regressions" / name)
+        pd.testing.assert_frame_equal(a[a.day == "2017-01-04"].reset_index(drop=True), b[b.day == "2017-01-04"].reset_index(drop=True))
+    for f in os.listdir(tmp_path / "ref" / "timeseries" / "2017-01-04"):
+        pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "s" / "timeseries" / "2017-01-04" / f),
+                                      pd.read_parquet(tmp_path / "ref" / "timeseries" / "2017-01-04" / f))
+
+def test_layout_change_redoes_the_day(tmp_path, make_raw):
+    _LAYOUTS.clear()
+    df = sort_raw(make_raw(3)); write(tmp_path / "2017-01-03.rda", df)
+    read_rda_native(str(tmp_path / "2017-01-03.rda"))                                 # hint: the original order
+    moved = df[["best_ask", "best_bid", "sym_root", "time_m", "ex", "best_bidsiz", "best_asksiz"]]
+    path = write(tmp_path / "2017-01-04.rda", moved)
+    got = process_day_stream(path, str(tmp_path / "s"), chunk_rows=2500)
+    pd.testing.assert_frame_equal(got, process_day_rda(path, str(tmp_path / "ref")))
+    assert sorted(os.listdir(tmp_path / "s" / "timeseries" / "2017-01-04")) == ["AAA.parquet", "MMM.parquet", "ZZ.parquet"]
+
+def _sym(name):
+    return struct.pack(">ii", 1, 9) + struct.pack(">i", len(name)) + name.encode()
+
+def _str(*xs):
+    return struct.pack(">ii", 16, len(xs)) + b"".join(struct.pack(">ii", 9, len(x)) + x.encode() for x in xs)
+
+def write_factor_frame(path, df, factor="sym_root"):
+    """Uncompressed XDR .rda of ``df`` with ``factor`` stored as an R factor (pyreadr writes character vectors)."""
+    body = b""
+    for c in df.columns:
+        if c == factor:
+            cat = pd.Categorical(df[c]); codes = np.where(cat.codes < 0, -2**31, cat.codes + 1).astype(">i4")
+            body += struct.pack(">ii", 13 | 1 << 9, len(df)) + codes.tobytes()
+            body += struct.pack(">i", 2 | 1 << 10) + _sym("levels") + _str(*cat.categories)
+            body += struct.pack(">i", 2 | 1 << 10) + _sym("class") + _str("factor") + struct.pack(">i", 254)
+        else:
+            body += struct.pack(">ii", 14, len(df)) + df[c].to_numpy(dtype=">f8").tobytes()
+    attrs = struct.pack(">i", 2 | 1 << 10) + _sym("names") + _str(*df.columns) \
+        + struct.pack(">i", 2 | 1 << 10) + _sym("class") + _str("data.frame") + struct.pack(">i", 254)
+    frame = struct.pack(">i", 2 | 1 << 10) + _sym("q") + struct.pack(">ii", 19 | 1 << 9, df.shape[1]) + body + attrs + struct.pack(">i", 254)
+    with open(path, "wb") as f:
+        f.write(b"RDX3\nX\n" + struct.pack(">iiii", 3, 0x40100, 0x30500, 5) + b"UTF-8" + frame)
+    return str(path)
+
+@pytest.mark.parametrize("layout, early", [("sorted", 3), ("shuffled", 0)])
+def test_factor_symbols(tmp_path, make_raw, layout, early):
+    raw = lambda seed: sort_raw(make_raw(seed)) if layout == "sorted" else make_raw(seed)
+    _LAYOUTS.clear()
+    days = [write_factor_frame(tmp_path / f"2017-01-0{d}.rda", raw(d).drop(columns=["ex"], errors="ignore")) for d in (3, 4)]
+    assert isinstance(read_rda_native(days[1])["sym_root"].dtype, pd.CategoricalDtype)
+    process_day_stream(days[0], str(tmp_path / "s"), chunk_rows=2500)
+    got = process_day_stream(days[1], str(tmp_path / "s"), chunk_rows=2500)
+    assert got.attrs["stats"]["early"] == early
+    pd.testing.assert_frame_equal(got, process_day_rda(days[1], str(tmp_path / "ref")))
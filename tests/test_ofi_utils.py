@@ -1,6 +1,6 @@
 # tests/test_ofi_utils.py
 import pandas as pd, numpy as np
-from src.ofi_utils import compute_ofi_depth_mid, normalize_ofi, run_ols_symbol_day, detect_time_unit
+from src.ofi_utils import compute_ofi_depth_mid, normalize_ofi, run_ols_symbol_day, detect_time_unit, time_m_to_ns, resolve_schema, clear_schema_cache
 
 def make_df(bid,ask,bidsz,asksz,freq="1s"):
     idx=pd.date_range("2024-06-03 09:30:00-04:00",periods=len(bid),freq=freq)
@@ -31,3 +31,16 @@ def test_positive_beta_on_synthetic():
     out["d_mid_bps"]=y
     st=run_ols_symbol_day(out)
     assert st["beta"]>0 and st["r2"]>0
+
+def test_time_m_to_ns_truncates_like_astype():
+    v=np.array([34200.9,34201.0,57600.5])
+    assert (time_m_to_ns(v,"s")==v.astype("int64")*1_000_000_000).all()
+    assert time_m_to_ns(np.array([34_200_000]),"ms")[0]==34_200*10**9
+
+def test_schema_cache_hits_and_detects_drift():
+    clear_schema_cache()
+    raw=pd.DataFrame({"sym_root":["A"],"time_m":[34200.0],"best_bid":[1.0],"best_ask":[1.01],"best_bidsiz":[1.0],"best_asksiz":[1.0]})
+    s1=resolve_schema(raw,"t"); assert s1.time_unit=="s" and s1.cmap.bid=="best_bid"
+    assert resolve_schema(raw.assign(time_m=[9e9]),"t") is s1
+    s2=resolve_schema(raw.rename(columns={"best_bid":"bid"}),"t")
+    assert s2 is not s1 and s2.cmap.bid=="bid"